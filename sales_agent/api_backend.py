@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import asyncio
 import json
@@ -7,6 +7,7 @@ import os
 import subprocess
 import time
 import signal
+import queue
 from datetime import datetime
 
 # Add the project root to the Python path
@@ -16,13 +17,18 @@ from sales_agent.outreach.gpt_script_generation import generate_outreach_script
 from sales_agent.outreach.gmail_smtp import send_email
 from sales_agent.utils.email_verification import verify_email_with_abstractapi
 
-from sales_agent.leads.google_sheets import GoogleSheet
+from sales_agent.leads.lead_store import get_lead_store
+from sales_agent.leads.sheets_scheduler import sheets_scheduler, interactive_sheets_calls
+from sales_agent.leads.google_sheets import client_pool
+from sales_agent.leads.lead_export import iter_export, EXPORT_FORMATS
 from sales_agent.leads.enrichment import enrich_lead_data
-from sales_agent.config import GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH
 from sales_agent.utils.logger import logger
-from sales_agent.shared_state import get_task_run, get_all_task_runs, update_task_run, create_task_run, add_log_to_run
+from sales_agent.run_events import run_events
+from sales_agent.shared_state import get_task_run, update_task_run, create_task_run, add_log_to_run, get_state, list_task_runs, get_run_logs, get_recent_logs, iter_run_logs, set_approval_event, approve_run_actions, get_pending_approvals
 # New import for real-time lead finding
 from sales_agent.leads.realtime_finder import find_leads_realtime
+from sales_agent.leads.crawl_frontier import get_crawl_frontier
+from sales_agent.state_retention import start_retention_job, apply_retention, retention_metrics, load_retention_policy, get_archived_task_run, list_archived_task_runs
 import threading
 try:
     from jitsi_plus_plugin.integrations.flask import init_jitsi_plus
@@ -43,8 +49,56 @@ if JITSI_AVAILABLE:
 else:
     jitsi_plus = None
 
-# Global Google Sheets instance
-google_sheet = GoogleSheet(GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH)
+# Global lead store (the Leads sheet or the lead database, see LEAD_STORE_BACKEND)
+google_sheet = get_lead_store()
+
+# Periodically archive finished task runs so the hot state stays small
+start_retention_job()
+
+# One long-lived event loop for the async lead store calls made by request handlers
+_async_loop = None
+_async_loop_lock = threading.Lock()
+
+
+async def _interactive(coro):
+    with interactive_sheets_calls():
+        return await coro
+
+
+def run_async(coro):
+    """Run a coroutine on the shared background event loop and wait for its result.
+
+    Sheets calls made by it go in the interactive lane, since a person is waiting.
+    """
+    global _async_loop
+    with _async_loop_lock:
+        if _async_loop is None:
+            _async_loop = asyncio.new_event_loop()
+            threading.Thread(target=_async_loop.run_forever, name="api-async-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(_interactive(coro), _async_loop).result()
+
+
+def _iter_async(agen):
+    """Drive an async generator from a (Flask) thread, one item at a time."""
+    try:
+        while True:
+            try:
+                yield run_async(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_async(agen.aclose())
+
+
+def _int_arg(name, value):
+    """A non-negative integer request argument (or header); ValueError with a message for the client otherwise."""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = -1
+    if number < 0:
+        raise ValueError(f"'{name}' must be a non-negative integer, got {value!r}")
+    return number
 
 @app.route('/', methods=['GET'])
 def welcome():
@@ -54,6 +108,7 @@ def welcome():
         "status": "running",
         "available_endpoints": [
             "/api/health",
+            "/api/sheets/metrics",
             "/api/send-email",
             "/api/verify-email",
             "/api/find-leads",
@@ -64,8 +119,14 @@ def welcome():
             "/api/competitors",
             "/api/export-spreadsheet",
             "/api/task-runs",
+            "/api/task-runs/retention",
+            "/api/task-runs/archive",
             "/api/task-runs/<run_id>",
+            "/api/task-runs/<run_id>/logs",
+            "/api/task-runs/<run_id>/logs/stream",
+            "/api/task-runs/<run_id>/events",
             "/api/approve-task/<run_id>",
+            "/api/approvals",
             "/api/bot/start",
             "/api/bot/status"
         ]
@@ -76,15 +137,39 @@ def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "message": "Dyna API is running"})
 
+@app.route('/api/sheets/metrics', methods=['GET'])
+def sheets_metrics_api():
+    """Google Sheets call latency, retries and 429 throttling since startup"""
+    return jsonify({"success": True, "metrics": sheets_scheduler.metrics(), "clients": dict(client_pool.stats)})
+
 @app.route('/api/task-runs', methods=['GET'])
 def get_task_runs_api():
-    """Get all task runs"""
+    """Get a page of task runs, newest first.
+
+    Query params: status, command, user_id, limit (default 50), offset,
+    include_logs (1 to embed every log line; otherwise only log_count).
+    """
     try:
-        runs = get_all_task_runs()
+        limit = min(_int_arg('limit', request.args.get('limit', 50)), 500)
+        offset = _int_arg('offset', request.args.get('offset', 0))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        runs, total = list_task_runs(
+            status=request.args.get('status'),
+            command=request.args.get('command'),
+            user_id=request.args.get('user_id'),
+            limit=limit,
+            offset=offset,
+            include_logs=request.args.get('include_logs') in ('1', 'true'),
+        )
         return jsonify({
             "success": True,
             "task_runs": runs,
-            "count": len(runs)
+            "count": len(runs),
+            "total": total,
+            "limit": limit,
+            "offset": offset
         })
     except Exception as e:
         logger.error(f"Error in get_task_runs_api: {e}")
@@ -105,11 +190,54 @@ def create_task_run_api():
         logger.error(f"Error in create_task_run_api: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/task-runs/retention', methods=['GET', 'POST'])
+def task_run_retention_api():
+    """GET: retention policy and metrics. POST: run a retention pass now."""
+    try:
+        archived = apply_retention() if request.method == 'POST' else None
+        return jsonify({
+            "success": True,
+            "archived": archived,
+            "policy": load_retention_policy(),
+            "metrics": retention_metrics
+        })
+    except Exception as e:
+        logger.error(f"Error in task_run_retention_api: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/task-runs/archive', methods=['GET'])
+def get_archived_task_runs_api():
+    """List archived task runs. Query params: day (YYYY-MM-DD), command, status, limit, offset."""
+    try:
+        limit = min(_int_arg('limit', request.args.get('limit', 50)), 500)
+        offset = _int_arg('offset', request.args.get('offset', 0))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        runs, total = list_archived_task_runs(
+            day=request.args.get('day'),
+            command=request.args.get('command'),
+            status=request.args.get('status'),
+            limit=limit,
+            offset=offset,
+        )
+        return jsonify({
+            "success": True,
+            "task_runs": runs,
+            "count": len(runs),
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        })
+    except Exception as e:
+        logger.error(f"Error in get_archived_task_runs_api: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/task-runs/<run_id>', methods=['GET'])
 def get_task_run_api(run_id):
-    """Get a specific task run by ID"""
+    """Get a specific task run by ID, falling back to the archive for retired runs"""
     try:
-        run = get_task_run(run_id)
+        run = get_task_run(run_id) or get_archived_task_run(run_id)
         if run:
             return jsonify({"success": True, "task_run": run})
         else:
@@ -118,17 +246,85 @@ def get_task_run_api(run_id):
         logger.error(f"Error in get_task_run_api: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/task-runs/<run_id>/logs', methods=['GET'])
+def get_task_run_logs_api(run_id):
+    """Get the log lines of a task run after the `since` cursor (a log index)"""
+    try:
+        since = _int_arg('since', request.args.get('since', 0))
+        limit = min(_int_arg('limit', request.args.get('limit', 200)), 1000)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        logs = get_run_logs(run_id, since=since, limit=limit)
+        if logs is None:
+            return jsonify({"success": False, "error": "Task run not found"}), 404
+        return jsonify({
+            "success": True,
+            "run_id": run_id,
+            "logs": logs,
+            "next_since": since + len(logs)
+        })
+    except Exception as e:
+        logger.error(f"Error in get_task_run_logs_api: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/task-runs/<run_id>/logs/stream', methods=['GET'])
+def stream_task_run_logs_api(run_id):
+    """Stream the full log history of a task run as NDJSON, including lines spilled to disk"""
+    if get_task_run(run_id) is None:
+        return jsonify({"success": False, "error": "Task run not found"}), 404
+    try:
+        since = _int_arg('since', request.args.get('since', 0))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    def generate():
+        for entry in iter_run_logs(run_id, since=since):
+            yield json.dumps(entry) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/approve-task/<run_id>', methods=['POST'])
 def approve_task_api(run_id):
-    """Approve a task run"""
+    """Approve a task run and every action it is waiting on"""
     try:
         update_task_run(run_id, approved=True)
-        add_log_to_run(run_id, "Task was approved via API")
-        return jsonify({"success": True, "run_id": run_id})
+        # Waiters register (lead_name, action_type) with the run's id; wake them in whichever process they run
+        approved = approve_run_actions(run_id, approved_by="api")
+        add_log_to_run(run_id, f"Task was approved via API ({len(approved)} pending actions approved)")
+        return jsonify({
+            "success": True,
+            "run_id": run_id,
+            "approved": [{"lead_name": lead_name, "action_type": action_type} for lead_name, action_type in approved]
+        })
     except Exception as e:
         logger.error(f"Error in approve_task_api: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/approvals', methods=['GET'])
+def get_pending_approvals_api():
+    """List approval requests that are still waiting for a decision"""
+    try:
+        return jsonify({"success": True, "approvals": get_pending_approvals()})
+    except Exception as e:
+        logger.error(f"Error in get_pending_approvals_api: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/approvals', methods=['POST'])
+def approve_action_api():
+    """Approve a (lead_name, action_type) pair, waking its waiter in any process"""
+    try:
+        data = request.get_json()
+        lead_name = data.get('lead_name')
+        action_type = data.get('action_type')
+        if not lead_name or not action_type:
+            return jsonify({"error": "lead_name and action_type are required"}), 400
+        requested = set_approval_event(lead_name, action_type, approved_by=data.get('approved_by', 'api'))
+        return jsonify({"success": True, "requested": requested})
+    except Exception as e:
+        logger.error(f"Error in approve_action_api: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/send-email', methods=['POST'])
 def send_email_api():
     """Send an email using SMTP"""
@@ -213,12 +409,14 @@ def lead_score_api():
 
 @app.route('/api/dashboard', methods=['GET'])
 def dashboard_api():
-    """Get dashboard data"""
+    """Get dashboard data (pipeline funnel computed on the local Leads mirror)"""
     try:
+        funnel = run_async(google_sheet.get_funnel_metrics())
         data = {
-            "total_leads": google_sheet.get_total_leads(),
-            "active_campaigns": google_sheet.get_active_campaigns(),
-            "conversion_rate": google_sheet.get_conversion_rate(),
+            "total_leads": funnel.get("total_leads", 0),
+            "active_campaigns": funnel.get("in_progress", 0),
+            "conversion_rate": funnel.get("conversion_rate", 0.0),
+            "funnel": funnel,
         }
         return jsonify({"success": True, "data": data})
     except Exception as e:
@@ -237,39 +435,35 @@ def competitors_api():
 
 @app.route('/api/export-spreadsheet', methods=['POST'])
 def export_spreadsheet_api():
-    """Export data in spreadsheet format"""
+    """Stream a leads export as it is read.
+
+    JSON body (or query params): type ('leads'), format (json, csv, ndjson or
+    xlsx; default json, same shape as before), columns (list, comma-separated
+    string or '*'; default the six original columns) and filters (field ->
+    value or list of values; default {"Status": "New"}, the leads the export
+    always returned).
+    """
     try:
-        data = request.get_json()
-        data_type = data.get('type', 'leads')
-        
-        if data_type == 'leads':
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            leads = loop.run_until_complete(google_sheet.read_leads())
-            loop.close()
-            
-            # Format for spreadsheet export
-            spreadsheet_data = {
-                "headers": ["Lead Name", "Company", "Email", "Status", "Lead Score", "Outreach Status"],
-                "rows": []
-            }
-            
-            for lead in leads:
-                row = [
-                    lead.get('Lead Name', ''),
-                    lead.get('Company', ''),
-                    lead.get('Email', ''),
-                    lead.get('Status', ''),
-                    lead.get('Lead Score', 0),
-                    lead.get('Outreach Status', '')
-                ]
-                spreadsheet_data["rows"].append(row)
-            
-            return jsonify({
-                "success": True,
-                "data": spreadsheet_data,
-                "total_rows": len(spreadsheet_data["rows"])
-            })
+        data = request.get_json(silent=True) or {}
+        options = {**request.args.to_dict(), **data}
+        if options.get('type', 'leads') != 'leads':
+            return jsonify({"error": f"Unsupported export type '{options.get('type')}'"}), 400
+        fmt = str(options.get('format', 'json')).lower()
+        columns = options.get('columns')
+        if isinstance(columns, str) and columns != '*':
+            columns = [column.strip() for column in columns.split(',') if column.strip()]
+        filters = options.get('filters', {'Status': 'New'})
+        if isinstance(filters, str):
+            filters = json.loads(filters)
+
+        body = iter_export(_iter_async(google_sheet.iter_leads(filters)), columns, fmt)
+        response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt])
+        if fmt != 'json':
+            response.headers['Content-Disposition'] = f'attachment; filename="leads.{fmt}"'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error in export_spreadsheet_api: {e}")
         return jsonify({"error": str(e)}), 500
@@ -410,6 +604,66 @@ def bot_health_api():
         "lastStart": info.get("lastStart")
     })
 
+# Sources the real-time finder searches unless a request names some; preferred_channels only describe how leads will be contacted
+REALTIME_LEAD_SOURCES = ['google_maps', 'linkedin']
+# Background threads of the real-time runs started by this process, by run_id
+_realtime_threads = {}
+
+
+def _start_realtime_runner(run_id, niche, location, desired_count, found_leads, sources=None):
+    """Run (or resume) a real-time lead search for up to 10 minutes in a daemon thread.
+
+    ``sources`` are the lead sources to search (REALTIME_LEAD_SOURCES when none are given).
+
+    Progress is kept in the crawl frontier, so a run cut short by a restart,
+    a pause or the time limit can be resumed without fetching pages again.
+    """
+    frontier = get_crawl_frontier()
+
+    def _on_lead(lead):
+        # Publish each lead as soon as it is found so stream subscribers see it live
+        found_leads.append(lead)
+        update_task_run(run_id, results={"leads": list(found_leads), "count": len(found_leads)})
+        add_log_to_run(run_id, f"Found lead: {lead.get('company_name')}")
+
+    def _runner():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            try:
+                leads = loop.run_until_complete(asyncio.wait_for(find_leads_realtime(
+                    niche=niche,
+                    location=location,
+                    channels=sources or REALTIME_LEAD_SOURCES,
+                    desired_count=desired_count,
+                    on_lead=_on_lead,
+                    run_id=run_id,
+                    frontier=frontier
+                ), timeout=600))
+            except asyncio.TimeoutError:
+                add_log_to_run(run_id, "Time limit reached, stopping search")
+                leads = list(found_leads)
+            # Final update
+            if frontier.run_status(run_id) == 'paused':
+                update_task_run(run_id, status="paused", results={"leads": leads, "count": len(leads)})
+                add_log_to_run(run_id, f"Search paused with {len(leads)} leads")
+            else:
+                update_task_run(run_id, status="completed", results={"leads": leads, "count": len(leads)})
+                add_log_to_run(run_id, f"Search completed with {len(leads)} leads")
+        except Exception as e:
+            logger.error(f"Realtime leads runner error: {e}", exc_info=True)
+            update_task_run(run_id, status="failed", error=str(e))
+            add_log_to_run(run_id, f"Error: {e}")
+        finally:
+            loop.close()
+            _realtime_threads.pop(run_id, None)
+
+    t = threading.Thread(target=_runner, daemon=True)
+    _realtime_threads[run_id] = t
+    t.start()
+    return t
+
+
 @app.route('/api/realtime-leads/start', methods=['POST'])
 def start_realtime_leads():
     """Start a 10-minute real-time lead search in the background and return a run_id for polling."""
@@ -422,6 +676,9 @@ def start_realtime_leads():
         if not isinstance(channels, list):
             channels = []
         channels = [c.lower() for c in channels if c]
+        # Lead sources may be asked for in 'sources' or alongside the contact channels
+        sources = data.get('sources') if isinstance(data.get('sources'), list) else channels
+        sources = [s.lower() for s in sources if isinstance(s, str) and s.lower() in REALTIME_LEAD_SOURCES]
         # allow only supported channels
         supported = {'whatsapp', 'email', 'phone'}
         channels = [c for c in channels if c in supported]
@@ -439,35 +696,14 @@ def start_realtime_leads():
                 "niche": niche,
                 "location": location,
                 "desired_count": desired_count,
-                "preferred_channels": channels
+                "preferred_channels": channels,
+                "sources": sources or REALTIME_LEAD_SOURCES
             }
         )
         update_task_run(run_id, status="running", results={"leads": [], "count": 0})
         add_log_to_run(run_id, f"Real-time search started for niche='{niche}', location='{location}', channels={channels}, desired_count={desired_count}")
 
-        def _runner():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                leads = loop.run_until_complete(find_leads_realtime(
-                    niche=niche,
-                    location=location,
-                    desired_count=desired_count,
-                    preferred_channels=channels,
-                    time_limit_seconds=600
-                ))
-                # Final update
-                update_task_run(run_id, status="completed", results={"leads": leads, "count": len(leads)})
-                add_log_to_run(run_id, f"Search completed with {len(leads)} leads")
-            except Exception as e:
-                logger.error(f"Realtime leads runner error: {e}", exc_info=True)
-                update_task_run(run_id, status="failed", error=str(e))
-                add_log_to_run(run_id, f"Error: {e}")
-            finally:
-                loop.close()
-
-        t = threading.Thread(target=_runner, daemon=True)
-        t.start()
+        _start_realtime_runner(run_id, niche, location, desired_count, [], sources)
 
         return jsonify({"success": True, "run_id": run_id})
     except Exception as e:
@@ -475,6 +711,51 @@ def start_realtime_leads():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/realtime-leads/<run_id>/pause', methods=['POST'])
+def pause_realtime_leads(run_id):
+    """Stop a running real-time search after the leads in flight; resume it later with /resume."""
+    try:
+        frontier = get_crawl_frontier()
+        if frontier.get_run(run_id) is None:
+            return jsonify({"success": False, "error": "run_id not found"}), 404
+        if not frontier.pause_run(run_id):
+            return jsonify({"success": False, "error": f"Run is {frontier.run_status(run_id)}, not running"}), 409
+        if run_id not in _realtime_threads:
+            # Not running in this process (e.g. cut short by a restart)
+            update_task_run(run_id, status="paused")
+        add_log_to_run(run_id, "Pause requested")
+        return jsonify({"success": True, "run_id": run_id, "status": "paused"})
+    except Exception as e:
+        logger.error(f"Error in pause_realtime_leads: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/api/realtime-leads/<run_id>/resume', methods=['POST'])
+def resume_realtime_leads(run_id):
+    """Resume a paused, interrupted or finished real-time search; a larger 'count' extends it."""
+    try:
+        data = request.get_json(silent=True) or {}
+        run = get_task_run(run_id, include_logs=False)
+        frontier_run = get_crawl_frontier().get_run(run_id)
+        if not run or frontier_run is None:
+            return jsonify({"success": False, "error": "run_id not found"}), 404
+        if run_id in _realtime_threads:
+            return jsonify({"success": False, "error": "Run is still active; wait for it to pause or finish"}), 409
+        parameters = run.get('parameters') or {}
+        desired_count = max(int(data.get('count') or data.get('desired_count') or 0), frontier_run['desired_count'])
+        if desired_count != parameters.get('desired_count'):
+            update_task_run(run_id, parameters={**parameters, "desired_count": desired_count})
+        found_leads = list((run.get('results') or {}).get('leads') or [])
+        update_task_run(run_id, status="running")
+        add_log_to_run(run_id, f"Real-time search resumed with desired_count={desired_count}")
+        _start_realtime_runner(run_id, parameters.get('niche'), parameters.get('location'), desired_count, found_leads,
+                               parameters.get('sources'))
+        return jsonify({"success": True, "run_id": run_id, "desired_count": desired_count})
+    except Exception as e:
+        logger.error(f"Error in resume_realtime_leads: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route('/api/realtime-leads/status/<run_id>', methods=['GET'])
 def realtime_leads_status(run_id):
     """Get the current status and results (so far) for a given real-time leads run."""
@@ -497,24 +778,111 @@ def realtime_leads_status(run_id):
             "status": run.get('status'),
             "parameters": run.get('parameters', {}),
             "results": run.get('results', {}),
-            "logs": run.get('logs', [])[-50:],
-            "elapsed_seconds": elapsed_seconds
+            "logs": get_recent_logs(run_id, 50),
+            "elapsed_seconds": elapsed_seconds,
+            "frontier": get_crawl_frontier().get_run(run_id)
         })
     except Exception as e:
         logger.error(f"Error in realtime_leads_status: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+def _sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route('/api/task-runs/<run_id>/events', methods=['GET'])
+@app.route('/api/realtime-leads/stream/<run_id>', methods=['GET'])
+def stream_task_run_events(run_id):
+    """Server-Sent Events stream of a task run's progress.
+
+    Emits `log` (one per new log line, id = log index), `status`, `lead` (one
+    per newly found lead) and a final `done` event once the run has finished.
+    Clients resume with the Last-Event-ID header or ?since=<log index>.
+    """
+    run = get_task_run(run_id, include_logs=False)
+    if not run:
+        return jsonify({"success": False, "error": "run_id not found"}), 404
+    last_event_id = request.headers.get('Last-Event-ID')
+    try:
+        cursor = _int_arg('Last-Event-ID', last_event_id) + 1 if last_event_id else _int_arg('since', request.args.get('since', 0))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    def generate():
+        subscription = run_events.subscribe(run_id)
+        log_cursor = cursor
+        status = None
+        lead_count = 0
+        idle = 0.0
+        next_sync = 0.0
+        try:
+            while True:
+                if time.monotonic() >= next_sync:
+                    # Catch up from the store: on connect, after missed events, and once a
+                    # second for writes made by other processes (e.g. the Discord bot)
+                    for entry in get_run_logs(run_id, since=log_cursor, limit=500) or []:
+                        yield _sse("log", entry, event_id=log_cursor)
+                        log_cursor += 1
+                    current = get_task_run(run_id, include_logs=False)
+                    if current is None:
+                        return
+                    changes = [current]
+                    next_sync = time.monotonic() + 1.0
+                else:
+                    try:
+                        events = [subscription.get(timeout=max(next_sync - time.monotonic(), 0.01))]
+                    except queue.Empty:
+                        idle += 1.0
+                        if idle >= 15:
+                            idle = 0.0
+                            yield ": keep-alive\n\n"
+                        continue
+                    idle = 0.0
+                    while not subscription.empty():
+                        events.append(subscription.get_nowait())
+                    changes = []
+                    for event in events:
+                        if event["type"] == "deleted":
+                            return
+                        if event["type"] == "updated":
+                            changes.append(event["fields"])
+                        elif event["type"] == "log":
+                            if event["index"] == log_cursor:
+                                yield _sse("log", event["entry"], event_id=log_cursor)
+                                log_cursor += 1
+                            elif event["index"] > log_cursor:
+                                # Missed a line (the queue overflowed): re-read from the store
+                                next_sync = 0.0
+                for fields in changes:
+                    if 'status' in fields and fields['status'] != status:
+                        status = fields['status']
+                        yield _sse("status", {"status": status, "error": fields.get('error')})
+                    if 'results' in fields:
+                        leads = (fields['results'] or {}).get('leads') or []
+                        for lead in leads[lead_count:]:
+                            yield _sse("lead", lead)
+                        lead_count = max(lead_count, len(leads))
+                if status in ('completed', 'failed'):
+                    yield _sse("done", {"status": status, "count": lead_count})
+                    return
+        finally:
+            run_events.unsubscribe(run_id, subscription)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/status', methods=['GET'])
 def get_status_api():
-    """Get the content of status.json"""
+    """Get the shared state (status.json snapshot with the journal replayed on top)"""
     try:
-        status_file_path = os.path.join(REPO_ROOT, 'status.json')
-        if os.path.exists(status_file_path):
-            with open(status_file_path, 'r') as f:
-                status_data = json.load(f)
-            return jsonify({"success": True, "data": status_data})
-        else:
-            return jsonify({"success": False, "error": "status.json not found"}), 404
+        return jsonify({"success": True, "data": get_state()})
     except Exception as e:
         logger.error(f"Error in get_status_api: {e}")
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,331 @@
+import asyncio
+import os
+import select
+import socket
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS approvals (
+    lead_name TEXT NOT NULL,
+    action_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    run_id TEXT,
+    approved_by TEXT,
+    requested_at REAL,
+    approved_at REAL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (lead_name, action_type)
+);
+CREATE INDEX IF NOT EXISTS idx_approvals_expires_at ON approvals (expires_at);
+"""
+
+
+class PendingApproval:
+    """Handle on an approval being waited for in the background, returned by ``ApprovalBroker.watch()``.
+
+    Used like an ``asyncio.Event``: ``await wait()`` resumes once the action is
+    approved and ``is_set()`` tells whether it has been. ``cancel()`` stops
+    waiting.
+    """
+
+    def __init__(self, task):
+        self._task = task
+
+    def is_set(self):
+        return self._task.done() and not self._task.cancelled() and self._task.result()
+
+    async def wait(self):
+        # Shielded, so a caller that gives up (e.g. wait_for timing out) leaves the handle usable
+        return await asyncio.shield(self._task)
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class ApprovalBroker:
+    """Approval requests shared by every process through a SQLite file.
+
+    A pipeline calls ``wait()`` for a ``(lead_name, action_type)`` pair; whoever
+    handles the approval (the Flask API, the Discord bot, ...) calls
+    ``approve()``. Waiters in the same process are woken directly. For other
+    processes a single watcher thread polls ``PRAGMA data_version``, which
+    changes whenever another connection commits, backing off from
+    ``min_poll_interval`` to ``max_poll_interval`` while nothing happens.
+    Where Unix sockets are available each watcher also binds a datagram socket
+    in ``<db>.notify/`` and ``approve()`` nudges all of them, so a waiter in
+    another process resumes within a millisecond or two instead of a poll.
+
+    Entries expire after ``ttl`` seconds, so neither the table nor the
+    in-memory waiter map grows without bound, and an approval given while the
+    waiting process was restarting is still honoured when it asks again.
+    """
+
+    def __init__(self, db_path, ttl=86400, min_poll_interval=0.001, max_poll_interval=0.05):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (lead_name, action_type) -> set of (loop, asyncio.Event)
+        self._waiters = {}
+        self._wakeup = threading.Event()
+        self._watcher = None
+        self._last_eviction = 0
+        self.notify_dir = db_path + '.notify'
+        self._socket = None
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _maybe_evict(self):
+        if time.time() - self._last_eviction > 60:
+            self.evict_expired()
+
+    def evict_expired(self):
+        """Delete expired approvals and return how many were removed."""
+        self._last_eviction = time.time()
+        return self._conn().execute('DELETE FROM approvals WHERE expires_at < ?', (time.time(),)).rowcount
+
+    def request(self, lead_name, action_type, run_id=None, ttl=None):
+        """Register a pending approval, keeping an existing unexpired entry.
+
+        An expired entry (not evicted yet) is replaced by a fresh pending one,
+        so a stale approval is never honoured. A still-pending entry moves to
+        the latest ``run_id``, so ``approve_run`` finds it for the run asking now.
+        """
+        self._maybe_evict()
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'INSERT INTO approvals (lead_name, action_type, status, run_id, requested_at, expires_at) '
+            "VALUES (?, ?, 'pending', ?, ?, ?) "
+            "ON CONFLICT (lead_name, action_type) DO UPDATE SET status = 'pending', run_id = excluded.run_id, "
+            'approved_by = NULL, requested_at = excluded.requested_at, approved_at = NULL, expires_at = excluded.expires_at '
+            'WHERE approvals.expires_at < excluded.requested_at',
+            (lead_name, action_type, run_id, now, now + (ttl or self.ttl)),
+        )
+        if run_id is not None:
+            conn.execute(
+                "UPDATE approvals SET run_id = ? WHERE lead_name = ? AND action_type = ? AND status = 'pending'",
+                (run_id, lead_name, action_type),
+            )
+
+    def approve(self, lead_name, action_type, approved_by=None):
+        """Approve a pair and wake its waiters in every process.
+
+        Returns True if someone had requested the approval. Approving before the
+        request is allowed; the approval then waits (until it expires) for the
+        pipeline to ask.
+        """
+        self._maybe_evict()
+        now = time.time()
+        conn = self._conn()
+        requested = conn.execute(
+            "UPDATE approvals SET status = 'approved', approved_by = ?, approved_at = ? "
+            "WHERE lead_name = ? AND action_type = ? AND expires_at >= ?",
+            (approved_by, now, lead_name, action_type, now),
+        ).rowcount > 0
+        if not requested:
+            conn.execute(
+                'INSERT OR REPLACE INTO approvals '
+                '(lead_name, action_type, status, approved_by, approved_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (lead_name, action_type, 'approved', approved_by, now, now + self.ttl),
+            )
+        self._notify((lead_name, action_type))
+        self._nudge_processes()
+        return requested
+
+    def approve_run(self, run_id, approved_by=None):
+        """Approve every pending request made for ``run_id`` and wake their waiters.
+
+        Returns the ``(lead_name, action_type)`` pairs that were approved.
+        """
+        self._maybe_evict()
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            keys = [tuple(row) for row in conn.execute(
+                "SELECT lead_name, action_type FROM approvals WHERE run_id = ? AND status = 'pending' AND expires_at >= ?",
+                (run_id, now),
+            ).fetchall()]
+            conn.execute(
+                "UPDATE approvals SET status = 'approved', approved_by = ?, approved_at = ? "
+                "WHERE run_id = ? AND status = 'pending' AND expires_at >= ?",
+                (approved_by, now, run_id, now),
+            )
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        for key in keys:
+            self._notify(key)
+        if keys:
+            self._nudge_processes()
+        return keys
+
+    def is_approved(self, lead_name, action_type):
+        row = self._conn().execute(
+            "SELECT 1 FROM approvals WHERE lead_name = ? AND action_type = ? "
+            "AND status = 'approved' AND expires_at >= ?",
+            (lead_name, action_type, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def consume(self, lead_name, action_type):
+        """Forget a pair once its approval has been acted on."""
+        self._conn().execute(
+            'DELETE FROM approvals WHERE lead_name = ? AND action_type = ?', (lead_name, action_type)
+        )
+
+    def pending(self):
+        """Return the unexpired approvals that are still waiting for a decision."""
+        rows = self._conn().execute(
+            "SELECT lead_name, action_type, run_id, requested_at, expires_at FROM approvals "
+            "WHERE status = 'pending' AND expires_at >= ? ORDER BY requested_at",
+            (time.time(),),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    async def wait(self, lead_name, action_type, timeout=None, run_id=None, consume=True):
+        """Wait until the pair is approved. Returns False if ``timeout`` runs out first."""
+        key = (lead_name, action_type)
+        # SQLite may block on another writer for up to its busy timeout; keep that off the loop
+        await asyncio.to_thread(self.request, lead_name, action_type, run_id=run_id)
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            self._waiters.setdefault(key, set()).add(waiter)
+        self._ensure_watcher()
+        try:
+            if not await asyncio.to_thread(self.is_approved, lead_name, action_type):
+                await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+        if consume:
+            await asyncio.to_thread(self.consume, lead_name, action_type)
+        return True
+
+    def watch(self, lead_name, action_type, run_id=None):
+        """Start waiting for the pair in the background; returns a PendingApproval."""
+        return PendingApproval(asyncio.ensure_future(self.wait(lead_name, action_type, run_id=run_id)))
+
+    def _notify(self, key):
+        with self._lock:
+            waiters = list(self._waiters.get(key, ()))
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _bind_socket(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        path = os.path.join(self.notify_dir, f"{os.getpid()}.sock")
+        try:
+            os.makedirs(self.notify_dir, exist_ok=True)
+            if os.path.exists(path):
+                os.unlink(path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            sock.setblocking(False)
+            return sock
+        except OSError as e:
+            # e.g. the path is too long for AF_UNIX; polling still works
+            logger.warning(f"Approval notifications fall back to polling: {e}")
+            return None
+
+    def _nudge_processes(self):
+        if not hasattr(socket, 'AF_UNIX') or not os.path.isdir(self.notify_dir):
+            return
+        own = f"{os.getpid()}.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            for name in os.listdir(self.notify_dir):
+                if name == own:
+                    continue
+                path = os.path.join(self.notify_dir, name)
+                try:
+                    sock.sendto(b'1', path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The process that bound it is gone
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except OSError:
+                    # Receiver's queue is full: it is already awake
+                    pass
+
+    def _sleep(self, interval):
+        if self._socket is None:
+            self._wakeup.wait(interval)
+            return
+        if select.select([self._socket], [], [], interval)[0]:
+            try:
+                while self._socket.recv(64):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _ensure_watcher(self):
+        self._wakeup.set()
+        if self._watcher is None or not self._watcher.is_alive():
+            with self._lock:
+                if self._watcher is None or not self._watcher.is_alive():
+                    self._watcher = threading.Thread(target=self._watch, name="approval-watcher", daemon=True)
+                    self._watcher.start()
+
+    def _watch(self):
+        conn = self._conn()
+        self._socket = self._bind_socket()
+        version = None
+        interval = self.min_poll_interval
+        while True:
+            with self._lock:
+                keys = list(self._waiters)
+            if not keys:
+                # Sleep until someone starts waiting again. Clear first, then look again: a waiter
+                # that registered in between has set the flag already and must not be missed
+                self._wakeup.clear()
+                with self._lock:
+                    idle = not self._waiters
+                if idle:
+                    self._wakeup.wait()
+                version = None
+                continue
+            try:
+                current = conn.execute('PRAGMA data_version').fetchone()[0]
+                if current != version or self._wakeup.is_set():
+                    self._wakeup.clear()
+                    version = current
+                    interval = self.min_poll_interval
+                    for key in keys:
+                        if self.is_approved(*key):
+                            self._notify(key)
+                else:
+                    interval = min(interval * 2, self.max_poll_interval)
+            except sqlite3.Error as e:
+                logger.error(f"Approval watcher failed to poll {self.db_path}: {e}")
+                interval = self.max_poll_interval
+            self._sleep(interval)
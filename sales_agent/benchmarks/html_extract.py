@@ -0,0 +1,150 @@
+"""Micro-benchmark for html_extract.extract_page against the old BeautifulSoup extractors.
+
+The old path parsed each page three times (social links, contact page,
+emails) with BeautifulSoup and regex-scanned the raw HTML again for the
+business profile; extract_page does all of it in one HTMLParser pass. Pages
+come from --corpus (a directory of saved .html files) or are generated. The
+old path needs beautifulsoup4; without it only extract_page is timed.
+
+    python -m sales_agent.benchmarks.html_extract --corpus saved_pages/
+    python -m sales_agent.benchmarks.html_extract --pages 200 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from urllib.parse import urlparse
+
+from sales_agent.leads.html_extract import extract_page, name_from_title
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+EMAIL_REGEX = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+
+
+def _legacy_extract(html, url):
+    """The extraction realtime_finder and enrichment did before extract_page."""
+    socials = {'linkedin': None, 'twitter': None, 'facebook': None}
+    soup = BeautifulSoup(html, 'html.parser')
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if 'linkedin.com/company' in href and not socials['linkedin']:
+            socials['linkedin'] = href
+        elif 'twitter.com/' in href and not socials['twitter']:
+            socials['twitter'] = href
+        elif 'facebook.com/' in href and not socials['facebook']:
+            socials['facebook'] = href
+
+    contact = None
+    soup = BeautifulSoup(html, 'html.parser')
+    for a in soup.find_all('a', href=True):
+        if 'contact' in a.text.lower():
+            contact = a['href']
+            if not contact.startswith('http'):
+                contact = f"{urlparse(url).scheme}://{urlparse(url).netloc}{contact}"
+            break
+
+    soup = BeautifulSoup(html, 'html.parser')
+    emails = re.findall(EMAIL_REGEX, soup.get_text())
+    for a in soup.find_all('a', href=True):
+        if a['href'].startswith('mailto:'):
+            emails.append(a['href'].replace('mailto:', ''))
+
+    text = html.decode('utf-8', errors='replace') if isinstance(html, bytes) else html
+    business = {"business_name": None, "address": None}
+    for m in re.finditer(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', text, flags=re.IGNORECASE | re.DOTALL):
+        try:
+            data = json.loads(m.group(1))
+        except ValueError:
+            continue
+        for node in data if isinstance(data, list) else [data]:
+            kind = str(node.get('@type') or '').lower() if isinstance(node, dict) else ''
+            if any(x in kind for x in ("organization", "localbusiness", "professionalservice", "store", "service", "plumber")):
+                business["business_name"] = business["business_name"] or node.get('name')
+    if not business["business_name"]:
+        m = re.search(r"<title[^>]*>(.*?)</title>", text, flags=re.IGNORECASE | re.DOTALL)
+        business["business_name"] = name_from_title(m.group(1)) if m else None
+    return socials, contact, set(emails), business["business_name"]
+
+
+def _single_pass(html, url):
+    info = extract_page(html, url)
+    contact = info.contact_links[0] if info.contact_links else None
+    return info.socials, contact, set(info.emails), info.business["business_name"]
+
+
+def _generated_page(rng, i):
+    words = "plumbing heating quality service local family owned since licensed insured repair".split()
+    paragraphs = ''.join(
+        f"<p>{' '.join(rng.choice(words) for _ in range(40))}</p>" for _ in range(rng.randint(20, 60))
+    )
+    nav = ''.join(f'<li><a href="/page-{n}">{rng.choice(words).title()}</a></li>' for n in range(rng.randint(10, 40)))
+    jsonld = json.dumps({"@context": "https://schema.org", "@type": "LocalBusiness", "name": f"Company {i}",
+                         "address": {"streetAddress": f"{i} Main St", "addressLocality": "Springfield"}})
+    return f"""<!doctype html><html><head><title>Company {i} | Home</title>
+<script>var config = {{"id": {i}}};</script>
+<script type="application/ld+json">{jsonld}</script></head>
+<body><nav><ul>{nav}<li><a href="/contact-us"><span>Contact</span> us</a></li></ul></nav>
+<main>{paragraphs}<p>Write to info{i}@company{i}.com or call (555) 123-{i % 10000:04d}.</p></main>
+<footer><a href="https://www.linkedin.com/company/company-{i}">LinkedIn</a>
+<a href="https://twitter.com/company{i}">Twitter</a> <a href="https://facebook.com/company{i}">Facebook</a>
+<a href="mailto:sales{i}@company{i}.com">Email sales</a> <a href="tel:+15551230000">Call</a></footer></body></html>""".encode()
+
+
+def _load_corpus(directory):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(directory, name), 'rb') as f:
+                pages.append((f.read(), f"https://{os.path.splitext(name)[0]}/"))
+    return pages
+
+
+def _time(fn, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [fn(html, url) for html, url in pages]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved .html pages (default: generated pages)")
+    parser.add_argument("--pages", type=int, default=100, help="generated pages when no corpus is given")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per extractor; the best one is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = _load_corpus(args.corpus)
+    else:
+        rng = random.Random(args.seed)
+        pages = [(_generated_page(rng, i), f"https://company{i}.example/") for i in range(args.pages)]
+    total_bytes = sum(len(html) for html, _ in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.1f} MB")
+
+    new_time, new_results = _time(_single_pass, pages, args.repeat)
+    print(f"extract_page (1 pass):     {new_time * 1000:8.1f} ms  {new_time * 1000 / len(pages):6.2f} ms/page")
+    if BeautifulSoup is None:
+        print("beautifulsoup4 is not installed; skipping the old extractors")
+        return
+    old_time, old_results = _time(_legacy_extract, pages, args.repeat)
+    print(f"BeautifulSoup (3 parses):  {old_time * 1000:8.1f} ms  {old_time * 1000 / len(pages):6.2f} ms/page")
+    print(f"speed-up: {old_time / new_time:.1f}x")
+
+    fields = ("socials", "contact page", "emails", "business name")
+    for index, name in enumerate(fields):
+        differ = sum(1 for old, new in zip(old_results, new_results) if old[index] != new[index])
+        print(f"{name:14s} differs on {differ}/{len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Concurrent score-delta check for GoogleSheet.update_lead_score.
+
+Runs hundreds of concurrent update_lead_score() calls from several processes,
+each with its own asyncio.gather fan-out and random flushes, against one
+worksheet, then checks every lead's final score equals the sum of the deltas.
+
+The worksheet is a small file-backed stand-in for the Sheets API (each call is
+an atomic round trip, nothing more), so separate processes really race on the
+same cells. --unsafe drops the cross-process lock to show the check catches
+lost increments.
+
+    python -m sales_agent.benchmarks.score_deltas --processes 4 --deltas 300
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+
+import gspread
+
+from sales_agent.utils.file_lock import FileLock
+
+HEADERS = ['Lead Name', 'Company', 'Status', 'Lead Score']
+
+
+class FileWorksheet:
+    """The subset of gspread.Worksheet used by the write buffer, stored in a JSON file."""
+
+    def __init__(self, path, latency):
+        self.path = path
+        self.latency = latency
+        self._call_lock = FileLock(path + '.lock')
+
+    def _round_trip(self, fn):
+        time.sleep(self.latency)
+        with self._call_lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+            result, changed = fn(rows)
+            if changed:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(rows, f)
+        time.sleep(self.latency)
+        return result
+
+    def get_all_values(self):
+        return self._round_trip(lambda rows: ([list(map(str, row)) for row in rows], False))
+
+    def batch_get(self, ranges):
+        def read(rows):
+            out = []
+            for a1 in ranges:
+                if a1 == '1:1':
+                    # Header row and name column, as fetched to verify the row index
+                    out.append([list(map(str, rows[0]))])
+                    continue
+                if a1 == 'A2:A':
+                    out.append([[str(row[0])] for row in rows[1:]])
+                    continue
+                row, col = gspread.utils.a1_to_rowcol(a1)
+                value = rows[row - 1][col - 1] if row <= len(rows) and col <= len(rows[row - 1]) else ''
+                out.append([[str(value)]] if value != '' else [])
+            return out, False
+        return self._round_trip(read)
+
+    def batch_update(self, data, value_input_option=None):
+        def write(rows):
+            for item in data:
+                row, col = gspread.utils.a1_to_rowcol(item['range'].split(':')[0])
+                for i, values in enumerate(item['values']):
+                    for j, value in enumerate(values):
+                        rows[row + i - 1][col + j - 1] = value
+            return None, True
+        return self._round_trip(write)
+
+
+def _worker(worker_id, path, leads, deltas, latency, unsafe, queue):
+    # Set before google_sheets is imported in this (spawned) process
+    os.environ["SHEETS_LOCK_DIR"] = os.path.dirname(path)
+    os.environ.setdefault("SHEETS_WRITE_FLUSH_MS", "20")
+    from sales_agent.leads.google_sheets import GoogleSheet
+
+    ws = FileWorksheet(path, latency)
+    sheet = GoogleSheet('score-deltas-check', None)
+    sheet.sheet = sheet.writes.sheet = ws
+    if unsafe:
+        sheet.writes._file_lock = nullcontext()
+    values = ws.get_all_values()
+    sheet.index.rebuild(values[0], [row[0] for row in values[1:]])
+
+    rng = random.Random(worker_id)
+    applied = {}
+
+    async def one(i):
+        lead = rng.choice(leads)
+        delta = rng.choice([-2, -1, 1, 1, 2, 3])
+        await asyncio.sleep(rng.random() * 0.05)
+        if await sheet.update_lead_score(lead, delta):
+            applied[lead] = applied.get(lead, 0) + delta
+        if i % 25 == 0:
+            await sheet.flush()
+
+    async def main():
+        await asyncio.gather(*(one(i) for i in range(deltas)))
+        await sheet.flush()
+
+    asyncio.run(main())
+    queue.put((applied, sheet.writes.batches))
+
+
+def run_check(processes=4, deltas=300, num_leads=20, latency=0.005, unsafe=False, timeout=300):
+    """Race ``processes`` workers on one file-backed worksheet.
+
+    Returns ``(expected, actual, batches, elapsed)``: each lead's score as the
+    sum of the applied deltas and as found in the sheet afterwards, the number
+    of batched writes and the wall time.
+    """
+    state_dir = tempfile.mkdtemp(prefix="score_deltas_")
+    path = os.path.join(state_dir, "leads.json")
+    leads = [f"Lead {i}" for i in range(num_leads)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([HEADERS] + [[name, f"Company {i}", "New", 10] for i, name in enumerate(leads)], f)
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    started = time.perf_counter()
+    procs = [
+        ctx.Process(target=_worker, args=(w, path, leads, deltas, latency, unsafe, queue))
+        for w in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    expected = {name: 10 for name in leads}
+    batches = 0
+    try:
+        for _ in procs:
+            applied, worker_batches = queue.get(timeout=timeout)
+            batches += worker_batches
+            for name, delta in applied.items():
+                expected[name] += delta
+    finally:
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+    elapsed = time.perf_counter() - started
+
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    actual = {row[0]: row[3] for row in rows[1:]}
+    return expected, actual, batches, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--deltas", type=int, default=300, help="concurrent update_lead_score calls per process")
+    parser.add_argument("--leads", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated latency of each Sheets call")
+    parser.add_argument("--unsafe", action="store_true", help="disable the cross-process lock")
+    args = parser.parse_args()
+
+    expected, actual, batches, elapsed = run_check(
+        args.processes, args.deltas, args.leads, args.latency_ms / 1000, args.unsafe
+    )
+    leads = list(expected)
+    total = args.processes * args.deltas
+    print(f"{total} concurrent deltas from {args.processes} processes in {elapsed:.2f}s, {batches} batched writes")
+    wrong = {name: (actual[name], expected[name]) for name in leads if actual[name] != expected[name]}
+    if wrong:
+        print(f"FAILED: {len(wrong)} of {len(leads)} leads lost increments (actual, expected):")
+        for name, (got, want) in list(wrong.items())[:10]:
+            print(f"  {name}: {got} != {want}")
+        sys.exit(1)
+    print(f"OK: all {len(leads)} scores match the sum of their deltas")
+
+
+if __name__ == "__main__":
+    main()
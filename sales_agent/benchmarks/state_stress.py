@@ -0,0 +1,131 @@
+"""Stress benchmark for shared_state.
+
+Hammers create/update/log from many threads in many processes against one
+state directory, then reloads the state from disk in a fresh process and checks
+that no run, field update or log line was lost.
+
+    python -m sales_agent.benchmarks.state_stress --processes 4 --threads 8 --ops 200
+    python -m sales_agent.benchmarks.state_stress --backend sqlite
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def _worker(worker_id, threads, ops, shared_run_id, queue):
+    from sales_agent import shared_state
+
+    own_runs = []
+
+    def hammer(thread_id):
+        key = f"w{worker_id}_t{thread_id}"
+        run_id = shared_state.create_task_run("stress", key, {"worker": worker_id, "thread": thread_id})
+        own_runs.append(run_id)
+        for i in range(ops):
+            shared_state.add_log_to_run(run_id, f"{key} {i}")
+            shared_state.update_task_run(run_id, results={"n": i})
+            shared_state.add_log_to_run(shared_run_id, f"{key} {i}")
+            shared_state.update_task_run(shared_run_id, **{key: i})
+
+    pool = [threading.Thread(target=hammer, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    shared_state.flush_state()
+    queue.put(own_runs)
+
+
+_VERIFY = """
+import json, sys
+from sales_agent import shared_state
+runs = {run['id']: run for run in shared_state.get_all_task_runs()}
+print(json.dumps({
+    run_id: {
+        'log_count': run.get('log_count'),
+        'results': run.get('results'),
+        'fields': {k: v for k, v in run.items() if k.startswith('w')},
+        'history': len(list(shared_state.iter_run_logs(run_id))),
+    }
+    for run_id, run in runs.items()
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="iterations per thread (4 mutations each)")
+    parser.add_argument("--backend", choices=["journal", "sqlite"], default="journal")
+    parser.add_argument("--flush-interval-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="state_stress_")
+    os.environ["STATE_STATUS_FILE"] = os.path.join(state_dir, "status.json")
+    os.environ["STATE_DB_FILE"] = os.path.join(state_dir, "status.db")
+    os.environ["STATE_BACKEND"] = args.backend
+    os.environ["STATE_FLUSH_INTERVAL_MS"] = str(args.flush_interval_ms)
+    os.environ.setdefault("STATE_COMPACT_EVERY", "2000")
+
+    from sales_agent import shared_state
+    shared_run_id = shared_state.create_task_run("stress", "shared")
+    shared_state.flush_state()
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    started = time.perf_counter()
+    procs = [
+        ctx.Process(target=_worker, args=(w, args.threads, args.ops, shared_run_id, queue))
+        for w in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    created = []
+    for _ in procs:
+        created.extend(queue.get())
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    total_ops = args.processes * args.threads * (1 + 4 * args.ops)
+    print(f"backend={args.backend} processes={args.processes} threads={args.threads} ops/thread={args.ops}")
+    print(f"{total_ops} mutations in {elapsed:.2f}s -> {total_ops / elapsed:,.0f} mutations/s")
+
+    out = subprocess.run([sys.executable, "-c", _VERIFY], capture_output=True, text=True, env=os.environ, check=True)
+    runs = json.loads(out.stdout)
+
+    problems = []
+    for run_id in created:
+        run = runs.get(run_id)
+        if run is None:
+            problems.append(f"run {run_id} missing")
+            continue
+        if run["log_count"] != args.ops or run["history"] != args.ops:
+            problems.append(f"run {run_id}: {run['log_count']} logs ({run['history']} readable), expected {args.ops}")
+        if run["results"] != {"n": args.ops - 1}:
+            problems.append(f"run {run_id}: results {run['results']}")
+    shared = runs[shared_run_id]
+    expected_shared = args.processes * args.threads * args.ops
+    if shared["log_count"] != expected_shared or shared["history"] != expected_shared:
+        problems.append(f"shared run: {shared['log_count']} logs ({shared['history']} readable), expected {expected_shared}")
+    lost_fields = [k for k, v in shared["fields"].items() if v != args.ops - 1]
+    if len(shared["fields"]) != args.processes * args.threads or lost_fields:
+        problems.append(f"shared run: lost field updates {lost_fields or 'missing keys'}")
+
+    if problems:
+        print("FAILED: lost updates detected")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        sys.exit(1)
+    print(f"OK: {len(created)} runs, {expected_shared} shared log lines, no lost updates (state in {state_dir})")
+
+
+if __name__ == "__main__":
+    main()
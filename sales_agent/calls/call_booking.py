@@ -1,11 +1,11 @@
 from ..outreach.twilio_sms import send_sms
 from ..outreach.gmail_smtp import send_email
 from sales_agent.utils.logger import logger
-from ..leads.google_sheets import GoogleSheet
+from ..leads.lead_store import LeadStore
 from ..config import CALENDLY_TIDYCAL_LINK
 from .ai_assistant import get_calendar_action, CalendarAction
 
-async def handle_booking_request(google_sheet_instance: GoogleSheet, lead, reply_channel, user_message: str):
+async def handle_booking_request(google_sheet_instance: LeadStore, lead, reply_channel, user_message: str):
     """Handles booking requests by analyzing user intent and sending a booking link if appropriate."""
     calendar_action = await get_calendar_action(user_message)
 
@@ -18,7 +18,7 @@ async def handle_booking_request(google_sheet_instance: GoogleSheet, lead, reply
         return False
 
 
-async def send_booking_link(google_sheet_instance: GoogleSheet, lead, reply_channel):
+async def send_booking_link(google_sheet_instance: LeadStore, lead, reply_channel):
     """Sends the Calendly/TidyCal booking link via the specified channel (SMS or email)."""
     booking_link = CALENDLY_TIDYCAL_LINK
     if not booking_link:
@@ -12,8 +12,8 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from sales_agent.main import run_sales_agent
 from sales_agent.utils.logger import logger
-from sales_agent.leads.google_sheets import GoogleSheet
-from sales_agent.config import GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH
+from sales_agent.leads.lead_store import get_lead_store
+from sales_agent.leads.sheets_scheduler import interactive_sheets_calls
 
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
@@ -362,8 +362,10 @@ async def synthesize_speech_command(interaction: discord.Interaction, text: str,
 async def lead_score_command(interaction: discord.Interaction, lead_name: str, score_change: int):
     await interaction.response.defer(ephemeral=True)
     try:
-        google_sheet = GoogleSheet(GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH)
-        success = await google_sheet.update_lead_score(lead_name, score_change)
+        google_sheet = get_lead_store()
+        with interactive_sheets_calls():
+            success = await google_sheet.update_lead_score(lead_name, score_change)
+            await google_sheet.flush()
         if success:
             await interaction.followup.send(f"Updated Lead Score for '{lead_name}' by {score_change}.", ephemeral=True)
         else:
@@ -446,8 +448,9 @@ async def readleads(interaction: discord.Interaction):
 async def hot_leads_slash_command(interaction: discord.Interaction, limit: int = 5):
     await interaction.response.defer(ephemeral=True)
     try:
-        google_sheet = GoogleSheet(GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH)
-        top_leads = await google_sheet.read_leads_sorted_by_score(num_leads=max(1, min(limit, 25)))
+        google_sheet = get_lead_store()
+        with interactive_sheets_calls():
+            top_leads = await google_sheet.read_leads_sorted_by_score(num_leads=max(1, min(limit, 25)))
         if not top_leads:
             await interaction.followup.send("No leads found in the sheet.", ephemeral=True)
             return
@@ -721,7 +724,7 @@ async def send_periodic_status_updates(channel):
 @bot.command(name="approve_action")
 async def approve_action(ctx, lead_name: str, action_type: str):
     from sales_agent.shared_state import set_approval_event
-    set_approval_event(lead_name, action_type)
+    set_approval_event(lead_name, action_type, approved_by=str(ctx.author))
     await ctx.send(f"Approved '{action_type}' for lead '{lead_name}'.")
 
 
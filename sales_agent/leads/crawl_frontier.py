@@ -0,0 +1,256 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# SQLite file recording what each real-time lead run has searched, fetched and extracted
+CRAWL_FRONTIER_DB = os.environ.get("CRAWL_FRONTIER_DB") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'crawl_frontier.db'
+)
+# Seconds a page claimed by one run is left to it before another run fetches it instead
+CRAWL_FRONTIER_CLAIM_TIMEOUT = float(os.environ.get("CRAWL_FRONTIER_CLAIM_TIMEOUT", 60))
+# Seconds cached search results stay valid (searches are shared by runs for the same niche and location)
+CRAWL_FRONTIER_SEARCH_TTL = float(os.environ.get("CRAWL_FRONTIER_SEARCH_TTL", 24 * 3600))
+# Seconds an extracted page is reused before it is fetched again
+CRAWL_FRONTIER_PAGE_TTL = float(os.environ.get("CRAWL_FRONTIER_PAGE_TTL", 7 * 24 * 3600))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier_runs (
+    run_id TEXT PRIMARY KEY,
+    niche TEXT,
+    location TEXT,
+    desired_count INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS frontier_searches (
+    source TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    desired_count INTEGER NOT NULL,
+    results TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (source, query_key)
+);
+
+CREATE TABLE IF NOT EXISTS frontier_candidates (
+    run_id TEXT NOT NULL,
+    company_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    lead_data TEXT NOT NULL,
+    lead TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, company_key)
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_candidates_state ON frontier_candidates (run_id, state, seq);
+
+CREATE TABLE IF NOT EXISTS frontier_pages (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    status_code INTEGER,
+    info TEXT,
+    fetched_at REAL
+);
+"""
+
+# Candidate states: waiting to be enriched, enriched but not (yet) needed, kept, or dropped for having no channel
+QUEUED, ENRICHED, ACCEPTED, REJECTED = 'queued', 'enriched', 'accepted', 'rejected'
+
+
+def company_key(company_name):
+    return ' '.join((company_name or '').lower().split())
+
+
+def _query_key(niche, location):
+    return f"{company_key(niche)}|{company_key(location)}"
+
+
+class CrawlFrontier:
+    """Durable record of real-time lead runs, so they can be paused, resumed and extended.
+
+    Per run_id it keeps every candidate company a search turned up and how far
+    it got (queued, enriched, accepted or rejected). Search results and the
+    extracted contents of every page are shared by all runs: a resumed or
+    extended run, or a parallel run for an overlapping niche, reuses them
+    instead of searching or fetching again. A page being fetched is claimed
+    by one run; the others wait for its result.
+    """
+
+    def __init__(self, path=CRAWL_FRONTIER_DB):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        # Connections are per thread; the finder calls in from worker threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, query, params=()):
+        return self._conn().execute(query, params)
+
+    @contextmanager
+    def _transaction(self):
+        cur = self._conn().cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        try:
+            yield cur
+        except BaseException:
+            cur.execute('ROLLBACK')
+            raise
+        cur.execute('COMMIT')
+
+    # Runs
+
+    def open_run(self, run_id, niche, location, desired_count):
+        """Start or resume ``run_id``, raising its target to ``desired_count``."""
+        now = time.time()
+        self._execute(
+            'INSERT INTO frontier_runs (run_id, niche, location, desired_count, status, created_at, updated_at) '
+            "VALUES (?, ?, ?, ?, 'running', ?, ?) "
+            "ON CONFLICT (run_id) DO UPDATE SET status = 'running', desired_count = MAX(desired_count, excluded.desired_count), "
+            'updated_at = excluded.updated_at',
+            (run_id, niche, location, desired_count, now, now),
+        )
+
+    def get_run(self, run_id):
+        row = self._execute(
+            'SELECT run_id, niche, location, desired_count, status, created_at, updated_at FROM frontier_runs WHERE run_id = ?',
+            (run_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        run = dict(zip(('run_id', 'niche', 'location', 'desired_count', 'status', 'created_at', 'updated_at'), row))
+        counts = self._execute(
+            'SELECT state, COUNT(*) FROM frontier_candidates WHERE run_id = ? GROUP BY state', (run_id,)
+        ).fetchall()
+        run['candidates'] = dict(counts)
+        return run
+
+    def run_status(self, run_id):
+        row = self._execute('SELECT status FROM frontier_runs WHERE run_id = ?', (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_run_status(self, run_id, status):
+        self._execute('UPDATE frontier_runs SET status = ?, updated_at = ? WHERE run_id = ?', (status, time.time(), run_id))
+
+    def pause_run(self, run_id):
+        """Mark ``run_id`` paused if it is running; False if it is not (finished, failed or already paused)."""
+        cur = self._execute(
+            "UPDATE frontier_runs SET status = 'paused', updated_at = ? WHERE run_id = ? AND status = 'running'",
+            (time.time(), run_id),
+        )
+        return cur.rowcount == 1
+
+    def delete_run(self, run_id):
+        """Forget ``run_id`` and its candidates (shared searches and pages are kept)."""
+        with self._transaction() as cur:
+            cur.execute('DELETE FROM frontier_candidates WHERE run_id = ?', (run_id,))
+            cur.execute('DELETE FROM frontier_runs WHERE run_id = ?', (run_id,))
+
+    # Searches
+
+    def cached_search(self, source, niche, location, desired_count):
+        """Stored results of a search that asked for at least ``desired_count`` leads, if still fresh."""
+        row = self._execute(
+            'SELECT desired_count, results, fetched_at FROM frontier_searches WHERE source = ? AND query_key = ?',
+            (source, _query_key(niche, location)),
+        ).fetchone()
+        if row is None or row[0] < desired_count or time.time() - row[2] > CRAWL_FRONTIER_SEARCH_TTL:
+            return None
+        return json.loads(row[1])
+
+    def save_search(self, source, niche, location, desired_count, results):
+        self._execute(
+            'INSERT OR REPLACE INTO frontier_searches (source, query_key, desired_count, results, fetched_at) VALUES (?, ?, ?, ?, ?)',
+            (source, _query_key(niche, location), desired_count, json.dumps(results, default=str), time.time()),
+        )
+
+    # Candidates
+
+    def add_candidates(self, run_id, leads):
+        """Queue candidate leads for ``run_id``; returns the ones it had not seen before."""
+        added = []
+        now = time.time()
+        with self._transaction() as cur:
+            seq = cur.execute('SELECT COALESCE(MAX(seq), 0) FROM frontier_candidates WHERE run_id = ?', (run_id,)).fetchone()[0]
+            for lead_data in leads:
+                seq += 1
+                cur.execute(
+                    'INSERT OR IGNORE INTO frontier_candidates (run_id, company_key, seq, state, lead_data, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (run_id, company_key(lead_data.get('company_name')), seq, QUEUED, json.dumps(lead_data, default=str), now),
+                )
+                if cur.rowcount:
+                    added.append(lead_data)
+        return added
+
+    def candidates(self, run_id, state):
+        """(lead_data, lead) pairs of ``run_id`` in ``state``, in the order they were found."""
+        rows = self._execute(
+            'SELECT lead_data, lead FROM frontier_candidates WHERE run_id = ? AND state = ? ORDER BY seq', (run_id, state)
+        ).fetchall()
+        return [(json.loads(lead_data), json.loads(lead) if lead else None) for lead_data, lead in rows]
+
+    def seen_companies(self, run_id):
+        return {row[0] for row in self._execute('SELECT company_key FROM frontier_candidates WHERE run_id = ?', (run_id,))}
+
+    def set_candidate(self, run_id, company_name, state, lead=None):
+        self._execute(
+            'UPDATE frontier_candidates SET state = ?, lead = COALESCE(?, lead), updated_at = ? WHERE run_id = ? AND company_key = ?',
+            (state, json.dumps(lead, default=str) if lead is not None else None, time.time(), run_id, company_key(company_name)),
+        )
+
+    # Pages
+
+    def claim_page(self, url, owner):
+        """('extracted', status_code, info) if the page is done, ('claimed', None, None) if ``owner`` should
+        fetch it now, or ('busy', None, None) while another run is fetching it."""
+        now = time.time()
+        with self._transaction() as cur:
+            row = cur.execute(
+                'SELECT state, claimed_by, claimed_at, status_code, info, fetched_at FROM frontier_pages WHERE url = ?', (url,)
+            ).fetchone()
+            if row is not None and row[0] == 'extracted' and now - row[5] < CRAWL_FRONTIER_PAGE_TTL:
+                return 'extracted', row[3], json.loads(row[4])
+            if row is not None and row[1] != owner and now - (row[2] or 0) < CRAWL_FRONTIER_CLAIM_TIMEOUT:
+                return 'busy', None, None
+            cur.execute(
+                'INSERT INTO frontier_pages (url, state, claimed_by, claimed_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (url) DO UPDATE SET state = excluded.state, claimed_by = excluded.claimed_by, claimed_at = excluded.claimed_at',
+                (url, QUEUED, owner, now),
+            )
+        return 'claimed', None, None
+
+    def save_page(self, url, status_code, info):
+        self._execute(
+            "UPDATE frontier_pages SET state = 'extracted', claimed_by = NULL, status_code = ?, info = ?, fetched_at = ? WHERE url = ?",
+            (status_code, json.dumps(info), time.time(), url),
+        )
+
+    def release_page(self, url, owner):
+        """Give up a claim (the fetch failed), so the page can be tried again later."""
+        self._execute('DELETE FROM frontier_pages WHERE url = ? AND claimed_by = ? AND state = ?', (url, owner, QUEUED))
+
+
+_frontier = None
+_frontier_lock = threading.Lock()
+
+
+def get_crawl_frontier():
+    """The process-wide CrawlFrontier at ``CRAWL_FRONTIER_DB``."""
+    global _frontier
+    with _frontier_lock:
+        if _frontier is None:
+            _frontier = CrawlFrontier(CRAWL_FRONTIER_DB)
+        return _frontier
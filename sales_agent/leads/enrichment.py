@@ -1,7 +1,6 @@
-import re
-import json
 from typing import Optional, Dict
-from urllib.parse import unquote
+
+from sales_agent.leads.html_extract import extract_page
 
 def score_lead(lead_data: dict) -> int:
     """Scores a lead based on predefined criteria."""
@@ -65,66 +64,6 @@ def enrich_lead_data(lead_data: dict) -> dict:
 
 
 
-def _extract_title_name(html: str) -> Optional[str]:
-    try:
-        m = re.search(r"<title[^>]*>(.*?)</title>", html, flags=re.IGNORECASE | re.DOTALL)
-        if not m:
-            return None
-        title = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", m.group(1))).strip()
-        for sep in ["|", "-", ":", "–", "—"]:
-            if sep in title:
-                part = title.split(sep)[0].strip()
-                if 2 <= len(part) <= 120:
-                    return part
-        return title if 2 <= len(title) <= 120 else None
-    except Exception:
-        return None
-
-
-def _extract_jsonld_business(html: str) -> Dict[str, Optional[str]]:
-    out: Dict[str, Optional[str]] = {"business_name": None, "address": None, "contact_person": None}
-    try:
-        for m in re.finditer(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', html, flags=re.IGNORECASE | re.DOTALL):
-            block = (m.group(1) or "").strip()
-            if not block:
-                continue
-            try:
-                data = json.loads(block)
-            except Exception:
-                # Some sites embed multiple JSON objects or invalid JSON; skip
-                continue
-            nodes = data if isinstance(data, list) else [data]
-            for node in nodes:
-                if not isinstance(node, dict):
-                    continue
-                t = str(node.get("@type") or "").lower()
-                if not any(x in t for x in ["organization", "localbusiness", "professionalservice", "store", "service", "plumber"]):
-                    continue
-                name = node.get("name") or node.get("legalName")
-                if not out["business_name"] and isinstance(name, str):
-                    out["business_name"] = name.strip()[:200]
-                addr = node.get("address")
-                if isinstance(addr, dict):
-                    parts = [
-                        addr.get("streetAddress"), addr.get("addressLocality"), addr.get("addressRegion"), addr.get("postalCode"), addr.get("addressCountry"),
-                    ]
-                    addr_str = ", ".join([p for p in parts if isinstance(p, str) and p.strip()])
-                    if addr_str:
-                        out["address"] = addr_str[:300]
-                cp = None
-                contact = node.get("contactPoint")
-                if isinstance(contact, dict):
-                    cp = contact.get("name") or contact.get("email")
-                if isinstance(cp, str) and not out["contact_person"]:
-                    out["contact_person"] = cp[:120]
-    except Exception:
-        pass
-    return out
-
 def enrich_business_profile(html: str) -> Dict[str, Optional[str]]:
-    info = _extract_jsonld_business(html)
-    if not info.get("business_name"):
-        t = _extract_title_name(html)
-        if t:
-            info["business_name"] = t
-    return info
\ No newline at end of file
+    """Business name, address and contact person from a page's JSON-LD, falling back to its <title>."""
+    return extract_page(html).business
@@ -7,20 +7,622 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 from sales_agent.config import GOOGLE_SHEETS_CREDENTIALS_PATH, GOOGLE_SHEET_ID
 from sales_agent.utils.logger import logger
 import asyncio
+import atexit
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from contextlib import nullcontext
+from sales_agent.utils.file_lock import FileLock
+from sales_agent.leads.sheets_scheduler import sheets_scheduler
+from sales_agent.leads.leads_mirror import LeadsMirror, _score
+from sales_agent.leads.lead_store import LeadStore, funnel_metrics
+
+# Seconds a downloaded copy of the Leads sheet is reused before it is fetched again
+SHEETS_SNAPSHOT_TTL = float(os.environ.get("SHEETS_SNAPSHOT_TTL", 30))
+# Buffered cell writes are sent once this many cells are pending...
+SHEETS_WRITE_BATCH_CELLS = int(os.environ.get("SHEETS_WRITE_BATCH_CELLS", 500))
+# ...or this many milliseconds after the first pending write
+SHEETS_WRITE_FLUSH_MS = int(os.environ.get("SHEETS_WRITE_FLUSH_MS", 1000))
+# Where the per-spreadsheet lock files that serialize score increments across processes live.
+# The lock only covers processes on one host (sharing this directory): the Sheets API has no
+# conditional write, so writers on another machine can still lose increments and stamps.
+# Run everything that writes the Leads sheet on one host, or use a database lead store.
+SHEETS_LOCK_DIR = os.environ.get("SHEETS_LOCK_DIR") or tempfile.gettempdir()
+
+# Stamped with the write time on every row we write, for changes_since()
+UPDATED_AT_COLUMN = 'Updated At'
+
+
+class SheetSnapshotCache:
+    """Process-wide cache of full-sheet reads, keyed by spreadsheet ID.
+
+    A snapshot is reused for ``ttl`` seconds and dropped as soon as we write to
+    the sheet ourselves. Concurrent callers that miss the cache share one
+    in-flight fetch instead of each downloading the sheet; the shared future is
+    a ``concurrent.futures.Future`` so callers on different event loops (Flask
+    request loops, the Discord bot) can all wait on it.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.fetches = 0
+
+    async def get(self, key, fetch):
+        """Return the cached records for ``key``, calling ``fetch`` (blocking) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.fetches += 1
+        if not owner:
+            return await asyncio.wrap_future(future)
+        try:
+            records = await asyncio.to_thread(fetch)
+        except BaseException as e:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            # Only cache it if no write invalidated the sheet while we were fetching
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                self._entries[key] = (time.monotonic(), records)
+        future.set_result(records)
+        return records
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._inflight.clear()
+            else:
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)
+
+
+snapshot_cache = SheetSnapshotCache(SHEETS_SNAPSHOT_TTL)
+
+
+def _numericise(value):
+    """Convert numeric cell text the way gspread's get_all_records does."""
+    if isinstance(value, str) and value:
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                pass
+    return value
+
+
+class LeadRowIndex:
+    """Lead name -> row number and header -> column maps for one worksheet.
+
+    Built from a full snapshot or from a one-call fetch of the header row and
+    the name column, then kept current as we append rows. The index is trusted
+    for ``SHEETS_SNAPSHOT_TTL`` seconds; after that the name column is fetched
+    again and compared, so rows inserted or deleted by hand (a row shift) make
+    us re-index instead of writing to the wrong row.
+    """
+
+    def __init__(self, sheet_id):
+        self.sheet_id = sheet_id
+        self.lock = threading.Lock()
+        self.headers = []
+        self.columns = {}
+        self.rows = {}
+        self.last_row = 0
+        self.verified_at = None
+
+    def is_fresh(self):
+        return self.verified_at is not None and time.monotonic() - self.verified_at < SHEETS_SNAPSHOT_TTL
+
+    def rebuild(self, headers, names):
+        """Re-index from the header row and the values of column A below it."""
+        rows = {}
+        for i, name in enumerate(names):
+            if name and name not in rows:
+                # The first match wins, as with worksheet.find()
+                rows[name] = i + 2
+        with self.lock:
+            shifted = [name for name, row in self.rows.items() if rows.get(name, row) != row]
+            if shifted and self.verified_at is not None:
+                logger.warning(f"Leads rows shifted ({len(shifted)} leads moved); re-indexed")
+                get_mirror(self.sheet_id).invalidate()
+            self.headers = list(headers)
+            self.columns = {}
+            for i, header in enumerate(headers):
+                if header and header not in self.columns:
+                    self.columns[header] = i + 1
+            self.rows = rows
+            self.last_row = len(names) + 1
+            self.verified_at = time.monotonic()
+
+    def verify(self, worksheet):
+        """Fetch the header row and the name column in one call and re-index (blocking)."""
+        header_range, name_range = sheets_scheduler.call(worksheet.batch_get, ['1:1', 'A2:A'])
+        headers = header_range[0] if header_range else []
+        self.rebuild(headers, [row[0] if row else '' for row in name_range])
+
+    def add(self, name, row):
+        """Record a row we appended; an unknown row number forces a re-index."""
+        with self.lock:
+            if row is None:
+                self.verified_at = None
+                return
+            self.last_row = max(self.last_row, row)
+            if name and name not in self.rows:
+                self.rows[name] = row
+
+    def invalidate(self):
+        with self.lock:
+            self.verified_at = None
+
+
+# One index per spreadsheet, shared by every GoogleSheet instance in the process
+_row_indexes = {}
+_row_indexes_lock = threading.Lock()
+
+
+def get_row_index(sheet_id):
+    with _row_indexes_lock:
+        index = _row_indexes.get(sheet_id)
+        if index is None:
+            index = _row_indexes[sheet_id] = LeadRowIndex(sheet_id)
+        return index
+
+
+# One columnar mirror per spreadsheet, shared like the row index
+_mirrors = {}
+
+
+def get_mirror(sheet_id):
+    with _row_indexes_lock:
+        mirror = _mirrors.get(sheet_id)
+        if mirror is None:
+            mirror = _mirrors[sheet_id] = LeadsMirror()
+        return mirror
+
+
+class Increment:
+    """A pending "add ``delta``" to a numeric cell, resolved against the sheet at flush time."""
+
+    __slots__ = ('delta',)
+
+    def __init__(self, delta):
+        self.delta = delta
+
+    def __repr__(self):
+        return f"Increment({self.delta})"
+
+
+def _as_number(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        try:
+            number = float(value)
+            return int(number) if number.is_integer() else number
+        except (ValueError, TypeError):
+            return 0 # Empty or non-numeric cells count as 0
+
+
+_MISSING = object()
+
+
+def _merge(old, new):
+    """Combine two writes to the same cell; increments stack on whatever came before."""
+    if isinstance(new, Increment) and old is not _MISSING:
+        if isinstance(old, Increment):
+            return Increment(old.delta + new.delta)
+        return _as_number(old) + new.delta
+    return new
+
+
+def updated_at_stamp():
+    """Value for the 'Updated At' column: UTC ISO 8601 with microseconds, so stamps sort as text."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class SheetWriteBuffer:
+    """Write-behind buffer of cell updates for one worksheet.
+
+    Cells are keyed by (lead name, header), so repeated writes to the same cell
+    collapse into the last value. They are resolved to a row and column only at
+    flush time, under the ``lock_path`` lock, from a fresh read of the header
+    row and name column (one extra call per flush), so rows that moved since
+    the write was queued are still hit; writes to leads (or columns) no longer
+    in the sheet are dropped. Pending cells go out as one ``values.batchUpdate``
+    (``worksheet.batch_update``) once ``max_cells`` are queued or ``flush_ms``
+    after the first one, whichever comes first, and whenever ``flush()`` is
+    called explicitly at the end of a pipeline stage.
+
+    ``Increment`` values accumulate deltas instead of replacing them. They are
+    resolved at flush time with one ``batch_get`` of the affected cells, and the
+    read, add and write happen under ``lock_path`` (a cross-process file lock),
+    so concurrent writers in this and other processes on the same host never
+    lose an increment. Writers on other hosts are not covered; see
+    ``SHEETS_LOCK_DIR``.
+
+    When the sheet has a ``stamp_header`` column, every row written is also
+    stamped with the flush time in that column. The stamp is taken under the
+    same lock, so stamps only ever increase in the order writes land.
+    """
+
+    def __init__(self, index, max_cells=SHEETS_WRITE_BATCH_CELLS, flush_ms=SHEETS_WRITE_FLUSH_MS, on_flush=None,
+                 lock_path=None, stamp_header=None):
+        self.index = index
+        self.max_cells = max_cells
+        self.flush_ms = flush_ms
+        self.on_flush = on_flush
+        self.stamp_header = stamp_header
+        self.sheet = None
+        self.pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._file_lock = FileLock(lock_path) if lock_path else nullcontext()
+        self._timer = None
+        self.cells_written = 0
+        self.cells_merged = 0
+        self.cells_dropped = 0
+        self.batches = 0
+
+    def add(self, cells):
+        """Queue ``(lead_name, header, value)`` tuples. Returns True when a flush is due now."""
+        with self._lock:
+            for lead_name, header, value in cells:
+                old = self.pending.get((lead_name, header), _MISSING)
+                if old is not _MISSING:
+                    self.cells_merged += 1
+                self.pending[(lead_name, header)] = _merge(old, value)
+            due = len(self.pending) >= self.max_cells
+            if not due and self._timer is None and self.flush_ms > 0:
+                self._timer = threading.Timer(self.flush_ms / 1000, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        return due or self.flush_ms <= 0
+
+    def _restore(self, cells):
+        # Put cells back in front of anything queued since, so increments still add up
+        with self._lock:
+            for key, value in cells.items():
+                newer = self.pending.get(key, _MISSING)
+                self.pending[key] = value if newer is _MISSING else _merge(value, newer)
+
+    def _resolve(self, pending):
+        """Map pending (lead name, header) keys to the (row, col) they have in the sheet now."""
+        self.index.verify(self.sheet)
+        cells, dropped = {}, []
+        for key, value in pending.items():
+            row = self.index.rows.get(key[0])
+            col = self.index.columns.get(key[1])
+            if row is None or col is None:
+                dropped.append(key)
+            else:
+                cells[(row, col)] = value
+        if dropped:
+            self.cells_dropped += len(dropped)
+            logger.warning(f"Dropped {len(dropped)} buffered writes for leads or columns no longer in the sheet: {dropped[:5]}")
+        return cells
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered Google Sheet writes: {e}")
+
+    def flush(self):
+        """Send every pending cell in one batch_update call (blocking)."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self.pending = self.pending, {}
+            if not pending:
+                return 0
+            if self.sheet is None:
+                # Nothing to write to yet; keep the cells for the next flush
+                self._restore(pending)
+                return 0
+            try:
+                with self._file_lock:
+                    cells = self._resolve(pending)
+                    if not cells:
+                        return 0
+                    values = dict(cells)
+                    stamp_col = self.index.columns.get(self.stamp_header) if self.stamp_header else None
+                    if stamp_col:
+                        stamp = updated_at_stamp()
+                        for row in {row for row, _ in cells if row >= 2}:
+                            values[(row, stamp_col)] = stamp
+                    increments = [key for key, value in cells.items() if isinstance(value, Increment)]
+                    if increments:
+                        current = sheets_scheduler.call(self.sheet.batch_get, [gspread.utils.rowcol_to_a1(*key) for key in increments])
+                        for i, key in enumerate(increments):
+                            value_range = current[i] if i < len(current) else None
+                            value = value_range[0][0] if value_range and value_range[0] else ''
+                            values[key] = _as_number(value) + cells[key].delta
+                    sheets_scheduler.call(self.sheet.batch_update, _cells_to_ranges(values), value_input_option='RAW')
+            except Exception:
+                self._restore(pending)
+                raise
+            self.batches += 1
+            self.cells_written += len(cells)
+            if self.on_flush is not None:
+                self.on_flush(values)
+            return len(cells)
+
+    def append_rows(self, rows):
+        """Append whole rows (blocking), stamped and serialized with flushes like cell writes."""
+        stamp_col = self.index.columns.get(self.stamp_header) if self.stamp_header else None
+        with self._flush_lock:
+            with (self._file_lock if stamp_col else nullcontext()):
+                if stamp_col:
+                    stamp = updated_at_stamp()
+                    for row in rows:
+                        row.extend([''] * (stamp_col - len(row)))
+                        row[stamp_col - 1] = stamp
+                return sheets_scheduler.call(self.sheet.append_rows, rows, idempotent=False)
+
+
+def _cells_to_ranges(cells):
+    """Group {(row, col): value} into batch_update ranges of adjacent cells in a row."""
+    data = []
+    run = None
+    for (row, col), value in sorted(cells.items()):
+        if run is not None and run['row'] == row and run['next_col'] == col:
+            run['values'].append(value)
+            run['next_col'] += 1
+            continue
+        run = {'row': row, 'col': col, 'next_col': col + 1, 'values': [value]}
+        data.append(run)
+    return [
+        {
+            'range': f"{gspread.utils.rowcol_to_a1(run['row'], run['col'])}:"
+                     f"{gspread.utils.rowcol_to_a1(run['row'], run['next_col'] - 1)}",
+            'values': [run['values']],
+        }
+        for run in data
+    ]
+
+
+# One write buffer per spreadsheet, shared by every GoogleSheet instance in the process
+_write_buffers = {}
+
+
+def get_write_buffer(sheet_id):
+    index = get_row_index(sheet_id)
+    with _row_indexes_lock:
+        buffer = _write_buffers.get(sheet_id)
+        if buffer is None:
+            buffer = _write_buffers[sheet_id] = SheetWriteBuffer(
+                index,
+                on_flush=lambda values: _after_flush(sheet_id, values),
+                lock_path=os.path.join(SHEETS_LOCK_DIR, f"sheets-{sheet_id}.lock"),
+                stamp_header=UPDATED_AT_COLUMN,
+            )
+        return buffer
+
+
+def _after_flush(sheet_id, values):
+    """Drop the snapshot and patch the mirror with the cells we just wrote."""
+    snapshot_cache.invalidate(sheet_id)
+    headers = get_row_index(sheet_id).headers
+    mirror = get_mirror(sheet_id)
+    for (row, col), value in values.items():
+        if row >= 2 and col <= len(headers):
+            mirror.set_cell(row - 2, headers[col - 1], value)
+
+
+def flush_all_writes():
+    """Flush the buffered writes of every spreadsheet (blocking)."""
+    for buffer in list(_write_buffers.values()):
+        try:
+            buffer.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered Google Sheet writes: {e}")
+
+
+atexit.register(flush_all_writes)
+
+
+def _appended_row(response):
+    """Row number written by an append call, from its updatedRange (e.g. 'Leads!A21:F21')."""
+    try:
+        updated_range = response['updates']['updatedRange']
+        return int(''.join(ch for ch in updated_range.split('!')[-1].split(':')[0] if ch.isdigit()))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+_SCOPES = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+
+class SheetsClientPool:
+    """Process-wide authorized clients and open worksheet handles.
+
+    The key file is read and authorized once per credentials path; the gspread
+    client (and its HTTP session) is then shared by every GoogleSheet, and
+    worksheets stay open, so a new instance or command costs no API calls.
+    Access tokens are refreshed before use once they have expired.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clients = {}
+        self.worksheets = {}
+        self.stats = {"authorizations": 0, "token_refreshes": 0, "worksheets_opened": 0, "hits": 0}
+
+    def _refresh_if_expired(self, client):
+        creds = getattr(client, 'auth', None)
+        if getattr(creds, 'access_token_expired', False) and hasattr(client, 'login'):
+            client.login()
+            self.stats["token_refreshes"] += 1
+
+    def get_client(self, credentials_path):
+        """Authorized client for a service-account key file (blocking on first use)."""
+        with self.lock:
+            client = self.clients.get(credentials_path)
+            if client is None:
+                creds = ServiceAccountCredentials.from_json_keyfile_name(credentials_path, _SCOPES)
+                client = self.clients[credentials_path] = gspread.authorize(creds)
+                self.stats["authorizations"] += 1
+            else:
+                self._refresh_if_expired(client)
+            return client
+
+    def get_worksheet(self, credentials_path, sheet_id, title):
+        """Open worksheet handle, shared by every caller in the process (blocking on first use)."""
+        key = (credentials_path, sheet_id, title)
+        with self.lock:
+            worksheet = self.worksheets.get(key)
+            if worksheet is not None:
+                self._refresh_if_expired(self.clients.get(credentials_path))
+                self.stats["hits"] += 1
+                return worksheet
+            client = self.get_client(credentials_path)
+            spreadsheet = sheets_scheduler.call(client.open_by_key, sheet_id)
+            worksheet = self.worksheets[key] = sheets_scheduler.call(spreadsheet.worksheet, title)
+            self.stats["worksheets_opened"] += 1
+            return worksheet
+
+    def forget(self, sheet_id=None, title=None):
+        """Drop cached worksheet handles (all, one spreadsheet, or one worksheet)."""
+        with self.lock:
+            for key in list(self.worksheets):
+                if (sheet_id is None or key[1] == sheet_id) and (title is None or key[2] == title):
+                    del self.worksheets[key]
+
+
+client_pool = SheetsClientPool()
+
+# One GoogleSheet per (spreadsheet, key file), see GoogleSheet.shared()
+_instances = {}
+# Spreadsheets whose Leads header row has been checked for the columns we need
+_columns_checked = set()
+
+
+class GoogleSheet(LeadStore):
+    """LeadStore backed by the 'Leads' worksheet of a Google Sheet."""
 
-class GoogleSheet:
     def __init__(self, sheet_id, credentials_path):
         self.sheet_id = sheet_id
         self.credentials_path = credentials_path
         self.client = None
         self.sheet = None
+        self.index = get_row_index(sheet_id)
+        self.writes = get_write_buffer(sheet_id)
+        self.mirror = get_mirror(sheet_id)
+        self._worksheet_headers_checked = set()
+
+    @classmethod
+    def shared(cls, sheet_id=GOOGLE_SHEET_ID, credentials_path=GOOGLE_SHEETS_CREDENTIALS_PATH):
+        """The process-wide instance for a spreadsheet; prefer it over constructing new ones."""
+        with client_pool.lock:
+            instance = _instances.get((sheet_id, credentials_path))
+            if instance is None:
+                instance = _instances[(sheet_id, credentials_path)] = cls(sheet_id, credentials_path)
+            return instance
+
+    def _fetch_snapshot(self):
+        """Downloads the whole Leads sheet in one call and re-indexes it (blocking)."""
+        values = sheets_scheduler.call(self.sheet.get_all_values)
+        if not values:
+            return []
+        headers = values[0]
+        self.index.rebuild(headers, [row[0] if row else '' for row in values[1:]])
+        records = [
+            {header: _numericise(row[i]) if i < len(row) else '' for i, header in enumerate(headers)}
+            for row in values[1:]
+        ]
+        self.mirror.load(headers, records)
+        return records
+
+    async def _get_records(self):
+        """Returns all Leads records, from the snapshot cache when it is fresh.
+
+        Each caller gets its own copy of the row dicts, so callers may modify them.
+        Buffered writes are flushed first so reads always see our own updates.
+        """
+        if self.writes.pending:
+            await self.flush()
+        records = await snapshot_cache.get(self.sheet_id, self._fetch_snapshot)
+        return [dict(record) for record in records]
+
+    async def get_mirror(self):
+        """Returns the columnar mirror of the Leads sheet, downloading it only when stale.
+
+        The mirror follows our own writes, so it is reused for ``SHEETS_SNAPSHOT_TTL``
+        seconds after the last download even if we have written since.
+        """
+        if not self.sheet:
+            if not await self._open_leads_sheet():
+                return None
+        if self.writes.pending:
+            await self.flush()
+        if not self.mirror.is_fresh(SHEETS_SNAPSHOT_TTL):
+            records = await snapshot_cache.get(self.sheet_id, self._fetch_snapshot)
+            if not self.mirror.is_fresh(SHEETS_SNAPSHOT_TTL):
+                # Served from a cached snapshot taken before the mirror was dropped
+                self.mirror.load(self.index.headers, records)
+        return self.mirror
+
+    def _verify_index(self):
+        """Fetches the header row and the name column in one call and re-indexes (blocking)."""
+        self.index.verify(self.sheet)
+
+    async def _ensure_index(self):
+        if not self.index.is_fresh():
+            await asyncio.to_thread(self._verify_index)
+
+    async def _find_row(self, lead_name):
+        """Returns the row number of a lead from the index, re-verifying it once on a miss."""
+        await self._ensure_index()
+        row = self.index.rows.get(lead_name)
+        if row is None and self.index.verified_at is not None and time.monotonic() - self.index.verified_at > 1:
+            # Possibly added by someone else since we last looked
+            await asyncio.to_thread(self._verify_index)
+            row = self.index.rows.get(lead_name)
+        return row
+
+    async def _get_headers(self):
+        await self._ensure_index()
+        return self.index.headers
+
+    async def _queue_cells(self, cells):
+        """Queue (lead name, header, value) cell writes, flushing when the buffer is full."""
+        if self.writes.add(cells):
+            await self.flush()
+
+    async def flush(self):
+        """Write every buffered cell update to the sheet now. Call at the end of a pipeline stage."""
+        if self.writes.pending:
+            written = await asyncio.to_thread(self.writes.flush)
+            if written:
+                logger.info(f"Flushed {written} buffered cell updates to Google Sheet")
+
+    def invalidate_snapshot(self):
+        """Drop the cached copy of the sheet so the next read fetches it again."""
+        snapshot_cache.invalidate(self.sheet_id)
 
     async def _authenticate(self):
-        """Authenticates with Google Sheets API and returns a client."""
+        """Gets the shared authorized client for our key file, authorizing on first use."""
         try:
-            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-            creds = await asyncio.to_thread(ServiceAccountCredentials.from_json_keyfile_name, self.credentials_path, scope)
-            self.client = await asyncio.to_thread(gspread.authorize, creds)
+            self.client = await asyncio.to_thread(client_pool.get_client, self.credentials_path)
             return True
         except Exception as e:
             logger.error(f"Failed to authenticate with Google Sheets API: {e}")
@@ -32,12 +634,15 @@ class GoogleSheet:
             if not await self._authenticate():
                 return False
         try:
-            sheet = await asyncio.to_thread(self.client.open_by_key, self.sheet_id)
-            self.sheet = await asyncio.to_thread(sheet.worksheet, 'Leads')
-            
-            # Check and add missing columns
-            headers = await asyncio.to_thread(self.sheet.row_values, 1)
-            missing_columns = [col for col in ['Lead Score', 'Outreach Status', 'Reply Channel'] if col not in headers]
+            self.sheet = await asyncio.to_thread(client_pool.get_worksheet, self.credentials_path, self.sheet_id, 'Leads')
+            if self.writes.sheet is None:
+                self.writes.sheet = self.sheet
+            if self.sheet_id in _columns_checked:
+                return True
+
+            # Check and add missing columns (once per process)
+            headers = await self._get_headers()
+            missing_columns = [col for col in ['Lead Score', 'Outreach Status', 'Reply Channel', UPDATED_AT_COLUMN] if col not in headers]
 
             if missing_columns:
                 num_existing_columns = len(headers)
@@ -46,13 +651,15 @@ class GoogleSheet:
                     cells_to_update.append(gspread.Cell(1, num_existing_columns + 1 + i, col_name))
                 
                 if cells_to_update:
-                    await asyncio.to_thread(self.sheet.update_cells, cells_to_update)
+                    await sheets_scheduler.run(self.sheet.update_cells, cells_to_update)
+                    self.invalidate_snapshot()
+                    self.index.invalidate()
                     logger.info(f"Added missing columns to the sheet: {', '.join(missing_columns)}")
-                    # Re-fetch the worksheet to ensure headers are updated for the current session
-                    self.sheet = await asyncio.to_thread(sheet.worksheet, 'Leads')
 
+            _columns_checked.add(self.sheet_id)
             return True
         except Exception as e:
+            client_pool.forget(self.sheet_id, 'Leads')
             logger.error(f"Failed to open Google Sheet with ID {self.sheet_id} or 'Leads' worksheet: {e}")
             return False
 
@@ -62,44 +669,152 @@ class GoogleSheet:
             if not await self._open_leads_sheet():
                 return []
         try:
-            all_records = await asyncio.to_thread(self.sheet.get_all_records)
+            all_records = await self._get_records()
             new_leads = [lead for i, lead in enumerate(all_records) if i >= start_row and ('Status' not in lead or lead['Status'] == 'New')]
             return new_leads
         except Exception as e:
             logger.error(f"Failed to read new leads from Google Sheet: {e}")
             return []
 
+    def _fetch_changes(self, cursor):
+        """Reads the name and 'Updated At' columns, then only the rows stamped after ``cursor`` (blocking)."""
+        stamp_col = self.index.columns[UPDATED_AT_COLUMN]
+        stamp_a1 = gspread.utils.rowcol_to_a1(2, stamp_col).rstrip('0123456789')
+        name_range, stamp_range = sheets_scheduler.call(self.sheet.batch_get, ['A2:A', f"{stamp_a1}2:{stamp_a1}"])
+        self.index.rebuild(self.index.headers, [row[0] if row else '' for row in name_range])
+        stamps = [str(row[0]) if row else '' for row in stamp_range]
+        changed = [i + 2 for i, stamp in enumerate(stamps) if stamp > cursor]
+        if not changed:
+            return [], cursor
+
+        # One range per run of adjacent changed rows
+        runs = []
+        for row in changed:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        last_a1 = gspread.utils.rowcol_to_a1(1, max(len(self.index.headers), 1)).rstrip('0123456789')
+        ranges = sheets_scheduler.call(self.sheet.batch_get, [f"A{start}:{last_a1}{end}" for start, end in runs])
+
+        headers = self.index.headers
+        records = []
+        for (start, end), value_range in zip(runs, ranges):
+            rows = list(value_range) + [[]] * (end - start + 1 - len(value_range))
+            for offset, row in enumerate(rows):
+                record = {header: _numericise(row[i]) if i < len(row) else '' for i, header in enumerate(headers) if header}
+                records.append(record)
+                for header, value in record.items():
+                    self.mirror.set_cell(start + offset - 2, header, value)
+        return records, max(stamps)
+
+    async def changes_since(self, cursor=None):
+        """Leads written since ``cursor``, and the cursor to pass next time.
+
+        Every row we write or append is stamped in the 'Updated At' column, so
+        this reads only the name and stamp columns plus the rows stamped after
+        ``cursor``, not the whole sheet. With no cursor it returns every lead.
+        Edits made by hand in the sheet are not stamped and are not reported.
+        """
+        if not self.sheet:
+            if not await self._open_leads_sheet():
+                return [], cursor
+        if cursor is None or UPDATED_AT_COLUMN not in await self._get_headers():
+            records = await self._get_records()
+            return records, max((str(record.get(UPDATED_AT_COLUMN, '')) for record in records), default='')
+        # Our own pending writes count as changes too
+        await self.flush()
+        records, cursor = await asyncio.to_thread(self._fetch_changes, cursor)
+        if records:
+            self.invalidate_snapshot()
+        return records, cursor
+
     async def read_leads_sorted_by_score(self, num_leads: int = 10):
         """Reads all leads and returns the top N leads sorted by score."""
-        all_leads = await self.read_leads()
-        if not all_leads:
+        try:
+            mirror = await self.get_mirror()
+        except Exception as e:
+            logger.error(f"Failed to read leads from Google Sheet: {e}")
             return []
-        
-        # Sort leads by 'Lead Score' in descending order.
+        if mirror is None:
+            return []
+        with mirror.lock:
+            # Same selection as read_leads(): rows whose Status is 'New' (or no Status column)
+            positions = mirror.filter(Status='New') if 'Status' in mirror.columns else None
+            top_leads = mirror.to_records(mirror.top_n('Lead Score', num_leads, positions))
+
         # Handle cases where score might be missing or not a number.
-        for lead in all_leads:
-            try:
-                lead['Lead Score'] = int(lead.get('Lead Score', 0))
-            except (ValueError, TypeError):
-                lead['Lead Score'] = 0
-        
-        sorted_leads = sorted(all_leads, key=lambda x: x.get('Lead Score', 0), reverse=True)
-        return sorted_leads[:num_leads]
+        for lead in top_leads:
+            lead['Lead Score'] = int(_score(lead.get('Lead Score', 0)))
+        return top_leads
+
+    async def iter_leads(self, filters=None, chunk_size=1000):
+        """Yield leads matching ``filters`` in chunks, read from the columnar mirror (no copy of the sheet)."""
+        mirror = await self.get_mirror()
+        if mirror is None:
+            return
+        with mirror.lock:
+            positions = mirror.filter(**filters) if filters else mirror.all_positions()
+        for start in range(0, len(positions), chunk_size):
+            with mirror.lock:
+                chunk = mirror.to_records(positions[start:start + chunk_size])
+            yield chunk
+            # Let other tasks run between chunks
+            await asyncio.sleep(0)
+
+    async def get_status_counts(self):
+        """Returns the number of leads per Status, most common first."""
+        mirror = await self.get_mirror()
+        if mirror is None:
+            return {}
+        with mirror.lock:
+            return mirror.value_counts('Status')
+
+    async def get_funnel_metrics(self):
+        """Returns lead counts per pipeline stage and the contacted -> won conversion rate."""
+        mirror = await self.get_mirror()
+        if mirror is None:
+            return {}
+        with mirror.lock:
+            total = len(mirror)
+            statuses = mirror.value_counts('Status')
+            outreach = mirror.value_counts('Outreach Status')
+            average_scores = mirror.group_by('Status', 'Lead Score', agg='mean')
+        return funnel_metrics(total, statuses, outreach, average_scores)
 
     async def add_lead(self, lead_data):
         """Adds a new lead to the Google Sheet."""
+        return await self.add_leads([lead_data]) == 1
+
+    async def add_leads(self, leads):
+        """Adds several leads with a single append call; returns how many were added.
+
+        The header row comes from the row index, so nothing is read first when it is fresh.
+        """
+        if not leads:
+            return 0
         if not self.sheet:
             if not await self._open_leads_sheet():
-                return False
+                return 0
+        names = ', '.join(str(lead.get('Lead Name', 'Unknown')) for lead in leads[:5]) + ('...' if len(leads) > 5 else '')
         try:
-            headers = await asyncio.to_thread(self.sheet.row_values, 1)
-            row_to_insert = [lead_data.get(header, '') for header in headers]
-            await asyncio.to_thread(self.sheet.append_row, row_to_insert)
-            logger.info(f"Added new lead: {lead_data.get('Lead Name', 'Unknown')}")
-            return True
+            headers = await self._get_headers()
+            rows_to_insert = [[lead.get(header, '') for header in headers] for lead in leads]
+            response = await asyncio.to_thread(self.writes.append_rows, rows_to_insert)
+            first_row = _appended_row(response)
+            for offset, lead in enumerate(leads):
+                self.index.add(lead.get(headers[0]) if headers else None, first_row + offset if first_row is not None else None)
+            if first_row is not None and first_row == len(self.mirror) + 2:
+                for row in rows_to_insert:
+                    self.mirror.append({header: _numericise(value) for header, value in zip(headers, row)})
+            else:
+                self.mirror.invalidate()
+            self.invalidate_snapshot()
+            logger.info(f"Added {len(leads)} new leads: {names}")
+            return len(leads)
         except Exception as e:
-            logger.error(f"Error adding new lead {lead_data.get('Lead Name', 'Unknown')}: {e}")
-            return False
+            logger.error(f"Error adding new leads {names}: {e}")
+            return 0
 
     async def update_lead_data(self, lead_name, updates):
         """Updates specific columns for a given lead based on a dictionary of updates."""
@@ -107,23 +822,21 @@ class GoogleSheet:
             if not await self._open_leads_sheet():
                 return False
         try:
-            cell = await asyncio.to_thread(self.sheet.find, lead_name, in_column=1) 
-            if cell:
-                row_index = cell.row
-                headers = await asyncio.to_thread(self.sheet.row_values, 1) 
-                
+            row_index = await self._find_row(lead_name)
+            if row_index:
+                columns = self.index.columns
+
                 cells_to_update = []
                 for column_name, new_value in updates.items():
-                    if column_name in headers:
-                        col_index = headers.index(column_name) + 1
-                        cells_to_update.append(gspread.Cell(row_index, col_index, new_value))
+                    if column_name in columns:
+                        cells_to_update.append((lead_name, column_name, new_value))
                         logger.info(f"Prepared update for {column_name} for {lead_name} to {new_value}")
                     else:
                         logger.warning(f"Column '{column_name}' not found in sheet headers for lead {lead_name}.")
                 
                 if cells_to_update:
-                    await asyncio.to_thread(self.sheet.update_cells, cells_to_update)
-                    logger.info(f"Batch updated {len(cells_to_update)} cells for {lead_name}")
+                    await self._queue_cells(cells_to_update)
+                    logger.info(f"Queued {len(cells_to_update)} cell updates for {lead_name}")
                 return True
             else:
                 print(f"Lead '{lead_name}' not found.")
@@ -131,16 +844,34 @@ class GoogleSheet:
         except Exception as e:
             logger.error(f"Error updating lead data for {lead_name}: {e}")
 
+    async def mirror_lead(self, lead):
+        """Writes a lead kept elsewhere into the sheet: updates its row if present, appends it otherwise.
+
+        Fields without a matching column are skipped. Used by the database -> Sheets sync.
+        """
+        if not self.sheet:
+            if not await self._open_leads_sheet():
+                return False
+        row = await self._find_row(lead.get('Lead Name'))
+        if row is None:
+            return await self.add_lead(lead)
+        columns = self.index.columns
+        await self._queue_cells([(lead['Lead Name'], key, value) for key, value in lead.items() if key in columns])
+        return True
+
     async def append_row_to_sheet(self, sheet_name: str, headers: list, row_data: list):
+        """Appends a row to another worksheet of the spreadsheet, writing its headers first if it is empty."""
         try:
-            spreadsheet = self.client.open_by_id(self.spreadsheet_id)
-            worksheet = spreadsheet.worksheet(sheet_name)
-            # Check if headers exist, if not, add them
-            if not worksheet.row_values(1):
-                worksheet.append_row(headers)
-            worksheet.append_row(row_data)
+            worksheet = await asyncio.to_thread(client_pool.get_worksheet, self.credentials_path, self.sheet_id, sheet_name)
+            if sheet_name not in self._worksheet_headers_checked:
+                if not await sheets_scheduler.run(worksheet.row_values, 1):
+                    await sheets_scheduler.run(worksheet.append_row, headers, idempotent=False)
+                self._worksheet_headers_checked.add(sheet_name)
+            await sheets_scheduler.run(worksheet.append_row, row_data, idempotent=False)
             logger.info(f"Row appended to {sheet_name} sheet.")
+            return True
         except Exception as e:
+            client_pool.forget(self.sheet_id, sheet_name)
             logger.error(f"Error appending row to {sheet_name} sheet: {e}")
             return False
 
@@ -150,21 +881,13 @@ class GoogleSheet:
             if not await self._open_leads_sheet():
                 return False
         try:
-            cell = await asyncio.to_thread(self.sheet.find, lead_name, in_column=1)
-            if cell:
-                row_index = cell.row
-                headers = await asyncio.to_thread(self.sheet.row_values, 1)
-                if 'Lead Score' in headers:
-                    col_index = headers.index('Lead Score') + 1
-                    current_score = 0
-                    try:
-                        cell_obj = await asyncio.to_thread(self.sheet.cell, row_index, col_index)
-                        current_score = int(cell_obj.value)
-                    except (ValueError, TypeError, AttributeError):
-                        pass # Score might be empty, non-numeric, or cell is empty
-                    new_score = current_score + score_change
-                    await asyncio.to_thread(self.sheet.update_cell, row_index, col_index, new_score)
-                    logger.info(f"Updated Lead Score for {lead_name} from {current_score} to {new_score}")
+            row_index = await self._find_row(lead_name)
+            if row_index:
+                if 'Lead Score' in self.index.columns:
+                    # Deltas accumulate in the write buffer and are applied against the
+                    # sheet's current value in one batched read-and-write per flush
+                    await self._queue_cells([(lead_name, 'Lead Score', Increment(score_change))])
+                    logger.info(f"Queued Lead Score change of {score_change:+} for {lead_name}")
                     return True
                 else:
                     logger.warning(f"'Lead Score' column not found in sheet headers for {lead_name}.")
@@ -182,8 +905,9 @@ class GoogleSheet:
             if not await self._open_leads_sheet():
                 return []
         try:
-            all_records = await asyncio.to_thread(self.sheet.get_all_records)
-            return [record.get('Company') for record in all_records if record.get('Company')]
+            mirror = await self.get_mirror()
+            with mirror.lock:
+                return [company for company in mirror.columns.get('Company', []) if company]
         except Exception as e:
             logger.error(f"Failed to retrieve company names from Google Sheet: {e}")
             return []
\ No newline at end of file
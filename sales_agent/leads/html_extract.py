@@ -0,0 +1,203 @@
+import json
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urljoin
+
+EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+PHONE_RE = re.compile(r"(?:\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}")
+
+# href fragment -> social network, in the order the old extractor checked them
+SOCIAL_PATTERNS = (
+    ('linkedin', 'linkedin.com/company'),
+    ('twitter', 'twitter.com/'),
+    ('facebook', 'facebook.com/'),
+)
+
+# JSON-LD @type values that describe the business itself
+_BUSINESS_TYPES = ("organization", "localbusiness", "professionalservice", "store", "service", "plumber")
+
+
+class PageInfo:
+    """Everything the lead finder reads from one page."""
+
+    def __init__(self):
+        self.socials: Dict[str, Optional[str]] = {name: None for name, _ in SOCIAL_PATTERNS}
+        self.contact_links: List[str] = []
+        self.emails: List[str] = []
+        self.phones: List[str] = []
+        self.business: Dict[str, Optional[str]] = {"business_name": None, "address": None, "contact_person": None}
+        self.title: Optional[str] = None
+
+    def to_dict(self):
+        return {
+            "socials": self.socials, "contact_links": self.contact_links, "emails": self.emails,
+            "phones": self.phones, "business": self.business, "title": self.title,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        info = cls()
+        for key, value in data.items():
+            if hasattr(info, key):
+                setattr(info, key, value)
+        return info
+
+
+class _PageParser(HTMLParser):
+    """One pass over the HTML collecting links, text, <title> and JSON-LD blocks."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []  # (href, text inside the <a>)
+        self.text = []
+        self.title = []
+        self.jsonld = []
+        self._anchor = None  # [href, text parts] of the <a> being read
+        self._in_title = False
+        self._in_code = False  # inside <script>/<style>, whose text is not page text
+        self._jsonld = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href is not None:
+                self._finish_anchor()
+                self._anchor = [href, []]
+        elif tag == 'title':
+            self._in_title = True
+        elif tag in ('script', 'style'):
+            self._in_code = True
+            if tag == 'script' and (dict(attrs).get('type') or '').lower() == 'application/ld+json':
+                self._jsonld = []
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self._finish_anchor()
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in ('script', 'style'):
+            self._in_code = False
+            if self._jsonld is not None:
+                self.jsonld.append(''.join(self._jsonld))
+                self._jsonld = None
+
+    def handle_data(self, data):
+        if self._in_code:
+            if self._jsonld is not None:
+                self._jsonld.append(data)
+            return
+        self.text.append(data)
+        if self._anchor is not None:
+            self._anchor[1].append(data)
+        if self._in_title:
+            self.title.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_anchor()
+
+    def _finish_anchor(self):
+        if self._anchor is not None:
+            self.links.append((self._anchor[0], ''.join(self._anchor[1])))
+            self._anchor = None
+
+
+def name_from_title(title: Optional[str]) -> Optional[str]:
+    """Business name from a page title such as 'Acme Plumbing | Home'."""
+    if not title:
+        return None
+    title = re.sub(r"\s+", " ", title).strip()
+    for sep in ["|", "-", ":", "–", "—"]:
+        if sep in title:
+            part = title.split(sep)[0].strip()
+            if 2 <= len(part) <= 120:
+                return part
+    return title if 2 <= len(title) <= 120 else None
+
+
+def business_from_jsonld(blocks) -> Dict[str, Optional[str]]:
+    """Business name, address and contact person from JSON-LD <script> contents."""
+    out: Dict[str, Optional[str]] = {"business_name": None, "address": None, "contact_person": None}
+    for block in blocks:
+        block = (block or "").strip()
+        if not block:
+            continue
+        try:
+            data = json.loads(block)
+        except ValueError:
+            # Some sites embed multiple JSON objects or invalid JSON; skip
+            continue
+        nodes = data if isinstance(data, list) else [data]
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            t = str(node.get("@type") or "").lower()
+            if not any(x in t for x in _BUSINESS_TYPES):
+                continue
+            name = node.get("name") or node.get("legalName")
+            if not out["business_name"] and isinstance(name, str):
+                out["business_name"] = name.strip()[:200]
+            addr = node.get("address")
+            if isinstance(addr, dict):
+                parts = [
+                    addr.get("streetAddress"), addr.get("addressLocality"), addr.get("addressRegion"), addr.get("postalCode"), addr.get("addressCountry"),
+                ]
+                addr_str = ", ".join([p for p in parts if isinstance(p, str) and p.strip()])
+                if addr_str:
+                    out["address"] = addr_str[:300]
+            cp = None
+            contact = node.get("contactPoint")
+            if isinstance(contact, dict):
+                cp = contact.get("name") or contact.get("email")
+            if isinstance(cp, str) and not out["contact_person"]:
+                out["contact_person"] = cp[:120]
+    return out
+
+
+def extract_page(html, base_url=None) -> PageInfo:
+    """Socials, contact-page candidates, emails, phones and the business profile of a page, in one parse.
+
+    ``html`` may be bytes or str; relative contact links are resolved against ``base_url``.
+    """
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    parser = _PageParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # HTMLParser is lenient, but keep whatever was read before a hard failure
+        parser._finish_anchor()
+
+    info = PageInfo()
+    text = ''.join(parser.text)
+    emails = dict.fromkeys(EMAIL_RE.findall(text))
+    phones = {}
+    for href, label in parser.links:
+        for name, pattern in SOCIAL_PATTERNS:
+            if pattern in href:
+                if not info.socials[name]:
+                    info.socials[name] = href
+                break
+        if 'contact' in label.lower():
+            info.contact_links.append(urljoin(base_url, href) if base_url else href)
+        lowered = href[:7].lower()
+        if lowered.startswith('mailto:'):
+            address = unquote(href[7:].split('?', 1)[0]).strip()
+            if address:
+                emails.setdefault(address)
+        elif lowered.startswith('tel:'):
+            number = unquote(href[4:]).strip()
+            if number:
+                phones.setdefault(number)
+    for number in PHONE_RE.findall(text):
+        phones.setdefault(number.strip())
+
+    info.emails = list(emails)
+    info.phones = list(phones)
+    info.title = ''.join(parser.title).strip() or None
+    info.business = business_from_jsonld(parser.jsonld)
+    if not info.business["business_name"]:
+        info.business["business_name"] = name_from_title(info.title)
+    return info
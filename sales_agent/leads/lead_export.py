@@ -0,0 +1,109 @@
+import csv
+import io
+import itertools
+import json
+import os
+import tempfile
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Columns of the original spreadsheet export, used when none are requested
+DEFAULT_EXPORT_COLUMNS = ["Lead Name", "Company", "Email", "Status", "Lead Score", "Outreach Status"]
+
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _cell(value):
+    return '' if value is None else value
+
+
+def _iter_json(chunks, columns):
+    # Same shape as the old one-shot response, written row by row
+    yield '{"success": true, "data": {"headers": ' + json.dumps(columns) + ', "rows": ['
+    total = 0
+    for chunk in chunks:
+        parts = []
+        for lead in chunk:
+            parts.append((',' if total else '') + json.dumps([_cell(lead.get(column)) for column in columns], default=str))
+            total += 1
+        if parts:
+            yield ''.join(parts)
+    yield ']}, "total_rows": ' + str(total) + '}'
+
+
+def _iter_ndjson(chunks, columns):
+    for chunk in chunks:
+        yield ''.join(json.dumps({column: _cell(lead.get(column)) for column in columns}, default=str) + '\n' for lead in chunk)
+
+
+def _iter_csv(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        for lead in chunk:
+            writer.writerow([_cell(lead.get(column)) for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _iter_xlsx(chunks, columns, read_size=64 * 1024):
+    # An .xlsx is a zip whose directory is written last, so it cannot go out
+    # before the last row. A write-only workbook keeps memory flat while it
+    # is built in a temp file, which is then streamed.
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Leads')
+    sheet.append(columns)
+    for chunk in chunks:
+        for lead in chunk:
+            sheet.append([_cell(lead.get(column)) for column in columns])
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(read_size)
+                if not data:
+                    break
+                yield data
+    finally:
+        os.unlink(path)
+
+
+def iter_export(chunks, columns=None, fmt='json'):
+    """Encode lead chunks (lists of lead dicts) as an export, yielding str or bytes pieces.
+
+    ``columns`` picks and orders the columns: the original export's columns by
+    default, ``'*'`` for all. Only one chunk is held at a time, except for
+    XLSX, which is built in a temp file first.
+    """
+    if columns == '*':
+        # Every column: take them from the first chunk
+        chunks = iter(chunks)
+        first = next(chunks, [])
+        columns = list(dict.fromkeys(key for lead in first for key in lead))
+        chunks = itertools.chain([first], chunks)
+    columns = list(columns or DEFAULT_EXPORT_COLUMNS)
+    if fmt == 'json':
+        return _iter_json(chunks, columns)
+    if fmt == 'ndjson':
+        return _iter_ndjson(chunks, columns)
+    if fmt == 'csv':
+        return _iter_csv(chunks, columns)
+    if fmt == 'xlsx':
+        if openpyxl is None:
+            raise ValueError("XLSX export needs openpyxl (pip install openpyxl)")
+        return _iter_xlsx(chunks, columns)
+    raise ValueError(f"Unsupported export format '{fmt}'; use one of: {', '.join(EXPORT_FORMATS)}")
@@ -0,0 +1,621 @@
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from sales_agent.utils.file_lock import FileLock
+from sales_agent.utils.logger import logger
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+# Where leads are kept: "sheets" (the Leads worksheet), "sqlite" or "postgres"
+LEAD_STORE_BACKEND = os.environ.get("LEAD_STORE_BACKEND", "sheets").lower()
+# SQLite file path or postgresql:// URL for the database backends
+LEADS_DATABASE_URL = os.environ.get("LEADS_DATABASE_URL") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'leads.db'
+)
+# Seconds between one-way syncs of the database to the Leads worksheet (0 disables the sync)
+LEADS_SHEETS_SYNC_INTERVAL = float(os.environ.get("LEADS_SHEETS_SYNC_INTERVAL", 0))
+# New leads queued by the lead finder are written once this many are waiting...
+LEADS_APPEND_BATCH = int(os.environ.get("LEADS_APPEND_BATCH", 25))
+# ...or once the oldest has waited this many seconds
+LEADS_APPEND_FLUSH_SECONDS = float(os.environ.get("LEADS_APPEND_FLUSH_SECONDS", 5))
+
+# Sheet headers stored in their own indexed columns; every other field is kept as JSON in ``data``
+_CORE_COLUMNS = {
+    'Lead Name': 'lead_name',
+    'Company': 'company',
+    'Status': 'status',
+    'Outreach Status': 'outreach_status',
+    'Reply Channel': 'reply_channel',
+    'Lead Score': 'lead_score',
+}
+_SELECT_COLUMNS = 'id, ' + ', '.join(_CORE_COLUMNS.values()) + ', data, created_at, updated_at'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id {id_column},
+    lead_name TEXT NOT NULL UNIQUE,
+    company TEXT,
+    status TEXT,
+    outreach_status TEXT,
+    reply_channel TEXT,
+    lead_score {real} NOT NULL DEFAULT 0,
+    data TEXT NOT NULL DEFAULT '{{}}',
+    created_at {real} NOT NULL,
+    updated_at {real} NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_status_score ON leads (status, lead_score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_leads_score ON leads (lead_score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_leads_company ON leads (company);
+CREATE INDEX IF NOT EXISTS idx_leads_outreach_status ON leads (outreach_status);
+CREATE INDEX IF NOT EXISTS idx_leads_updated_at_id ON leads (updated_at, id);
+
+CREATE TABLE IF NOT EXISTS lead_store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Same selection as GoogleSheet.read_leads(): leads still marked 'New', or with no status at all
+_NEW_LEADS = "(status = 'New' OR status IS NULL)"
+
+
+def funnel_metrics(total, statuses, outreach, average_scores):
+    """Pipeline stage counts and the contacted -> won conversion rate, from per-status counts."""
+    contacted = sum(count for status, count in outreach.items() if status.endswith('Sent'))
+    booked = sum(count for status, count in statuses.items() if status.startswith('Booking Link Sent'))
+    won = statuses.get('Closed-Won', 0)
+    lost = statuses.get('Closed-Lost', 0)
+    return {
+        "total_leads": total,
+        "new": statuses.get('New', 0),
+        "contacted": contacted,
+        "booking_link_sent": booked,
+        "closed_won": won,
+        "closed_lost": lost,
+        "in_progress": contacted - won - lost if contacted > won + lost else 0,
+        "conversion_rate": round(won / contacted, 4) if contacted else 0.0,
+        "status_counts": statuses,
+        "average_score_by_status": average_scores,
+    }
+
+
+class LeadStore(abc.ABC):
+    """The operations the pipeline, API and bots need from wherever leads are kept.
+
+    Leads are row dicts keyed by the Leads sheet headers ('Lead Name',
+    'Company', 'Status', 'Lead Score', ...). Writes may be buffered by a
+    backend until ``flush()``.
+    """
+
+    @abc.abstractmethod
+    async def read_leads(self, start_row=0):
+        """Leads with Status 'New' (or none), from the ``start_row``-th lead on."""
+
+    @abc.abstractmethod
+    async def read_leads_sorted_by_score(self, num_leads: int = 10):
+        """The ``num_leads`` highest-scored new leads."""
+
+    @abc.abstractmethod
+    async def add_lead(self, lead_data):
+        """Add one lead; False if it was not added (e.g. it already exists)."""
+
+    async def add_leads(self, leads):
+        """Add several leads at once; returns how many were added."""
+        added = 0
+        for lead in leads:
+            if await self.add_lead(lead):
+                added += 1
+        return added
+
+    @abc.abstractmethod
+    async def update_lead_data(self, lead_name, updates):
+        """Set the fields in ``updates`` on a lead; False if there is no such lead."""
+
+    @abc.abstractmethod
+    async def update_lead_score(self, lead_name, score_change):
+        """Add ``score_change`` to a lead's score; concurrent changes must all count."""
+
+    @abc.abstractmethod
+    async def get_all_company_names(self):
+        """Company names of all leads, in storage order."""
+
+    @abc.abstractmethod
+    def iter_leads(self, filters=None, chunk_size=1000):
+        """Async iterator over every lead matching ``filters``, in lists of up to ``chunk_size``, in storage order.
+
+        ``filters`` maps a field to the value it must equal, or to a list of
+        accepted values.
+        """
+
+    @abc.abstractmethod
+    async def changes_since(self, cursor=None):
+        """Leads changed after ``cursor`` (all leads when it is None) and the next cursor.
+
+        Cursors are opaque values returned by the same backend.
+        """
+
+    @abc.abstractmethod
+    async def get_status_counts(self):
+        """Number of leads per Status."""
+
+    @abc.abstractmethod
+    async def get_funnel_metrics(self):
+        """Pipeline stage counts, as returned by ``funnel_metrics()``."""
+
+    async def flush(self):
+        """Write out buffered changes. Backends that write immediately have nothing to do."""
+
+
+def _score_value(value):
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+class SqlLeadStore(LeadStore):
+    """Lead store backed by SQLite (WAL mode) or, with psycopg2 installed, Postgres.
+
+    The fields the pipeline filters and sorts on have their own indexed
+    columns; the rest of a lead is kept as JSON, so leads can carry any
+    fields the sheet would. Score changes are single ``UPDATE ... SET
+    lead_score = lead_score + ?`` statements, so concurrent deltas from any
+    number of processes are never lost.
+    """
+
+    def __init__(self, url=LEADS_DATABASE_URL):
+        self.url = url
+        self.postgres = url.startswith(('postgres://', 'postgresql://'))
+        if self.postgres and psycopg2 is None:
+            raise RuntimeError("LEADS_DATABASE_URL points to Postgres but psycopg2 is not installed")
+        self._local = threading.local()
+        schema = _SCHEMA.format(
+            id_column='BIGSERIAL PRIMARY KEY' if self.postgres else 'INTEGER PRIMARY KEY AUTOINCREMENT',
+            real='DOUBLE PRECISION' if self.postgres else 'REAL',
+        )
+        with self._transaction() as cur:
+            for statement in schema.split(';'):
+                if statement.strip():
+                    cur.execute(statement)
+
+    def _conn(self):
+        # Connections are per thread; the async methods run queries in worker threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.postgres:
+                conn = psycopg2.connect(self.url)
+                conn.autocommit = True
+            else:
+                conn = sqlite3.connect(self.url, timeout=30, isolation_level=None)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _sql(self, query):
+        return query.replace('?', '%s') if self.postgres else query
+
+    def _execute(self, query, params=()):
+        cur = self._conn().cursor()
+        cur.execute(self._sql(query), params)
+        return cur
+
+    @contextmanager
+    def _transaction(self):
+        cur = self._conn().cursor()
+        cur.execute('BEGIN' if self.postgres else 'BEGIN IMMEDIATE')
+        try:
+            yield cur
+        except BaseException:
+            cur.execute('ROLLBACK')
+            raise
+        cur.execute('COMMIT')
+
+    def _row_to_lead(self, row):
+        lead = json.loads(row[7] or '{}')
+        for header, value in zip(_CORE_COLUMNS, row[1:7]):
+            if value is not None:
+                lead[header] = value
+        score = lead.get('Lead Score', 0)
+        if isinstance(score, float) and score.is_integer():
+            lead['Lead Score'] = int(score)
+        return lead
+
+    def _split(self, fields):
+        """Split sheet-style fields into (core column values, extra JSON fields)."""
+        core, extra = {}, {}
+        for key, value in fields.items():
+            if key in _CORE_COLUMNS:
+                core[_CORE_COLUMNS[key]] = _score_value(value) if key == 'Lead Score' else value
+            else:
+                extra[key] = value
+        return core, extra
+
+    def _select(self, where='1 = 1', params=(), order='id', limit=None):
+        query = f'SELECT {_SELECT_COLUMNS} FROM leads WHERE {where} ORDER BY {order}'
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+        return [self._row_to_lead(row) for row in self._execute(query, params).fetchall()]
+
+    def _read_leads(self, start_row):
+        if start_row <= 0:
+            return self._select(_NEW_LEADS)
+        cutoff = self._execute(
+            f'SELECT id FROM leads ORDER BY id LIMIT 1 OFFSET {int(start_row)}'
+        ).fetchone()
+        if cutoff is None:
+            return []
+        return self._select(f'{_NEW_LEADS} AND id >= ?', (cutoff[0],))
+
+    def _lead_row(self, lead_data, now):
+        """Column names and values to insert for a lead, or None if it has no name."""
+        core, extra = self._split(lead_data)
+        # Leads found by the crawler only carry company_name
+        core['company'] = core.get('company') or lead_data.get('company_name')
+        core['lead_name'] = core.get('lead_name') or core['company']
+        if not core['lead_name']:
+            logger.warning(f"Not adding a lead without a name: {lead_data}")
+            return None
+        core.setdefault('lead_score', 0)
+        return list(core) + ['data', 'created_at', 'updated_at'], list(core.values()) + [json.dumps(extra, default=str), now, now]
+
+    def _add_leads(self, leads):
+        now = time.time()
+        added = 0
+        with self._transaction() as cur:
+            for lead_data in leads:
+                row = self._lead_row(lead_data, now)
+                if row is None:
+                    continue
+                columns, values = row
+                cur.execute(self._sql(
+                    f"INSERT INTO leads ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                    "ON CONFLICT (lead_name) DO NOTHING"
+                ), values)
+                if cur.rowcount:
+                    added += 1
+                else:
+                    logger.warning(f"Lead '{values[columns.index('lead_name')]}' already exists; not adding it again.")
+        if added:
+            logger.info(f"Added {added} new leads")
+        return added
+
+    def _update_lead_data(self, lead_name, updates):
+        core, extra = self._split(updates)
+        core.pop('lead_name', None)
+        with self._transaction() as cur:
+            cur.execute(self._sql('SELECT data FROM leads WHERE lead_name = ?' + (' FOR UPDATE' if self.postgres else '')),
+                        (lead_name,))
+            row = cur.fetchone()
+            if row is None:
+                logger.warning(f"Lead '{lead_name}' not found.")
+                return False
+            data = json.loads(row[0] or '{}')
+            data.update(extra)
+            assignments = [f'{column} = ?' for column in core] + ['data = ?', 'updated_at = ?']
+            cur.execute(
+                self._sql(f"UPDATE leads SET {', '.join(assignments)} WHERE lead_name = ?"),
+                list(core.values()) + [json.dumps(data, default=str), time.time(), lead_name],
+            )
+        logger.info(f"Updated {len(updates)} fields for {lead_name}")
+        return True
+
+    def _update_lead_score(self, lead_name, score_change):
+        cur = self._execute(
+            'UPDATE leads SET lead_score = lead_score + ?, updated_at = ? WHERE lead_name = ?',
+            (score_change, time.time(), lead_name),
+        )
+        if cur.rowcount == 0:
+            logger.warning(f"Lead '{lead_name}' not found for score update.")
+            return False
+        logger.info(f"Changed Lead Score by {score_change:+} for {lead_name}")
+        return True
+
+    def _counts(self, column):
+        rows = self._execute(
+            f"SELECT COALESCE({column}, ''), COUNT(*) FROM leads GROUP BY COALESCE({column}, '') ORDER BY COUNT(*) DESC"
+        ).fetchall()
+        return {value: count for value, count in rows if count}
+
+    def _funnel_metrics(self):
+        total = self._execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+        average_scores = {
+            status: float(average) for status, average in self._execute(
+                "SELECT COALESCE(status, ''), AVG(lead_score) FROM leads GROUP BY COALESCE(status, '')"
+            ).fetchall()
+        }
+        return funnel_metrics(total, self._counts('status'), self._counts('outreach_status'), average_scores)
+
+    def changed_since(self, cursor=(0, 0), limit=1000):
+        """Up to ``limit`` leads changed after ``cursor``, oldest change first.
+
+        ``cursor`` is an ``(updated_at, id)`` pair: leads written in the same
+        batch share an ``updated_at``, so the id breaks ties and no lead is
+        skipped or returned twice however large the batch. Returns
+        ``(leads, cursor)`` with the pair of the last lead, to pass back in.
+        """
+        updated_at, after_id = cursor
+        rows = self._execute(
+            f'SELECT {_SELECT_COLUMNS} FROM leads WHERE updated_at > ? OR (updated_at = ? AND id > ?) '
+            f'ORDER BY updated_at, id LIMIT {int(limit)}',
+            (updated_at, updated_at, after_id),
+        ).fetchall()
+        latest = (rows[-1][9], rows[-1][0]) if rows else tuple(cursor)
+        return [self._row_to_lead(row) for row in rows], latest
+
+    def _lead_chunk(self, filters, after_id, chunk_size):
+        """Next chunk of leads with id > ``after_id``; core-column filters run in SQL, the rest here."""
+        where, params = ['id > ?'], [after_id]
+        extra = {}
+        for key, wanted in (filters or {}).items():
+            wanted = list(wanted) if isinstance(wanted, (list, tuple, set)) else [wanted]
+            if key in _CORE_COLUMNS:
+                clause = f"{_CORE_COLUMNS[key]} IN ({', '.join('?' * len(wanted))})"
+                if key == 'Status' and 'New' in wanted:
+                    # A lead with no status is New, as in read_leads()
+                    clause = f"({clause} OR status IS NULL)"
+                where.append(clause)
+                params.extend(wanted)
+            else:
+                extra[key] = wanted
+        rows = self._execute(
+            f"SELECT {_SELECT_COLUMNS} FROM leads WHERE {' AND '.join(where)} ORDER BY id LIMIT {int(chunk_size)}", params
+        ).fetchall()
+        leads = [self._row_to_lead(row) for row in rows]
+        if extra:
+            leads = [lead for lead in leads if all(lead.get(key) in wanted for key, wanted in extra.items())]
+        return leads, (rows[-1][0] if rows else None)
+
+    def get_meta(self, key, default=None):
+        row = self._execute('SELECT value FROM lead_store_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self._execute(
+            'INSERT INTO lead_store_meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (key, str(value)),
+        )
+
+    async def read_leads(self, start_row=0):
+        try:
+            return await asyncio.to_thread(self._read_leads, start_row)
+        except Exception as e:
+            logger.error(f"Failed to read new leads from the lead database: {e}")
+            return []
+
+    async def read_leads_sorted_by_score(self, num_leads: int = 10):
+        try:
+            return await asyncio.to_thread(self._select, _NEW_LEADS, (), 'lead_score DESC, id', num_leads)
+        except Exception as e:
+            logger.error(f"Failed to read leads from the lead database: {e}")
+            return []
+
+    async def add_lead(self, lead_data):
+        return await self.add_leads([lead_data]) == 1
+
+    async def add_leads(self, leads):
+        try:
+            return await asyncio.to_thread(self._add_leads, leads)
+        except Exception as e:
+            logger.error(f"Error adding {len(leads)} new leads: {e}")
+            return 0
+
+    async def update_lead_data(self, lead_name, updates):
+        try:
+            return await asyncio.to_thread(self._update_lead_data, lead_name, updates)
+        except Exception as e:
+            logger.error(f"Error updating lead data for {lead_name}: {e}")
+            return False
+
+    async def update_lead_score(self, lead_name, score_change):
+        try:
+            return await asyncio.to_thread(self._update_lead_score, lead_name, score_change)
+        except Exception as e:
+            logger.error(f"Error updating lead score for {lead_name}: {e}")
+            return False
+
+    async def get_all_company_names(self):
+        try:
+            rows = await asyncio.to_thread(
+                lambda: self._execute("SELECT company FROM leads WHERE company IS NOT NULL AND company <> '' ORDER BY id").fetchall()
+            )
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to retrieve company names from the lead database: {e}")
+            return []
+
+    async def iter_leads(self, filters=None, chunk_size=1000):
+        # Keyset pagination: each chunk is its own short query
+        after_id = 0
+        while True:
+            leads, after_id = await asyncio.to_thread(self._lead_chunk, filters, after_id, chunk_size)
+            if leads:
+                yield leads
+            if after_id is None:
+                return
+
+    async def changes_since(self, cursor=None):
+        # Paged with changed_since(), so the cursor is its (updated_at, id) pair
+        cursor, page_size = (0, 0) if cursor is None else cursor, 1000
+        changed = []
+        while True:
+            leads, cursor = await asyncio.to_thread(self.changed_since, cursor, page_size)
+            changed.extend(leads)
+            if len(leads) < page_size:
+                return changed, cursor
+
+    async def get_status_counts(self):
+        return await asyncio.to_thread(self._counts, 'status')
+
+    async def get_funnel_metrics(self):
+        return await asyncio.to_thread(self._funnel_metrics)
+
+
+class SheetsSync:
+    """One-way copy of a SqlLeadStore into the Leads worksheet, for people to look at.
+
+    Each pass pushes the leads changed since the previous pass: existing rows
+    are updated (through the sheet's batched writes) and new leads appended.
+    The cursor is kept in the database and passes are serialized with a file
+    lock, so several processes can run the sync without double-appending.
+    Edits made in the sheet are not read back.
+    """
+
+    CURSOR_KEY = 'sheets_sync_cursor'
+    BATCH_SIZE = 1000
+
+    def __init__(self, store, sheet, lock_path):
+        self.store = store
+        self.sheet = sheet
+        self._lock = FileLock(lock_path)
+
+    async def sync_once(self):
+        """Push pending changes to the sheet; returns how many leads were written."""
+        await asyncio.to_thread(self._lock.acquire)
+        try:
+            cursor = self._load_cursor(await asyncio.to_thread(self.store.get_meta, self.CURSOR_KEY))
+            written = 0
+            while True:
+                leads, cursor = await asyncio.to_thread(self.store.changed_since, cursor, self.BATCH_SIZE)
+                for lead in leads:
+                    if await self.sheet.mirror_lead(lead):
+                        written += 1
+                await self.sheet.flush()
+                if leads:
+                    await asyncio.to_thread(self.store.set_meta, self.CURSOR_KEY, json.dumps(cursor))
+                if len(leads) < self.BATCH_SIZE:
+                    break
+            return written
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _load_cursor(value):
+        """The stored ``(updated_at, id)`` cursor; ``(0, 0)`` before the first pass."""
+        cursor = json.loads(value) if value else (0, 0)
+        if isinstance(cursor, (int, float)):
+            # Cursor stored before it carried the id: push the leads of that instant again
+            return cursor, 0
+        return tuple(cursor)
+
+    async def run_forever(self, interval):
+        while True:
+            try:
+                written = await self.sync_once()
+                if written:
+                    logger.info(f"Synced {written} leads to the Leads sheet")
+            except Exception as e:
+                logger.error(f"Lead database -> Sheets sync failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+
+class LeadAppendQueue:
+    """Collects new leads and writes them to a LeadStore in batches from a background task.
+
+    ``put()`` never waits on the store, so a crawl loop can hand leads off and
+    keep going. A batch is written once ``batch_size`` leads are waiting or the
+    oldest has waited ``flush_seconds``; ``close()`` writes whatever is left.
+    Use it as ``async with LeadAppendQueue(store) as queue:``.
+    """
+
+    def __init__(self, store, batch_size=LEADS_APPEND_BATCH, flush_seconds=LEADS_APPEND_FLUSH_SECONDS):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.queue = asyncio.Queue()
+        self.added = 0
+        self._task = None
+
+    def put(self, lead):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self.queue.put_nowait(lead)
+
+    async def _write(self, batch):
+        try:
+            self.added += await self.store.add_leads(batch)
+        except Exception as e:
+            logger.error(f"Failed to add {len(batch)} leads to the lead store: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            lead = await self.queue.get()
+            if lead is None:
+                break
+            batch = [lead]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    lead = await asyncio.wait_for(self.queue.get(), max(0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if lead is None:
+                    closing = True
+                    break
+                batch.append(lead)
+            await self._write(batch)
+
+    async def close(self):
+        """Write the remaining leads and stop the background task."""
+        if self._task is not None:
+            self.queue.put_nowait(None)
+            await self._task
+            self._task = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+_sync_thread = None
+
+
+def start_sheets_sync(store, interval=None):
+    """Start the one-way database -> Leads sheet sync in a daemon thread (once per process)."""
+    global _sync_thread
+    if _sync_thread is not None:
+        return _sync_thread
+    from sales_agent.leads.google_sheets import SHEETS_LOCK_DIR, GoogleSheet
+
+    sheet = GoogleSheet.shared()
+    lock_path = os.path.join(SHEETS_LOCK_DIR, f"sheets-sync-{sheet.sheet_id}.lock")
+    sync = SheetsSync(store, sheet, lock_path)
+    _sync_thread = threading.Thread(
+        target=asyncio.run, args=(sync.run_forever(interval or LEADS_SHEETS_SYNC_INTERVAL),),
+        name="leads-sheets-sync", daemon=True,
+    )
+    _sync_thread.start()
+    return _sync_thread
+
+
+def get_lead_store():
+    """The process-wide LeadStore selected by ``LEAD_STORE_BACKEND``."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if LEAD_STORE_BACKEND in ('sqlite', 'postgres', 'database'):
+                _store = SqlLeadStore(LEADS_DATABASE_URL)
+                if LEADS_SHEETS_SYNC_INTERVAL > 0:
+                    start_sheets_sync(_store)
+            else:
+                from sales_agent.leads.google_sheets import GoogleSheet
+                _store = GoogleSheet.shared()
+        return _store
@@ -0,0 +1,220 @@
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _score(value):
+    """Numeric value of a cell for sorting and sums; blank or non-numeric cells count as 0."""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+class LeadsMirror:
+    """Column-oriented copy of the Leads worksheet for analytics queries.
+
+    Each column is kept as a list of cell values (as ``get_all_records`` would
+    return them). Queries work on row positions: a filter returns positions,
+    sort/group helpers take positions, and ``to_records`` turns them back into
+    row dicts. With NumPy installed, columns are converted once into arrays
+    (object arrays for values, float arrays for numeric views) and reused
+    until the data changes, so filters, top-N and group-bys over 100k rows
+    are vectorized. Without NumPy the same helpers run as plain Python loops.
+
+    The mirror is loaded from each full snapshot download and then patched
+    with our own cell writes and appends, so it stays current between
+    downloads without re-reading the sheet.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.headers = []
+        self.columns = {}
+        self.loaded_at = None
+        self._arrays = {}
+        self._numeric = {}
+        self._codes = {}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def load(self, headers, records):
+        """Replace the contents with ``records`` (row dicts keyed by ``headers``)."""
+        with self.lock:
+            self.headers = [header for header in headers if header]
+            self.columns = {header: [record.get(header, '') for record in records] for header in self.headers}
+            self._arrays.clear()
+            self._numeric.clear()
+            self._codes.clear()
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded_at = None
+
+    def is_fresh(self, ttl):
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < ttl
+
+    def set_cell(self, position, header, value):
+        """Apply one of our own writes (``position`` is the 0-based data row)."""
+        with self.lock:
+            column = self.columns.get(header)
+            if column is None or not 0 <= position < len(column):
+                return
+            column[position] = value
+            if header in self._arrays:
+                self._arrays[header][position] = value
+            if header in self._numeric:
+                self._numeric[header][position] = _score(value)
+            self._codes.pop(header, None)
+
+    def append(self, record):
+        with self.lock:
+            for header, column in self.columns.items():
+                column.append(record.get(header, ''))
+            # Arrays cannot grow in place; rebuild them on next use
+            self._arrays.clear()
+            self._numeric.clear()
+            self._codes.clear()
+
+    # Column access
+
+    def column(self, header):
+        """Values of a column: an object array with NumPy, otherwise the list itself."""
+        with self.lock:
+            if np is None:
+                return self.columns.get(header, [''] * len(self))
+            array = self._arrays.get(header)
+            if array is None:
+                array = np.empty(len(self), dtype=object)
+                array[:] = self.columns.get(header, [''] * len(self))
+                self._arrays[header] = array
+            return array
+
+    def numeric(self, header):
+        """Values of a column as numbers (float array with NumPy), blanks and text as 0."""
+        with self.lock:
+            values = self._numeric.get(header)
+            if values is None:
+                values = [_score(value) for value in self.columns.get(header, [''] * len(self))]
+                if np is not None:
+                    values = np.asarray(values, dtype=float)
+                self._numeric[header] = values
+            return values
+
+    def codes(self, header):
+        """Factorized column: ``(distinct values as str, int code array per row)``. NumPy only."""
+        with self.lock:
+            cached = self._codes.get(header)
+            if cached is None:
+                lookup = {}
+                codes = np.fromiter(
+                    (lookup.setdefault(str(value), len(lookup)) for value in self.columns.get(header, [''] * len(self))),
+                    dtype=np.intp, count=len(self),
+                )
+                cached = self._codes[header] = (list(lookup), codes)
+            return cached
+
+    # Query helpers; all of them take and return row positions
+
+    def all_positions(self):
+        return np.arange(len(self)) if np is not None else list(range(len(self)))
+
+    def filter(self, positions=None, **equals):
+        """Positions whose columns equal the given values, e.g. ``filter(Status='New')``.
+
+        A list or tuple value matches any of its items.
+        """
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            for header, wanted in equals.items():
+                column = self.column(header)
+                if isinstance(wanted, (list, tuple, set)):
+                    mask &= np.isin(column, list(wanted))
+                else:
+                    mask &= column == wanted
+            matches = np.flatnonzero(mask)
+            return matches if positions is None else np.intersect1d(positions, matches)
+        candidates = range(len(self)) if positions is None else positions
+        checks = [
+            (self.columns.get(header, [''] * len(self)), set(wanted) if isinstance(wanted, (list, tuple, set)) else {wanted})
+            for header, wanted in equals.items()
+        ]
+        return [i for i in candidates if all(column[i] in allowed for column, allowed in checks)]
+
+    def top_n(self, header, n, positions=None):
+        """Positions of the ``n`` highest values of a numeric column, ties kept in sheet order."""
+        positions = self.all_positions() if positions is None else positions
+        if np is not None:
+            positions = np.asarray(positions, dtype=int)
+            values = self.numeric(header)[positions]
+            order = np.argsort(-values, kind='stable')
+            return positions[order[:n]]
+        values = self.numeric(header)
+        return sorted(positions, key=lambda i: values[i], reverse=True)[:n]
+
+    def value_counts(self, header, positions=None):
+        """Count of each distinct value of a column, most common first."""
+        if np is not None:
+            groups, codes = self.codes(header)
+            if positions is not None:
+                codes = codes[np.asarray(positions, dtype=int)]
+            counts = np.bincount(codes, minlength=len(groups))
+            order = np.argsort(-counts, kind='stable')
+            return {groups[i]: int(counts[i]) for i in order if counts[i]}
+        column = self.columns.get(header, [''] * len(self))
+        counts = {}
+        for i in (range(len(self)) if positions is None else positions):
+            key = str(column[i])
+            counts[key] = counts.get(key, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+    def group_by(self, key, value=None, agg='count', positions=None):
+        """Aggregate a numeric column per distinct ``key`` value: count, sum or mean."""
+        if agg == 'count' or value is None:
+            return self.value_counts(key, positions)
+        if np is not None:
+            groups, codes = self.codes(key)
+            numbers = self.numeric(value)
+            if positions is not None:
+                positions = np.asarray(positions, dtype=int)
+                codes, numbers = codes[positions], numbers[positions]
+            sums = np.bincount(codes, weights=numbers, minlength=len(groups))
+            counts = np.bincount(codes, minlength=len(groups))
+            if agg == 'mean':
+                sums = sums / np.maximum(counts, 1)
+            return {groups[i]: float(sums[i]) for i in range(len(groups)) if counts[i]}
+        keys = self.columns.get(key, [''] * len(self))
+        numbers = self.numeric(value)
+        sums, counts = {}, {}
+        for i in (range(len(self)) if positions is None else positions):
+            group = str(keys[i])
+            sums[group] = sums.get(group, 0) + numbers[i]
+            counts[group] = counts.get(group, 0) + 1
+        if agg == 'mean':
+            return {group: sums[group] / counts[group] for group in sums}
+        return sums
+
+    def unique(self, header, positions=None):
+        """Distinct non-empty values of a column, in first-seen order."""
+        column = self.columns.get(header, [])
+        seen = {}
+        for i in (range(len(column)) if positions is None else positions):
+            value = column[i]
+            if value != '' and value is not None and value not in seen:
+                seen[value] = None
+        return list(seen)
+
+    def to_records(self, positions=None, headers=None):
+        """Row dicts for the given positions (all rows by default), optionally projected."""
+        headers = headers or self.headers
+        columns = [(header, self.columns.get(header, [''] * len(self))) for header in headers]
+        positions = range(len(self)) if positions is None else positions
+        return [{header: column[i] for header, column in columns} for i in positions]
@@ -0,0 +1,197 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from functools import partial
+from urllib.parse import urlsplit, urlunsplit
+
+from sales_agent.leads.html_extract import PageInfo, extract_page
+from sales_agent.utils.logger import logger
+
+# Directory for the cross-run page cache (unset: pages are only shared within a run)
+PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR")
+# Seconds a page from the disk cache is used without asking the server again
+PAGE_CACHE_MAX_AGE = float(os.environ.get("PAGE_CACHE_MAX_AGE", 0))
+# Seconds between checks on a page another run is fetching (see CrawlFrontier)
+PAGE_CACHE_CLAIM_POLL = 0.5
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_current_cache = contextvars.ContextVar("page_cache", default=None)
+
+
+def normalize_url(url):
+    """Cache key for a URL: lower-case scheme and host, no default port or fragment, '/' for an empty path."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class Page:
+    """A downloaded page, parsed at most once however many extractors read it."""
+
+    def __init__(self, url, status_code, content, etag=None, last_modified=None, fetched_at=None, info=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at or time.time()
+        self._info = info
+
+    def info(self):
+        """Socials, contact links, emails, phones and business profile (see html_extract.extract_page)."""
+        if self._info is None:
+            self._info = extract_page(self.content, self.url)
+        return self._info
+
+
+class PageCache:
+    """Pages downloaded during one lead-finding run, keyed by normalized URL.
+
+    Concurrent requests for the same URL share one download, and a failed
+    download is remembered too, so a dead site is only tried once per run.
+    With ``disk_dir`` set, pages are also kept across runs and revalidated
+    with If-None-Match / If-Modified-Since once older than ``max_age``; a 304
+    reuses the stored body. With a ``frontier`` (a CrawlFrontier), pages any
+    run has already extracted are not downloaded again, and a page another run
+    is downloading is waited for. With a ``scheduler`` (a HostScheduler),
+    downloads are paced per host and checked against robots.txt.
+    """
+
+    def __init__(self, disk_dir=PAGE_CACHE_DIR, max_age=PAGE_CACHE_MAX_AGE, frontier=None, owner=None, scheduler=None):
+        self.disk_dir = disk_dir
+        self.max_age = max_age
+        self.scheduler = scheduler
+        self.frontier = frontier
+        self.owner = owner
+        self.pages = {}
+        self.stats = {"requests": 0, "hits": 0, "downloads": 0, "revalidated": 0, "bytes": 0, "frontier": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_paths(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, name + '.json'), os.path.join(self.disk_dir, name + '.body')
+
+    def _load(self, key):
+        meta_path, body_path = self._disk_paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        return Page(meta['url'], meta['status_code'], content, meta.get('etag'), meta.get('last_modified'), meta.get('fetched_at'))
+
+    def _store(self, key, page):
+        meta_path, body_path = self._disk_paths(key)
+        meta = {
+            'url': page.url, 'status_code': page.status_code, 'etag': page.etag,
+            'last_modified': page.last_modified, 'fetched_at': page.fetched_at,
+        }
+        try:
+            for path, data, mode in ((body_path, page.content, 'wb'), (meta_path, json.dumps(meta), 'w')):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write {page.url} to the page cache: {e}")
+
+    async def _download(self, key, url, client, timeout):
+        if self.frontier is None:
+            return await self._fetch(key, url, client, timeout)
+        while True:
+            state, status_code, info = await asyncio.to_thread(self.frontier.claim_page, key, self.owner)
+            if state == 'extracted':
+                self.stats["frontier"] += 1
+                return Page(url, status_code, b'', info=PageInfo.from_dict(info))
+            if state == 'claimed':
+                break
+            await asyncio.sleep(PAGE_CACHE_CLAIM_POLL)
+        try:
+            page = await self._fetch(key, url, client, timeout)
+            info = await asyncio.to_thread(page.info)
+        except BaseException:
+            await asyncio.to_thread(self.frontier.release_page, key, self.owner)
+            raise
+        if 200 <= page.status_code < 300 or page.status_code == 304:
+            await asyncio.to_thread(self.frontier.save_page, key, page.status_code, info.to_dict())
+        else:
+            # An error page (404, 5xx, ...) is not the site's content; leave it for a later run to retry
+            await asyncio.to_thread(self.frontier.release_page, key, self.owner)
+        return page
+
+    async def _fetch(self, key, url, client, timeout):
+        stored = await asyncio.to_thread(self._load, key) if self.disk_dir else None
+        if stored is not None and time.time() - stored.fetched_at < self.max_age:
+            self.stats["hits"] += 1
+            return stored
+        headers = {}
+        if stored is not None:
+            if stored.etag:
+                headers['If-None-Match'] = stored.etag
+            if stored.last_modified:
+                headers['If-Modified-Since'] = stored.last_modified
+        get = client.get if self.scheduler is None else partial(self.scheduler.fetch, client)
+        response = await get(url, timeout=timeout, follow_redirects=True, headers=headers)
+        if stored is not None and response.status_code == 304:
+            self.stats["revalidated"] += 1
+            stored.fetched_at = time.time()
+            page = stored
+        else:
+            self.stats["downloads"] += 1
+            self.stats["bytes"] += len(response.content)
+            page = Page(
+                str(response.url), response.status_code, response.content,
+                response.headers.get('ETag'), response.headers.get('Last-Modified'),
+            )
+        if self.disk_dir and page.status_code == 200 and (page.etag or page.last_modified or self.max_age):
+            await asyncio.to_thread(self._store, key, page)
+        return page
+
+    async def get(self, url, client, timeout=10):
+        """The page at ``url``, downloading it only if this run has not already."""
+        key = normalize_url(url)
+        self.stats["requests"] += 1
+        task = self.pages.get(key)
+        if task is None:
+            task = self.pages[key] = asyncio.ensure_future(self._download(key, url, client, timeout))
+        else:
+            self.stats["hits"] += 1
+        # Shielded, so one caller being cancelled does not cancel the download for the others
+        return await asyncio.shield(task)
+
+    def cancel_pending(self):
+        """Cancel downloads nobody is waiting for any more (e.g. when a run stops early)."""
+        for task in self.pages.values():
+            if not task.done():
+                task.cancel()
+
+
+@contextmanager
+def page_cache_scope(cache=None):
+    """Share one PageCache between every fetch_page() call made inside this block (and its tasks)."""
+    cache = cache or PageCache()
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
+
+
+async def fetch_page(url, client, timeout=10):
+    """Download ``url`` through the current run's PageCache, or directly outside of one."""
+    cache = _current_cache.get()
+    if cache is not None:
+        return await cache.get(url, client, timeout)
+    response = await client.get(url, timeout=timeout, follow_redirects=True)
+    return Page(str(response.url), response.status_code, response.content)
@@ -0,0 +1,255 @@
+import asyncio
+import os
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from sales_agent.utils.logger import logger
+
+# User-Agent sent by the lead crawler and matched against robots.txt rules
+CRAWL_USER_AGENT = os.environ.get("CRAWL_USER_AGENT", "ClairoLeadFinder/1.0")
+# Requests in flight at once to one host
+CRAWL_PER_HOST_REQUESTS = int(os.environ.get("CRAWL_PER_HOST_REQUESTS", 1))
+# Seconds between requests to one host: the starting point, and the most backing off can reach
+CRAWL_MIN_DELAY = float(os.environ.get("CRAWL_MIN_DELAY", 0.5))
+CRAWL_MAX_DELAY = float(os.environ.get("CRAWL_MAX_DELAY", 30))
+# Set to 0 to ignore robots.txt
+CRAWL_RESPECT_ROBOTS = os.environ.get("CRAWL_RESPECT_ROBOTS", "1").lower() not in ("0", "false", "no")
+# Seconds a host's robots.txt is reused
+CRAWL_ROBOTS_TTL = float(os.environ.get("CRAWL_ROBOTS_TTL", 24 * 3600))
+# Seconds a site whose robots.txt could not be fetched (5xx, 429 or no answer) stays disallowed before it is tried again
+CRAWL_ROBOTS_RETRY_TTL = float(os.environ.get("CRAWL_ROBOTS_RETRY_TTL", 60))
+# Seconds a failed DNS lookup is remembered, so dead domains fail fast
+CRAWL_DNS_NEGATIVE_TTL = float(os.environ.get("CRAWL_DNS_NEGATIVE_TTL", 60))
+# Times a 429/503 response is retried (after the host's backed-off delay)
+CRAWL_THROTTLE_RETRIES = int(os.environ.get("CRAWL_THROTTLE_RETRIES", 2))
+
+# A slow host gets at least this many times its (smoothed) response time between requests
+_LATENCY_FACTOR = 1.0
+# Weight of the newest response time in the smoothed latency
+_LATENCY_SMOOTHING = 0.3
+# Responses that mean "slow down"
+_THROTTLE_STATUSES = (429, 503)
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# Redirects followed for a page (httpx's own default) and for a robots.txt (RFC 9309 asks for at least 5)
+_MAX_REDIRECTS = 20
+_MAX_ROBOTS_REDIRECTS = 5
+
+# Process-wide, so every run shares them: origin -> (expires_at, RobotFileParser)
+_robots_cache = {}
+# Negative DNS cache, host -> time its lookup failed (httpx resolves hosts itself when connecting)
+_dns_failures = {}
+
+
+class RobotsDisallowed(httpx.RequestError):
+    """The site's robots.txt does not allow the crawler to fetch this URL."""
+
+
+class HostNotFound(httpx.RequestError):
+    """The URL's host does not resolve (answer cached for CRAWL_DNS_NEGATIVE_TTL)."""
+
+
+def _retry_after(response):
+    value = (response.headers.get('Retry-After') or '').strip()
+    if not value:
+        return 0.0
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _HostState:
+    """Request pacing for one host; the delay adapts to its latency and throttling."""
+
+    def __init__(self, per_host, min_delay, max_delay):
+        self.slots = asyncio.Semaphore(max(1, per_host))
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.robots_delay = 0.0
+        self.delay = min_delay
+        self.latency = None
+        self.next_at = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    def observe(self, latency, throttled=False, retry_after=0.0):
+        self.requests += 1
+        if latency is not None:
+            self.latency = latency if self.latency is None else (
+                _LATENCY_SMOOTHING * latency + (1 - _LATENCY_SMOOTHING) * self.latency
+            )
+        floor = max(self.min_delay, self.robots_delay, (self.latency or 0.0) * _LATENCY_FACTOR)
+        if throttled:
+            # Back off exponentially (or as long as the server asks), then recover gradually
+            self.throttled += 1
+            self.delay = max(self.delay * 2, floor, retry_after)
+        else:
+            self.delay = max(floor, self.delay * 0.8)
+        self.delay = min(self.delay, self.max_delay)
+
+
+class HostScheduler:
+    """Polite, per-host scheduling of the lead crawler's requests.
+
+    Each host gets its own queue: at most ``per_host`` requests in flight and
+    a delay between requests that starts at ``min_delay``, follows the host's
+    smoothed response time, honours robots.txt Crawl-delay / Request-rate, and
+    doubles on 429/503 responses and timeouts (or waits for Retry-After)
+    before easing back; throttled requests are retried after that delay. URLs robots.txt disallows raise RobotsDisallowed.
+    A robots.txt that cannot be fetched (server error or no answer) disallows
+    the whole site until it is tried again CRAWL_ROBOTS_RETRY_TTL later.
+    Each host is looked up once per run before its first request; names that
+    do not resolve raise HostNotFound straight away, for every run, until
+    CRAWL_DNS_NEGATIVE_TTL has passed, instead of timing out on every page.
+    Redirects are followed here, one hop at a time, so a redirect to another
+    host goes through that host's DNS check, robots.txt and queue too.
+
+    The queues are per instance (one per run and event loop); robots.txt
+    files and DNS failures are cached process-wide.
+    """
+
+    def __init__(self, user_agent=CRAWL_USER_AGENT, per_host=CRAWL_PER_HOST_REQUESTS,
+                 min_delay=CRAWL_MIN_DELAY, max_delay=CRAWL_MAX_DELAY, respect_robots=CRAWL_RESPECT_ROBOTS):
+        self.user_agent = user_agent
+        self.per_host = per_host
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.respect_robots = respect_robots
+        self.hosts = {}
+        self._robots_tasks = {}
+        self._dns_tasks = {}
+        self.stats = {"requests": 0, "throttled": 0, "disallowed": 0, "dns_failures": 0, "waited": 0.0}
+
+    def _host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = _HostState(self.per_host, self.min_delay, self.max_delay)
+        return state
+
+    async def _resolves(self, host, port):
+        """Whether ``host`` resolves: looked up once per run, failures remembered process-wide."""
+        failed_at = _dns_failures.get(host)
+        if failed_at is not None and time.time() - failed_at < CRAWL_DNS_NEGATIVE_TTL:
+            return False
+        task = self._dns_tasks.get(host)
+        if task is None or (task.done() and not task.cancelled() and not task.result()):
+            task = self._dns_tasks[host] = asyncio.ensure_future(self._lookup(host, port))
+        return await asyncio.shield(task)
+
+    async def _lookup(self, host, port):
+        try:
+            await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            _dns_failures[host] = time.time()
+            return False
+        _dns_failures.pop(host, None)
+        return True
+
+    async def _robots(self, origin, host, client):
+        cached = _robots_cache.get(origin)
+        if cached is not None and time.time() < cached[0]:
+            parser = cached[1]
+        else:
+            task = self._robots_tasks.get(origin)
+            if task is None or task.done():
+                task = self._robots_tasks[origin] = asyncio.ensure_future(self._fetch_robots(origin, client))
+            parser = await asyncio.shield(task)
+        # Crawl-delay / Request-rate, capped like any other delay so one host cannot stall a run
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            delay = max(float(delay or 0), rate.seconds / rate.requests)
+        self._host(host).robots_delay = min(float(delay or 0), self.max_delay)
+        return parser
+
+    async def _fetch_robots(self, origin, client):
+        url = f"{origin}/robots.txt"
+        parser = RobotFileParser(url)
+        ttl = CRAWL_ROBOTS_TTL
+        try:
+            response = await self._get(client, url, True, _MAX_ROBOTS_REDIRECTS, False, timeout=10)
+        except httpx.RequestError as e:
+            logger.debug(f"Could not fetch {url}: {e}")
+            response = None
+        if response is None or response.status_code >= 500 or response.status_code == 429:
+            # Unreachable robots.txt: assume the whole site is off limits (RFC 9309), but only for a while
+            parser.disallow_all = True
+            ttl = CRAWL_ROBOTS_RETRY_TTL
+        elif response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.content.decode('utf-8', errors='replace').splitlines())
+        _robots_cache[origin] = (time.time() + ttl, parser)
+        return parser
+
+    async def _request(self, host, client, url, headers=None, **kwargs):
+        state = self._host(host)
+        loop = asyncio.get_running_loop()
+        async with state.slots:
+            wait = state.next_at - loop.time()
+            if wait > 0:
+                self.stats["waited"] += wait
+                await asyncio.sleep(wait)
+            self.stats["requests"] += 1
+            started = loop.time()
+            try:
+                response = await client.get(url, headers={'User-Agent': self.user_agent, **(headers or {})}, **kwargs)
+            except httpx.TimeoutException:
+                self.stats["throttled"] += 1
+                state.observe(None, throttled=True)
+                raise
+            finally:
+                # The next request to this host starts ``delay`` after this one ends
+                state.next_at = loop.time() + state.delay
+            throttled = response.status_code in _THROTTLE_STATUSES
+            if throttled:
+                self.stats["throttled"] += 1
+            state.observe(loop.time() - started, throttled, _retry_after(response) if throttled else 0.0)
+            state.next_at = loop.time() + state.delay
+        return response
+
+    async def _hop(self, client, url, check_robots, **kwargs):
+        """One request without following redirects, after the host's DNS and robots.txt checks."""
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        if not host:
+            return await client.get(url, **kwargs)
+        if not await self._resolves(host, parts.port or (443 if parts.scheme == 'https' else 80)):
+            self.stats["dns_failures"] += 1
+            raise HostNotFound(f"{host} does not resolve")
+        if check_robots:
+            origin = f"{parts.scheme}://{parts.netloc}"
+            robots = await self._robots(origin, host, client)
+            if not robots.can_fetch(self.user_agent, url):
+                self.stats["disallowed"] += 1
+                raise RobotsDisallowed(f"robots.txt of {host} disallows {url}")
+        for _ in range(CRAWL_THROTTLE_RETRIES):
+            response = await self._request(host, client, url, **kwargs)
+            if response.status_code not in _THROTTLE_STATUSES:
+                return response
+        return await self._request(host, client, url, **kwargs)
+
+    async def _get(self, client, url, follow_redirects, max_redirects, check_robots, **kwargs):
+        for _ in range(max_redirects + 1):
+            response = await self._hop(client, url, check_robots, follow_redirects=False, **kwargs)
+            location = response.headers.get('Location')
+            if not follow_redirects or response.status_code not in _REDIRECT_STATUSES or not location:
+                return response
+            url = urljoin(url, location)
+        raise httpx.TooManyRedirects(f"Exceeded {max_redirects} redirects, last to {url}")
+
+    async def fetch(self, client, url, follow_redirects=False, **kwargs):
+        """``client.get(url, **kwargs)``, queued behind the host's earlier requests and checked against robots.txt.
+
+        With ``follow_redirects`` every hop is checked and queued on its own host.
+        """
+        return await self._get(client, url, follow_redirects, _MAX_REDIRECTS, self.respect_robots, **kwargs)
@@ -3,7 +3,7 @@ import asyncio
 import time
 import json
 from sales_agent.leads.enrichment import enrich_lead_data
-from sales_agent.leads.google_sheets import GoogleSheet
+from sales_agent.leads.lead_store import LeadAppendQueue, get_lead_store
 import threading
 from sales_agent import config
 from sales_agent.utils.logger import logger
@@ -16,11 +16,14 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 import re
 from urllib.parse import urlparse
+from contextlib import asynccontextmanager
 import httpx
-from bs4 import BeautifulSoup
+from sales_agent.leads.page_cache import PageCache, fetch_page, page_cache_scope
+from sales_agent.leads.politeness import HostScheduler
+from sales_agent.leads.crawl_frontier import ACCEPTED, ENRICHED, QUEUED, REJECTED, CrawlFrontier
 
-# Initialize GoogleSheets
-sheets = GoogleSheet(sheet_id=config.GOOGLE_SHEET_ID, credentials_path=config.GOOGLE_SHEETS_CREDENTIALS_PATH)
+# Lead storage (the Leads sheet or the lead database, see LEAD_STORE_BACKEND)
+sheets = get_lead_store()
 
 # Initialize Instructor with OpenAI client
 from sales_agent.config import OPENAI_API_KEY
@@ -67,18 +70,7 @@ async def extract_social_links(url, client):
         'facebook': None
     }
     try:
-        response = await client.get(url, timeout=10, follow_redirects=True)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if 'linkedin.com/company' in href and not social_links['linkedin']:
-                social_links['linkedin'] = href
-            elif 'twitter.com/' in href and not social_links['twitter']:
-                social_links['twitter'] = href
-            elif 'facebook.com/' in href and not social_links['facebook']:
-                social_links['facebook'] = href
-                
+        social_links.update((await fetch_page(url, client)).info().socials)
     except httpx.RequestError as e:
         print(f"Could not fetch {url}: {e}")
         
@@ -89,18 +81,10 @@ async def find_contact_page(url, client):
     Tries to find the contact page URL from the website's homepage.
     """
     try:
-        response = await client.get(url, timeout=10, follow_redirects=True)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Look for links with text like 'contact'
-        for a in soup.find_all('a', href=True):
-            if 'contact' in a.text.lower():
-                contact_url = a['href']
-                if not contact_url.startswith('http'):
-                    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-                    contact_url = f"{base_url}{contact_url}"
-                return contact_url
-                
+        # Links with text like 'contact', already made absolute
+        contact_links = (await fetch_page(url, client)).info().contact_links
+        if contact_links:
+            return contact_links[0]
     except httpx.RequestError as e:
         print(f"Could not fetch {url} to find contact page: {e}")
         
@@ -112,26 +96,22 @@ async def extract_emails_from_url(url, client):
     """
     emails = []
     try:
-        response = await client.get(url, timeout=10, follow_redirects=True)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Regex to find email addresses
-        email_regex = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
-        
-        # Search for emails in the text
-        found_emails = re.findall(email_regex, soup.get_text())
-        emails.extend(found_emails)
-        
-        # Search for emails in mailto links
-        for a in soup.find_all('a', href=True):
-            if a['href'].startswith('mailto:'):
-                email = a['href'].replace('mailto:', '')
-                emails.append(email)
-                
+        # Emails in the page text and in mailto links
+        emails = (await fetch_page(url, client)).info().emails
     except httpx.RequestError as e:
         print(f"Could not fetch {url} to extract emails: {e}")
         
-    return list(set(emails)) # Return unique emails
+    return list(emails) # Unique, in page order
+
+async def extract_phones_from_url(url, client):
+    """
+    Extracts phone numbers (tel: links first, then numbers in the text) from a given URL.
+    """
+    try:
+        return (await fetch_page(url, client)).info().phones
+    except httpx.RequestError as e:
+        print(f"Could not fetch {url} to extract phone numbers: {e}")
+    return []
 
 
 
@@ -158,9 +138,10 @@ async def search_google(query, api_key, cse_id, **kwargs):
             logger.error(f"Request error during Google search: {e}")
     return None
 
-async def find_leads_from_google_maps(niche, location, desired_count=10, client=None):
+async def find_leads_from_google_maps(niche, location, desired_count=10, client=None, enrich=True):
     """
     Finds leads from Google Maps using Google Custom Search API.
+    With enrich=False the websites are not crawled (find_leads_realtime does that concurrently).
     """
     leads = []
     query = f"{niche} in {location}"
@@ -189,7 +170,7 @@ async def find_leads_from_google_maps(niche, location, desired_count=10, client=
             'source': 'Google Custom Search'
         }
 
-        if website:
+        if website and enrich:
             # Extract social links from the website
             social_links = await extract_social_links(website, client)
             lead.update(social_links)
@@ -219,9 +200,10 @@ async def find_leads_from_google_maps(niche, location, desired_count=10, client=
             
     return leads
 
-async def find_leads_from_linkedin(niche, location, desired_count=10, client=None):
+async def find_leads_from_linkedin(niche, location, desired_count=10, client=None, enrich=True):
     """
     Finds leads from LinkedIn using Google Custom Search API.
+    With enrich=False the websites are not crawled (find_leads_realtime does that concurrently).
     """
     leads = []
     query = f'site:linkedin.com/company "{niche}" "{location}"'
@@ -252,7 +234,8 @@ async def find_leads_from_linkedin(niche, location, desired_count=10, client=Non
             if website_match:
                 website = website_match.group(0)
                 lead['website'] = website
-                
+
+            if website_match and enrich:
                 social_links = await extract_social_links(website, client)
                 lead.update(social_links)
                 
@@ -279,24 +262,102 @@ async def find_leads_from_linkedin(niche, location, desired_count=10, client=Non
                 
     return leads
 
+# Lead websites crawled at the same time, overall and per host
+LEAD_ENRICH_CONCURRENCY = int(os.environ.get("LEAD_ENRICH_CONCURRENCY", 10))
+LEAD_ENRICH_PER_HOST = int(os.environ.get("LEAD_ENRICH_PER_HOST", 2))
+
+
+class CrawlLimits:
+    """Caps how many leads are enriched at once, overall and per website host."""
+
+    def __init__(self, total=LEAD_ENRICH_CONCURRENCY, per_host=LEAD_ENRICH_PER_HOST):
+        self.total = asyncio.Semaphore(max(1, total))
+        self.per_host = max(1, per_host)
+        self.hosts = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).netloc.lower() if url else ''
+        host_limit = self.hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        # Host first, so a lead waiting on a busy host does not hold a global slot
+        async with host_limit, self.total:
+            yield
+
+
+def _first_valid_email(emails):
+    for email in emails or []:
+        if is_valid_email(email):
+            return email
+    return None
+
+
+async def enrich_lead(lead_data, client, limits):
+    """Builds a Lead and fills in LinkedIn and email from its website, within ``limits``."""
+    lead = Lead(**lead_data)
+    if lead.website:
+        async with limits.slot(lead.website):
+            # Extract social links
+            social_links = await extract_social_links(lead.website, client)
+            if social_links.get('linkedin'):
+                lead.linkedin = social_links['linkedin']
+
+            if not lead.phone:
+                phones = await extract_phones_from_url(lead.website, client)
+                if phones:
+                    lead.phone = phones[0]
+
+            # Find and extract emails, from the contact page first, then the main website
+            if not lead.email:
+                contact_page_url = await find_contact_page(lead.website, client)
+                if contact_page_url:
+                    lead.email = _first_valid_email(await extract_emails_from_url(contact_page_url, client))
+                if not lead.email:
+                    lead.email = _first_valid_email(await extract_emails_from_url(lead.website, client))
+
+    # Verify email if found
+    if lead.email:
+        verification_result = await verify_email(lead.email)
+        if verification_result.get('is_valid') is False or verification_result.get('deliverability') == 'UNDELIVERABLE':
+            reason = verification_result.get('reason') or verification_result.get('deliverability')
+            logging.warning(f"Email '{lead.email}' for '{lead.company_name}' is not valid. Reason: {reason}")
+            lead.email = None # Discard invalid email
+    return lead
+
+
 async def find_leads_realtime(
     niche: str,
     location: str,
     channels: List[str],
     desired_count: int = 10,
-    on_lead: callable = None
+    on_lead: callable = None,
+    run_id: str = None,
+    frontier: CrawlFrontier = None
 ):
     """
     Finds leads in real-time from various sources based on the selected channels.
+
+    Candidates are enriched concurrently (see CrawlLimits) as soon as their
+    source returns, and handled in the order they finish: on_lead fires for
+    each lead as it is ready, and outstanding work is cancelled once
+    desired_count leads have been found.
+
+    With a run_id and a CrawlFrontier the run is durable: searches, candidates
+    and extracted pages are recorded as they complete, and calling this again
+    with the same run_id (e.g. after a restart, or with a larger desired_count)
+    picks up where it stopped. Leads accepted earlier are returned again but
+    not passed to on_lead or re-saved. The run stops early, leaving the rest
+    queued, once frontier.set_run_status(run_id, 'paused') is called.
     """
     
     logging.info(f"Starting real-time lead search for niche='{niche}', location='{location}', channels={channels}, desired_count={desired_count}")
 
     all_leads = []
+    durable = frontier is not None and run_id is not None
     
     # Get existing company names to avoid duplicates
     existing_companies = await sheets.get_all_company_names()
-    processed_companies = set(company.lower() for company in existing_companies)
+    existing = set(company.lower() for company in existing_companies)
+    processed_companies = set(existing)
 
     # Determine which functions to call based on channels
     source_functions = []
@@ -309,83 +370,120 @@ async def find_leads_realtime(
         logging.warning("No valid channels selected for lead generation.")
         return []
 
-    async with httpx.AsyncClient() as client:
-        tasks = [func(niche, location, desired_count=desired_count, client=client) for func in source_functions]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for result in results:
-            if isinstance(result, Exception):
-                logging.error(f"Error in source function: {result}")
-                continue
-
-            for lead_data in result:
+    resumed, resumed_queue = [], []
+    if durable:
+        await asyncio.to_thread(frontier.open_run, run_id, niche, location, desired_count)
+        processed_companies |= await asyncio.to_thread(frontier.seen_companies, run_id)
+        all_leads = [Lead(**lead) for _, lead in await asyncio.to_thread(frontier.candidates, run_id, ACCEPTED)]
+        # Enriched earlier but not needed then (the run is being extended), unless saved since by another run
+        resumed = [
+            Lead(**lead) for _, lead in await asyncio.to_thread(frontier.candidates, run_id, ENRICHED)
+            if lead['company_name'].lower() not in existing
+        ]
+        resumed_queue = [lead_data for lead_data, _ in await asyncio.to_thread(frontier.candidates, run_id, QUEUED)]
+        if all_leads or resumed or resumed_queue:
+            logging.info(f"Resuming run {run_id}: {len(all_leads)} leads kept, {len(resumed)} enriched and {len(resumed_queue)} queued candidates")
+
+    async def search(func):
+        if durable:
+            cached = await asyncio.to_thread(frontier.cached_search, func.__name__, niche, location, desired_count)
+            if cached is not None:
+                return cached
+        results = await func(niche, location, desired_count=desired_count, client=client, enrich=False)
+        if durable:
+            await asyncio.to_thread(frontier.save_search, func.__name__, niche, location, desired_count, results)
+        return results
+
+    def accept(lead):
+        all_leads.append(lead)
+
+        # If a callback is provided, call it with the new lead
+        if on_lead:
+            try:
+                on_lead(lead.dict())
+            except Exception as e:
+                logging.error(f"Error in on_lead callback: {e}")
+
+        # Store in recent leads
+        recent_leads_storage.add_lead(lead.dict())
+
+        # Also save to the lead store
+        new_leads.put(lead.dict())
+
+    paused = False
+    # New leads are written to the lead store in batches while the crawl carries on.
+    # Every page is downloaded and parsed once per run, however many extractors read it,
+    # and requests are paced per host and checked against robots.txt.
+    scheduler = HostScheduler()
+    async with httpx.AsyncClient() as client, LeadAppendQueue(sheets) as new_leads:
+        with page_cache_scope(PageCache(frontier=frontier if durable else None, owner=run_id, scheduler=scheduler)) as pages:
+            limits = CrawlLimits()
+            for lead in resumed:
                 if len(all_leads) >= desired_count:
                     break
-
-                # Avoid processing the same company again
-                if lead_data['company_name'].lower() in processed_companies:
-                    continue
-                
-                processed_companies.add(lead_data['company_name'].lower())
-
-                # Create a Lead object
-                lead = Lead(**lead_data)
-                
-                # Enrich the lead with additional details
-                if lead.website:
-                    # Extract social links
-                    social_links = await extract_social_links(lead.website, client)
-                    if social_links.get('linkedin'):
-                        lead.linkedin = social_links['linkedin']
-                    
-                    # Find and extract emails
-                    if not lead.email:
-                        contact_page_url = await find_contact_page(lead.website, client)
-                        if contact_page_url:
-                            emails = await extract_emails_from_url(contact_page_url, client)
-                            if emails:
-                                for email in emails:
-                                    if is_valid_email(email):
-                                        lead.email = email
-                                        break
-                        
-                        # If no email from contact page, try the main website
-                        if not lead.email:
-                            emails = await extract_emails_from_url(lead.website, client)
-                            if emails:
-                                for email in emails:
-                                    if is_valid_email(email):
-                                        lead.email = email
-                                        break
-                
-                # Verify email if found
-                if lead.email:
-                    verification_result = verify_email(lead.email)
-                    if not verification_result['is_valid']:
-                        logging.warning(f"Email '{lead.email}' for '{lead.company_name}' is not valid. Reason: {verification_result['reason']}")
-                        lead.email = None # Discard invalid email
-
-                # Add the lead to the list if it has at least one channel
-                if lead.email or lead.phone or lead.linkedin:
-                    all_leads.append(lead)
-                    
-                    # If a callback is provided, call it with the new lead
-                    if on_lead:
-                        try:
-                            on_lead(lead.dict())
-                        except Exception as e:
-                            logging.error(f"Error in on_lead callback: {e}")
-
-                    # Store in recent leads
-                    recent_leads_storage.add_lead(lead.dict())
-                    
-                    # Also save to Google Sheets
-                    try:
-                        await sheets.add_lead(lead.dict())
-                    except Exception as e:
-                        logging.error(f"Failed to add lead to Google Sheets: {e}")
-
-    logging.info(f"Found {len(all_leads)} leads in total.")
+                await asyncio.to_thread(frontier.set_candidate, run_id, lead.company_name, ACCEPTED)
+                accept(lead)
+            sources = set()
+            pending = set()
+            if len(all_leads) < desired_count:
+                sources = {asyncio.create_task(search(func)) for func in source_functions}
+                pending = set(sources)
+                if durable:
+                    pending |= {asyncio.create_task(enrich_lead(lead_data, client, limits)) for lead_data in resumed_queue}
+            try:
+                while pending and len(all_leads) < desired_count:
+                    done, pending = await asyncio.wait(pending, timeout=1.0 if durable else None, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task in sources:
+                            if task.exception() is not None:
+                                logging.error(f"Error in source function: {task.exception()}")
+                                continue
+                            candidates = []
+                            for lead_data in task.result():
+                                # Avoid processing the same company again
+                                if lead_data['company_name'].lower() in processed_companies:
+                                    continue
+                                processed_companies.add(lead_data['company_name'].lower())
+                                candidates.append(lead_data)
+                            if durable:
+                                candidates = await asyncio.to_thread(frontier.add_candidates, run_id, candidates)
+                            for lead_data in candidates:
+                                pending.add(asyncio.create_task(enrich_lead(lead_data, client, limits)))
+                            continue
+
+                        if task.exception() is not None:
+                            logging.error(f"Error enriching lead: {task.exception()}")
+                            continue
+                        lead = task.result()
+                        # Add the lead to the list if it has at least one channel
+                        if not (lead.email or lead.phone or lead.linkedin):
+                            if durable:
+                                await asyncio.to_thread(frontier.set_candidate, run_id, lead.company_name, REJECTED, lead.dict())
+                            continue
+                        if durable and not paused:
+                            paused = await asyncio.to_thread(frontier.run_status, run_id) == 'paused'
+                        if paused or len(all_leads) >= desired_count:
+                            # Kept for when the run is resumed or extended
+                            if durable:
+                                await asyncio.to_thread(frontier.set_candidate, run_id, lead.company_name, ENRICHED, lead.dict())
+                            continue
+                        if durable:
+                            await asyncio.to_thread(frontier.set_candidate, run_id, lead.company_name, ACCEPTED, lead.dict())
+                        accept(lead)
+                    if durable and not paused:
+                        paused = await asyncio.to_thread(frontier.run_status, run_id) == 'paused'
+                    if paused:
+                        break
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                pages.cancel_pending()
+                logging.info(f"Page cache: {pages.stats}; host scheduler: {scheduler.stats}")
+
+    if durable and not paused:
+        await asyncio.to_thread(frontier.set_run_status, run_id, 'completed')
+    logging.info(f"Found {len(all_leads)} leads in total{' (paused)' if paused else ''}.")
     
     return [lead.dict() for lead in all_leads]
 
@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from sales_agent.utils.logger import logger
+
+try:
+    import requests
+    _TRANSIENT_ERRORS = (ConnectionError, TimeoutError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    # Failures that happen before the request reaches Google, so even a non-idempotent call is safe to resend
+    _NOT_SENT_ERRORS = (ConnectionRefusedError, requests.exceptions.ConnectTimeout)
+except ImportError:
+    _TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+    _NOT_SENT_ERRORS = (ConnectionRefusedError,)
+
+# Sheets API requests allowed per minute (the default per-user quota is 60 reads and 60 writes)
+SHEETS_QUOTA_PER_MINUTE = float(os.environ.get("SHEETS_QUOTA_PER_MINUTE", 60))
+# Requests that may be sent back-to-back before the per-minute rate applies
+SHEETS_QUOTA_BURST = int(os.environ.get("SHEETS_QUOTA_BURST", 10))
+SHEETS_MAX_RETRIES = int(os.environ.get("SHEETS_MAX_RETRIES", 5))
+
+INTERACTIVE = 0
+BACKGROUND = 1
+_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuses that mean the request was rejected without being executed
+_REJECTED_STATUSES = {429}
+
+_priority = contextvars.ContextVar("sheets_priority", default=BACKGROUND)
+
+
+@contextmanager
+def interactive_sheets_calls():
+    """Run the Sheets calls made inside this block (and its threads) in the interactive lane.
+
+    Use it around Discord commands and API requests a person is waiting on, so
+    they jump ahead of batch pipeline traffic when the quota is tight.
+    """
+    token = _priority.set(INTERACTIVE)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Thread-safe token bucket where waiters are served by priority, then arrival."""
+
+    def __init__(self, rate_per_minute, capacity):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self, ticket):
+        """Take a token for ``ticket`` if it is its turn; otherwise return how long to wait."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+            return False, self.paused_until - now
+        if self._waiting[0] != ticket:
+            return False, None
+        if self.tokens < 1:
+            return False, (1 - self.tokens) / self.rate
+        heapq.heappop(self._waiting)
+        self.tokens -= 1
+        self._cond.notify_all()
+        return True, 0
+
+    def _leave(self, ticket):
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+
+    def acquire(self, priority=BACKGROUND):
+        """Block until a token is available for this caller; returns the seconds waited."""
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    taken, wait = self._take(ticket)
+                    if taken:
+                        return time.monotonic() - started
+                    self._cond.wait(wait)
+            except BaseException:
+                self._leave(ticket)
+                raise
+
+    async def acquire_async(self, priority=BACKGROUND):
+        """Like ``acquire()``, but waits on the event loop instead of holding a thread."""
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._cond:
+                    taken, wait = self._take(ticket)
+                if taken:
+                    return time.monotonic() - started
+                # Not our turn yet: check back soon, since whoever is ahead may finish any moment
+                await asyncio.sleep(min(wait, 0.25) if wait is not None else 0.01)
+        except BaseException:
+            with self._cond:
+                self._leave(ticket)
+            raise
+
+    def pause(self, seconds):
+        """Stop handing out tokens for ``seconds`` (the server told us to back off)."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self._cond.notify_all()
+
+
+def _error_status(error):
+    """Return ``(status_code, retry_after_seconds)`` for a failed Sheets call."""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'code', None)
+    retry_after = None
+    headers = getattr(response, 'headers', None) or {}
+    if headers.get('Retry-After'):
+        try:
+            retry_after = float(headers['Retry-After'])
+        except ValueError:
+            pass
+    return status, retry_after
+
+
+class SheetsRequestScheduler:
+    """Quota-aware gate for every Google Sheets API call in the process.
+
+    Each call takes a token from a shared bucket sized to the project quota
+    (interactive callers first), and 429/5xx responses and dropped connections
+    are retried with exponential backoff and full jitter, honouring Retry-After.
+    Calls marked ``idempotent=False`` (appends) are only retried when the
+    request was rejected before it ran, so a row is never written twice.
+    A 429 also pauses the whole bucket so other callers back off together.
+    Latency, queueing and throttling are recorded per operation.
+    """
+
+    def __init__(self, rate_per_minute=SHEETS_QUOTA_PER_MINUTE, burst=SHEETS_QUOTA_BURST,
+                 max_retries=SHEETS_MAX_RETRIES, base_delay=1.0, max_delay=64.0):
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}
+
+    def _record(self, name, **changes):
+        with self._metrics_lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = {
+                    "calls": 0, "errors": 0, "retries": 0, "throttled": 0,
+                    "latency_total_ms": 0.0, "latency_max_ms": 0.0, "queue_wait_total_ms": 0.0,
+                    "recent_latency_ms": deque(maxlen=200),
+                }
+            for key, value in changes.items():
+                if key == "latency_ms":
+                    m["latency_total_ms"] += value
+                    m["latency_max_ms"] = max(m["latency_max_ms"], value)
+                    m["recent_latency_ms"].append(value)
+                else:
+                    m[key] += value
+
+    def _retry_delay(self, name, error, attempt, waited, started, idempotent=True):
+        """Record a failed attempt; return the delay before retrying, or None to give up."""
+        status, retry_after = _error_status(error)
+        if idempotent:
+            transient = status in _RETRYABLE_STATUSES or isinstance(error, _TRANSIENT_ERRORS)
+        else:
+            transient = status in _REJECTED_STATUSES or isinstance(error, _NOT_SENT_ERRORS)
+        if not transient or attempt == self.max_retries:
+            self._record(name, calls=1, errors=1, queue_wait_total_ms=waited * 1000,
+                         latency_ms=(time.perf_counter() - started) * 1000)
+            return None
+        delay = retry_after if retry_after is not None else \
+            random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if status == 429:
+            self.bucket.pause(delay)
+        self._record(name, retries=1, throttled=1 if status == 429 else 0, queue_wait_total_ms=waited * 1000)
+        logger.warning(f"Sheets {name} failed ({status or type(error).__name__}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def call(self, fn, *args, idempotent=True, **kwargs):
+        """Run a blocking Sheets call under the quota, retrying transient failures.
+
+        Pass ``idempotent=False`` for calls that must not run twice, such as appends.
+        """
+        name = getattr(fn, '__name__', repr(fn))
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            waited = self.bucket.acquire(priority)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(name, e, attempt, waited, started, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._record(name, calls=1, queue_wait_total_ms=waited * 1000,
+                         latency_ms=(time.perf_counter() - started) * 1000)
+            return result
+
+    async def run(self, fn, *args, idempotent=True, **kwargs):
+        """Async form of ``call()``: waits for quota on the event loop, runs the call in a thread."""
+        name = getattr(fn, '__name__', repr(fn))
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            waited = await self.bucket.acquire_async(priority)
+            started = time.perf_counter()
+            try:
+                result = await asyncio.to_thread(fn, *args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(name, e, attempt, waited, started, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._record(name, calls=1, queue_wait_total_ms=waited * 1000,
+                         latency_ms=(time.perf_counter() - started) * 1000)
+            return result
+
+    def metrics(self):
+        """Per-operation call counts, retries, 429s and latency (avg/p50/p95/max, in ms)."""
+        with self._metrics_lock:
+            snapshot = {name: dict(m, recent_latency_ms=sorted(m["recent_latency_ms"])) for name, m in self._metrics.items()}
+        result = {}
+        for name, m in snapshot.items():
+            recent = m.pop("recent_latency_ms")
+            m["latency_avg_ms"] = round(m["latency_total_ms"] / m["calls"], 1) if m["calls"] else None
+            m["latency_p50_ms"] = round(recent[len(recent) // 2], 1) if recent else None
+            m["latency_p95_ms"] = round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 1) if recent else None
+            result[name] = m
+        return {
+            "operations": result,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "waiting": len(self.bucket._waiting),
+            "rate_per_minute": self.bucket.rate * 60,
+        }
+
+
+sheets_scheduler = SheetsRequestScheduler()
@@ -14,7 +14,7 @@ import sys
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sales_agent.leads.google_sheets import GoogleSheet
+from sales_agent.leads.lead_store import get_lead_store
 from sales_agent.leads.enrichment import enrich_lead_data
 from sales_agent.outreach.gpt_script_generation import generate_outreach_script
 from sales_agent.outreach.gmail_smtp import send_email
@@ -23,7 +23,7 @@ from sales_agent.calls.call_booking import send_booking_link
 from sales_agent.deal_crm_update import update_crm_status
 from sales_agent.utils.logger import setup_logging
 from sales_agent.utils.error_logger import log_error_and_alert
-from sales_agent.config import GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH, CALENDLY_TIDYCAL_LINK
+from sales_agent.config import CALENDLY_TIDYCAL_LINK
 from sales_agent.shared_state import save_state
 
 logger = setup_logging()
@@ -97,7 +97,7 @@ async def process_single_lead(google_sheet, lead):
 
 async def run_sales_agent(num_leads: int = None, target_audience: str = None):
     logger.info("Sales agent started...")
-    google_sheet = GoogleSheet(GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH)
+    google_sheet = get_lead_store()
 
     # Initialize metrics for daily report
     from sales_agent.shared_state import sales_agent_status
@@ -121,7 +121,9 @@ async def run_sales_agent(num_leads: int = None, target_audience: str = None):
     else:
         logger.info("No leads found or scored yet.")
 
-    leads_data = await google_sheet.read_leads()
+    # One full read; later stages only fetch the leads that changed since this cursor
+    all_leads, change_cursor = await google_sheet.changes_since(None)
+    leads_data = [lead for lead in all_leads if lead.get('Status', 'New') == 'New']
     sales_agent_status["new_leads_added"] = len(leads_data)
     sales_agent_status["last_update"] = f"Found {sales_agent_status['new_leads_added']} businesses in the pipeline niche."
     logger.info(f"✅ Found {sales_agent_status['new_leads_added']} businesses in the pipeline niche. Lead list updated in the tracker.")
@@ -148,9 +150,10 @@ async def run_sales_agent(num_leads: int = None, target_audience: str = None):
                 sales_agent_status["outreach_sent_count"] += 1
                 sales_agent_status["last_update"] = f"Sent outreach to {sales_agent_status['outreach_sent_count']} leads."
         # Update the Google Sheet after processing each lead, regardless of success or failure
-        await google_sheet.update_lead_data(lead['Lead Name'], lead)
+        await google_sheet.update_lead_data(lead['Lead Name'], {k: v for k, v in lead.items() if k != 'Lead Score'}) # Scores only change through update_lead_score deltas
         logger.info(f"--- Finished processing for Lead {i+1}/{len(leads_for_outreach)}: {lead['Lead Name']} ---")
         logger.info(f"Details for {lead['Lead Name']} can be found in the logs (sales_agent/utils/logger.py) and Google Sheet (sales_agent/leads/google_sheets.py).")
+    await google_sheet.flush() # Write the whole outreach stage in one batch
     logger.info(f"📤 Sent outreach emails to {sales_agent_status['outreach_sent_count']} of {len(leads_for_outreach)} leads.")
     logger.info("Outreach messages logged in the tracker.")
 
@@ -160,7 +163,16 @@ async def run_sales_agent(num_leads: int = None, target_audience: str = None):
     logger.info("Performing end-of-day follow-ups and logging outcomes...")
     # This part would involve checking all leads for replies and sending follow-ups
     # For now, we'll re-process all leads to ensure status updates are logged
-    all_leads_after_outreach = await google_sheet.read_leads() # Re-read to get latest status
+    # Apply the leads changed since the morning read (our outreach updates, new leads) instead of re-reading the sheet
+    changed_leads, change_cursor = await google_sheet.changes_since(change_cursor)
+    new_leads_by_name = {lead['Lead Name']: lead for lead in leads_data}
+    for lead in changed_leads:
+        if lead.get('Status', 'New') == 'New':
+            new_leads_by_name[lead['Lead Name']] = lead
+        else:
+            new_leads_by_name.pop(lead['Lead Name'], None)
+    all_leads_after_outreach = list(new_leads_by_name.values())
+    logger.info(f"{len(changed_leads)} leads changed since the morning read.")
     positive_replies = 0
     no_responses = 0
     bounced_emails = 0
@@ -191,7 +203,7 @@ async def run_sales_agent(num_leads: int = None, target_audience: str = None):
                 sales_agent_status["calls_booked_count"] += 1
                 sales_agent_status["booked_calls_list"].append(f"{lead.get('Lead Name')}, {lead.get('Company')}")
 
-        await google_sheet.update_lead_data(lead['Lead Name'], lead)
+        await google_sheet.update_lead_data(lead['Lead Name'], {k: v for k, v in lead.items() if k != 'Lead Score'}) # Scores only change through update_lead_score deltas
         logger.info(f"--- Finished follow-up processing for Lead {i+1}/{len(all_leads_after_outreach)}: {lead['Lead Name']} ---")
         logger.info(f"Details for {lead['Lead Name']} can be found in the logs (sales_agent/utils/logger.py) and Google Sheet (sales_agent/leads/google_sheets.py).")
 
@@ -199,6 +211,7 @@ async def run_sales_agent(num_leads: int = None, target_audience: str = None):
             sales_agent_status["deals_closed_count"] += 1
             sales_agent_status["total_pipeline_value"] += 1200 # Assuming a deal value of $1200 for now
             sales_agent_status["last_update"] = f"Closed deal with {lead['Lead Name']}."
+    await google_sheet.flush() # Write the whole follow-up stage in one batch
 
     logger.info(f"🔄 Followed up with {sales_agent_status['follow_ups_scheduled_count']} unresponsive leads.")
     logger.info(f"{sales_agent_status['replies_received_count']} positive reply, {sales_agent_status['follow_ups_scheduled_count']} no response, {0} bounced emails.")
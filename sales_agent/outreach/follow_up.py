@@ -1,8 +1,7 @@
 import time
 from datetime import datetime, timedelta
 from sales_agent.utils.logger import logger
-from sales_agent.leads.google_sheets import GoogleSheet
-from sales_agent.config import GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH
+from sales_agent.leads.lead_store import get_lead_store
 from .gpt_script_generation import generate_outreach_script
 
 from ..outreach.twilio_sms import send_sms
@@ -10,7 +9,7 @@ from .gmail_smtp import send_email
 
 async def check_and_send_follow_up(lead):
     """Checks if a follow-up is needed for a lead and sends it if necessary."""
-    google_sheet = GoogleSheet(GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH)
+    google_sheet = get_lead_store()
 
     if lead.get('Status') in ['Outreach Sent (SMS)', 'Outreach Sent (Email)', 'Follow-up Sent (SMS)', 'Follow-up Sent (Email)']:
         outreach_date_str = lead.get('Outreach Sent Date')
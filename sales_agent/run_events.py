@@ -0,0 +1,49 @@
+import queue
+import threading
+
+
+class RunEventBus:
+    """In-process publish/subscribe for task-run changes.
+
+    Subscribers get a bounded queue per run. Publishing never blocks: a
+    subscriber that falls behind misses events, which is fine for the streaming
+    endpoints: log events carry their index, so a gap is noticed, and they
+    re-read the run from the store once a second anyway.
+    """
+
+    def __init__(self, max_queue_size=1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, run_id):
+        q = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(run_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, run_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(run_id)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[run_id]
+
+    def publish(self, run_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(run_id, ()))
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def subscriber_count(self, run_id=None):
+        with self._lock:
+            if run_id is not None:
+                return len(self._subscribers.get(run_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+
+run_events = RunEventBus()
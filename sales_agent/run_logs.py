@@ -0,0 +1,143 @@
+import gzip
+import json
+import os
+import logging
+from collections import deque
+from contextlib import nullcontext
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+
+class RunLogBuffer:
+    """Bounded in-memory log of a single task run.
+
+    The newest ``max_size`` entries stay in a deque. Once ``spill_batch`` more
+    have accumulated, the oldest ones are appended to a per-run gzip file as one
+    compressed block, so memory stays bounded while the full history remains
+    readable through ``read()``.
+
+    Entries are kept in journal order so their indexes agree across processes:
+    entries written by this process that have not been flushed yet ("unsettled")
+    stay at the end, entries from other processes are inserted ahead of them,
+    and only settled entries are ever evicted.
+    """
+
+    def __init__(self, spill_path, max_size=200, spill_batch=100, entries=(), total=None, spill_lock=None):
+        self.spill_path = spill_path
+        # Records how many entries the spill file holds, so entries that another
+        # process (or this one, before a restart) already spilled are skipped
+        self.index_path = spill_path + '.idx'
+        self.max_size = max_size
+        self.spill_batch = spill_batch
+        self.entries = deque(entries)
+        self.total = total if total is not None else len(self.entries)
+        self.unsettled = 0
+        self.spill_lock = spill_lock or nullcontext()
+
+    @property
+    def first_index(self):
+        """Index of the oldest entry still held in memory."""
+        return self.total - len(self.entries)
+
+    def append(self, entry, own=True):
+        """Add an entry, evicting old ones once the buffer overflows.
+
+        ``own`` entries were written by this process and count as unsettled until
+        ``settle()``; entries replayed from other processes precede them.
+        """
+        if own:
+            self.entries.append(entry)
+            self.unsettled += 1
+        else:
+            self.entries.insert(len(self.entries) - self.unsettled, entry)
+        self.total += 1
+        self.trim()
+
+    def settle(self):
+        """Mark this process's entries as written to the journal."""
+        self.unsettled = 0
+        self.trim()
+
+    def trim(self):
+        if len(self.entries) < self.max_size + self.spill_batch:
+            return
+        count = min(len(self.entries) - self.max_size, len(self.entries) - self.unsettled)
+        if count <= 0:
+            return
+        start = self.first_index
+        self._spill(start, [self.entries.popleft() for _ in range(count)])
+
+    def _spilled_count(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError):
+            # Rebuild from the spill file itself
+            count = 0
+            for index, _ in self._iter_spilled():
+                count = index + 1
+            return count
+
+    def _spill(self, start, evicted):
+        with self.spill_lock:
+            skip = max(self._spilled_count() - start, 0)
+            lines = [
+                json.dumps(dict(entry, index=start + i), separators=(',', ':'), default=str)
+                for i, entry in enumerate(evicted) if i >= skip
+            ]
+            if not lines:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+                # Each append becomes its own gzip member; gzip readers concatenate them
+                with gzip.open(self.spill_path, 'at', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                with open(self.index_path, 'w', encoding='utf-8') as f:
+                    f.write(str(start + len(evicted)))
+            except OSError as e:
+                logger.error(f"Failed to spill logs to {self.spill_path}: {e}")
+
+    def _iter_spilled(self):
+        if not os.path.exists(self.spill_path):
+            return
+        try:
+            with gzip.open(self.spill_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A block cut short by a crash; everything before it is intact
+                        return
+                    yield entry.pop('index'), entry
+        except (OSError, EOFError) as e:
+            logger.warning(f"Stopped reading truncated log spill {self.spill_path}: {e}")
+
+    def tail(self, count):
+        """Return the newest ``count`` entries without copying the whole buffer."""
+        return list(islice(reversed(self.entries), count))[::-1]
+
+    def read(self, since=0, limit=None):
+        """Yield entries from index ``since`` onwards, older ones from the spill file."""
+        remaining = limit
+        first = self.first_index
+        if since < first:
+            for index, entry in self._iter_spilled():
+                if index < since:
+                    continue
+                if index >= first or remaining == 0:
+                    break
+                yield entry
+                since = index + 1
+                if remaining is not None:
+                    remaining -= 1
+        start = max(since - first, 0)
+        stop = None if remaining is None else start + remaining
+        yield from islice(self.entries, start, stop)
+
+    def delete_spill(self):
+        for path in (self.spill_path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -1,18 +1,17 @@
-import asyncio
+import copy
 import uuid
-import json
 import os
 import logging
+import threading
+import time
+import atexit
 from collections import deque
 from datetime import datetime
 
-# Dictionary to store asyncio.Event objects for approvals
-# Key format: (lead_name, action_type)
-approval_events = {}
-
-# Dictionary to store task runs with unique IDs
-# Key: run_id (UUID), Value: dict with run details
-task_runs = {}
+from sales_agent.state_journal import JournalTaskRunStore
+from sales_agent.state_sqlite import SqliteTaskRunStore
+from sales_agent.run_events import run_events
+from sales_agent.approvals import ApprovalBroker
 
 sales_agent_status = {
     "last_update": "",
@@ -39,81 +38,213 @@ class RecentLeadsStorage:
 recent_leads_storage = RecentLeadsStorage()
 
 
-async def get_approval_event(lead_name: str, action_type: str):
-    key = (lead_name, action_type)
-    if key not in approval_events:
-        approval_events[key] = asyncio.Event()
-    return approval_events[key]
+STATUS_FILE = os.environ.get("STATE_STATUS_FILE") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'status.json')
+JOURNAL_FILE = os.path.splitext(STATUS_FILE)[0] + '.journal'
+# Number of journal records after which the journal is folded into a fresh snapshot
+STATE_COMPACT_EVERY = int(os.environ.get("STATE_COMPACT_EVERY", 500))
+# "journal" (status.json + status.journal) or "sqlite"
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "journal").lower()
+STATE_DB_FILE = os.environ.get("STATE_DB_FILE") or os.path.splitext(STATUS_FILE)[0] + '.db'
+# Log lines kept in memory per run; older ones are spilled to RUN_LOG_DIR
+RUN_LOG_RING_SIZE = int(os.environ.get("RUN_LOG_RING_SIZE", 200))
+RUN_LOG_DIR = os.path.join(os.path.dirname(STATUS_FILE), 'run_logs')
+# Writes are coalesced and flushed at most this often; 0 writes through on every mutation
+STATE_FLUSH_INTERVAL_MS = int(os.environ.get("STATE_FLUSH_INTERVAL_MS", 200))
+
+# Approvals live in their own SQLite file so any process can grant or await them
+APPROVALS_DB_FILE = os.environ.get("STATE_APPROVALS_FILE") or os.path.splitext(STATUS_FILE)[0] + '.approvals.db'
+# Seconds an approval request (or an approval nobody asked for yet) is kept
+APPROVAL_TTL_SECONDS = int(os.environ.get("APPROVAL_TTL_SECONDS", 86400))
+
+if STATE_BACKEND == 'sqlite':
+    _store = SqliteTaskRunStore(STATE_DB_FILE, log_tail_size=RUN_LOG_RING_SIZE)
+else:
+    _store = JournalTaskRunStore(STATUS_FILE, JOURNAL_FILE, compact_every=STATE_COMPACT_EVERY,
+                                 log_dir=RUN_LOG_DIR, log_ring_size=RUN_LOG_RING_SIZE)
+
+approval_broker = ApprovalBroker(APPROVALS_DB_FILE, ttl=APPROVAL_TTL_SECONDS)
+
+async def wait_for_approval(lead_name: str, action_type: str, timeout: float = None, run_id: str = None):
+    """Wait until the action is approved from any process. Returns False on timeout."""
+    return await approval_broker.wait(lead_name, action_type, timeout=timeout, run_id=run_id)
+
+async def get_approval_event(lead_name: str, action_type: str, run_id: str = None):
+    """Return a PendingApproval (``await .wait()``, ``.is_set()``) for an action approved from any process."""
+    return approval_broker.watch(lead_name, action_type, run_id=run_id)
+
+def set_approval_event(lead_name: str, action_type: str, approved_by: str = None):
+    """Approve an action, waking whichever process is waiting for it."""
+    return approval_broker.approve(lead_name, action_type, approved_by=approved_by)
+
+def approve_run_actions(run_id: str, approved_by: str = None):
+    """Approve every action waiting on behalf of a task run; returns the (lead_name, action_type) pairs approved."""
+    return approval_broker.approve_run(run_id, approved_by=approved_by)
+
+def get_pending_approvals():
+    """Get the approval requests that are still waiting for a decision"""
+    return approval_broker.pending()
+
+class _StateFlusher(threading.Thread):
+    """Background thread that persists queued state mutations.
+
+    Mutations only mark the state dirty; the flusher waits for the flush
+    interval so a burst of updates is written in a single append, keeping disk
+    I/O off the Discord event loop and Flask request threads.
+    """
+
+    def __init__(self, interval_ms):
+        super().__init__(name="state-flusher", daemon=True)
+        self.interval = interval_ms / 1000
+        self.dirty = threading.Event()
+
+    def run(self):
+        while True:
+            self.dirty.wait()
+            time.sleep(self.interval)
+            self.dirty.clear()
+            try:
+                _store.flush()
+            except Exception as e:
+                logging.error(f"Failed to flush shared state: {e}")
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+def _mark_dirty():
+    global _flusher
+    if STATE_FLUSH_INTERVAL_MS <= 0:
+        _store.flush()
+        return
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = _StateFlusher(STATE_FLUSH_INTERVAL_MS)
+                _flusher.start()
+    _flusher.dirty.set()
+
+def flush_state():
+    """Synchronously write any mutations still waiting for the background flusher."""
+    _store.flush()
+
+atexit.register(flush_state)
+
+# sales_agent_status as this process last read or saved it; keys that differ are unsaved local changes
+_status_base = copy.deepcopy(sales_agent_status)
+
+def _local_status_changes():
+    return {key: value for key, value in sales_agent_status.items() if key not in _status_base or _status_base[key] != value}
+
+def _adopt_status(stored, changes):
+    """Update sales_agent_status in place to ``stored``, keeping this process's unsaved ``changes``."""
+    _status_base.update(copy.deepcopy(stored))
+    sales_agent_status.update(stored)
+    sales_agent_status.update(changes)
 
-def set_approval_event(lead_name: str, action_type: str):
-    key = (lead_name, action_type)
-    if key in approval_events:
-        approval_events[key].set()
-        # Optionally remove it after setting if it's a one-time approval
-        # del approval_events[key]
+def save_state():
+    """Persist the current state, compacting the journal when that backend is used.
 
-STATUS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'status.json')
+    Only the status keys this process changed are written, merged into the
+    status as stored, so another process's newer values are not overwritten.
+    """
+    changes = _local_status_changes()
+    _adopt_status(_store.save(changes=changes), {})
 
-def save_state():
-    """Save the current state to the status file."""
-    with open(STATUS_FILE, 'w') as f:
-        json.dump({
-            'task_runs': task_runs,
-            'sales_agent_status': sales_agent_status,
-        }, f, indent=2)
+def compact_state():
+    """Fold the journal into a fresh snapshot without writing this process's status."""
+    _store.save()
 
 def load_state():
-    """Load the state from the status file."""
-    global task_runs, sales_agent_status
-    if os.path.exists(STATUS_FILE):
-        with open(STATUS_FILE, 'r') as f:
-            state = json.load(f)
-            task_runs = state.get('task_runs', {})
-            sales_agent_status = state.get('sales_agent_status', sales_agent_status)
+    """Load the state from disk, dropping unsaved changes."""
+    _adopt_status(_store.load(), {})
+
+def refresh_state():
+    """Bring the in-memory state up to date with writes made by other processes."""
+    _adopt_status(_store.current_status(), _local_status_changes())
+
+def get_state():
+    """Get the full state as stored in the status file."""
+    refresh_state()
+    return {
+        'task_runs': {run['id']: run for run in _store.all(include_logs=True)},
+        'sales_agent_status': sales_agent_status,
+    }
 
 def create_task_run(command_name: str, user_id: str, parameters: dict = None):
     """Create a new task run and return its ID"""
     run_id = str(uuid.uuid4())
-    task_runs[run_id] = {
+    now = datetime.now().isoformat()
+    _store.create({
         "id": run_id,
         "command": command_name,
         "user_id": user_id,
         "parameters": parameters or {},
         "status": "pending",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
+        "created_at": now,
+        "updated_at": now,
         "results": {},
         "logs": [],
         "approval_required": False,
         "approved": False,
         "error": None
-    }
-    save_state()
+    })
+    _mark_dirty()
+    run_events.publish(run_id, {"type": "created"})
     return run_id
 
 def update_task_run(run_id: str, **updates):
     """Update a task run with new data"""
-    if run_id in task_runs:
-        task_runs[run_id].update(updates)
-        task_runs[run_id]["updated_at"] = datetime.now().isoformat()
-        save_state()
-
-def get_task_run(run_id: str):
-    """Get a task run by ID"""
-    load_state()
-    return task_runs.get(run_id)
+    updates["updated_at"] = datetime.now().isoformat()
+    if _store.update(run_id, updates):
+        _mark_dirty()
+        run_events.publish(run_id, {"type": "updated", "fields": updates})
+
+def delete_task_run(run_id: str):
+    """Remove a task run and its logs from the state"""
+    if _store.delete(run_id):
+        _mark_dirty()
+        run_events.publish(run_id, {"type": "deleted"})
+        return True
+    return False
+
+def get_task_run(run_id: str, include_logs: bool = True):
+    """Get a task run by ID, with its most recent logs and the total log_count"""
+    return _store.get(run_id, include_logs=include_logs)
 
 def get_all_task_runs():
     """Get all task runs"""
-    load_state()
-    return list(task_runs.values())
+    return _store.all()
+
+def list_task_runs(status: str = None, command: str = None, user_id: str = None,
+                   limit: int = None, offset: int = 0, include_logs: bool = False):
+    """Get a page of task runs, newest first, and the total number of matches.
+
+    Unless ``include_logs`` is set, runs are returned without their logs and with
+    a ``log_count`` instead, so listing stays cheap for long-running tasks.
+    """
+    return _store.query(status=status, command=command, user_id=user_id,
+                        limit=limit, offset=offset, include_logs=include_logs)
+
+def get_run_logs(run_id: str, since: int = 0, limit: int = None):
+    """Get the log entries of a run starting at index ``since`` (None if the run is unknown)"""
+    return _store.logs(run_id, since=since, limit=limit)
+
+def get_recent_logs(run_id: str, count: int = 50):
+    """Get the newest ``count`` log entries of a run (None if the run is unknown)"""
+    return _store.tail(run_id, count)
+
+def iter_run_logs(run_id: str, since: int = 0):
+    """Iterate over the full log history of a run, including lines spilled to disk"""
+    return _store.iter_logs(run_id, since=since)
 
 def add_log_to_run(run_id: str, message: str):
     """Add a log message to a task run"""
-    if run_id in task_runs:
-        task_runs[run_id]["logs"].append({
-            "timestamp": datetime.now().isoformat(),
-            "message": message
-        })
-        task_runs[run_id]["updated_at"] = datetime.now().isoformat()
-        save_state()
\ No newline at end of file
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "message": message
+    }
+    index = _store.append_log(run_id, entry)
+    if index is not None:
+        _mark_dirty()
+        run_events.publish(run_id, {"type": "log", "index": index, "entry": entry})
+
+load_state()
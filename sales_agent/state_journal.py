@@ -0,0 +1,459 @@
+import json
+import os
+import uuid
+import logging
+import threading
+
+from sales_agent.run_logs import RunLogBuffer
+from sales_agent.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class StateJournal:
+    """Append-only write-ahead journal for the shared task-run state.
+
+    Every mutation is appended to the journal file as one compact JSON line
+    tagged with a sequence number. The snapshot file (``status.json``) holds the
+    last compacted state together with the sequence number it includes, so
+    replaying the journal records newer than that on top of the snapshot
+    rebuilds the current state.
+
+    ``append()`` only queues a record; ``flush()`` writes everything queued in a
+    single append, so a burst of mutations costs one write.
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, compact_every=500):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + '.journal'
+        self.compact_every = compact_every
+        self.seq = 0
+        self.records_since_snapshot = 0
+        # What load() last saw on disk, so read_new() can tell whether another
+        # process has appended to the journal or replaced the snapshot since.
+        self.snapshot_sig = None
+        self.journal_ino = None
+        self.offset = 0
+        # Tags our own records so read_new() does not apply them a second time
+        self.writer_id = uuid.uuid4().hex
+        self.pending = []
+        self._pending_lock = threading.Lock()
+
+    def load(self):
+        """Read the snapshot and the journal records that are newer than it.
+
+        Returns a ``(snapshot, records)`` tuple. A torn final line left by a crash
+        mid-append is dropped and truncated away so later appends stay readable.
+        """
+        snapshot = {}
+        self.snapshot_sig = _file_signature(self.snapshot_path)
+        if self.snapshot_sig is not None:
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Failed to read state snapshot {self.snapshot_path}: {e}")
+                snapshot = {}
+        base_seq = snapshot.get('journal_seq', 0)
+
+        records = []
+        good_offset = 0
+        torn = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                for raw in f:
+                    if not raw.endswith(b'\n'):
+                        torn = True
+                        break
+                    try:
+                        record = json.loads(raw)
+                    except json.JSONDecodeError:
+                        torn = True
+                        break
+                    good_offset += len(raw)
+                    if record.get('seq', 0) > base_seq:
+                        records.append(record)
+        if torn:
+            logger.warning(f"Discarding torn record at offset {good_offset} of {self.journal_path}")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_offset)
+
+        journal_sig = _file_signature(self.journal_path)
+        self.journal_ino = journal_sig[0] if journal_sig else None
+        self.offset = good_offset
+        self.seq = max([base_seq] + [r.get('seq', 0) for r in records])
+        self.records_since_snapshot = len(records)
+        return snapshot, records
+
+    def read_new(self):
+        """Return the journal records appended since the last load or read.
+
+        Only the bytes past the last consumed offset are read, so an unchanged
+        journal costs two ``stat`` calls. Returns None when the snapshot has been
+        replaced or the journal rewritten, in which case the caller must do a
+        full ``load()``. An incomplete trailing line (another process mid-append)
+        is left for the next call.
+        """
+        if _file_signature(self.snapshot_path) != self.snapshot_sig:
+            return None
+        journal_sig = _file_signature(self.journal_path)
+        if journal_sig is None:
+            return None if self.journal_ino is not None else []
+        ino, _, size = journal_sig
+        if ino != self.journal_ino or size < self.offset:
+            return None
+        if size == self.offset:
+            return []
+
+        records = []
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self.offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    break
+                self.offset += len(raw)
+                if record.get('w') != self.writer_id:
+                    records.append(record)
+        if records:
+            self.seq = max([self.seq] + [r.get('seq', 0) for r in records])
+            self.records_since_snapshot += len(records)
+        return records
+
+    def append(self, record):
+        """Queue a mutation record for the next ``flush()``."""
+        record['w'] = self.writer_id
+        with self._pending_lock:
+            self.pending.append(record)
+
+    def flush(self):
+        """Write all queued records to the journal in one append.
+
+        Sequence numbers are assigned here rather than in ``append()`` so they
+        always follow whatever this process has read from the journal so far.
+        Returns True once enough records have accumulated that the caller should
+        compact the journal into a new snapshot.
+        """
+        with self._pending_lock:
+            records, self.pending = self.pending, []
+        if records:
+            chunks = []
+            for record in records:
+                self.seq += 1
+                record['seq'] = self.seq
+                chunks.append((json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8'))
+            data = b''.join(chunks)
+            with open(self.journal_path, 'ab') as f:
+                at_tail = f.tell() == self.offset
+                f.write(data)
+            if self.journal_ino is None:
+                self.journal_ino = _file_signature(self.journal_path)[0]
+            if at_tail:
+                # Nobody else wrote in between, so our own records count as consumed
+                self.offset += len(data)
+            self.records_since_snapshot += len(records)
+        return self.records_since_snapshot >= self.compact_every
+
+    def compact(self, state):
+        """Write ``state`` as the new snapshot and start an empty journal.
+
+        The snapshot is written to a temporary file and renamed into place, so a
+        crash leaves either the old or the new snapshot. Records already folded
+        into the snapshot are skipped on replay via ``journal_seq`` even if the
+        journal reset below never happens. ``state`` already reflects every
+        queued record, so the queue is dropped rather than written.
+        """
+        with self._pending_lock:
+            self.pending = []
+        state = dict(state, journal_seq=self.seq)
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Replace rather than truncate the journal so readers in other processes
+        # notice the new inode instead of reading from a stale offset.
+        tmp_path = self.journal_path + '.tmp'
+        with open(tmp_path, 'wb'):
+            pass
+        os.replace(tmp_path, self.journal_path)
+        self.snapshot_sig = _file_signature(self.snapshot_path)
+        self.journal_ino = _file_signature(self.journal_path)[0]
+        self.offset = 0
+        self.records_since_snapshot = 0
+
+
+class JournalTaskRunStore:
+    """Task-run store kept in memory and persisted through a StateJournal.
+
+    Run logs are held in bounded RunLogBuffers; entries evicted from memory are
+    spilled to ``<log_dir>/<run_id>.jsonl.gz``. The snapshot only carries each
+    run's in-memory tail plus its total ``log_count``.
+
+    All access is serialized by ``self.lock`` within the process. Across
+    processes, everything that writes to disk (journal flushes, compaction,
+    torn-record repair, log spills) happens under an exclusive lock on
+    ``<snapshot>.lock``, after first catching up on the other processes'
+    records, so concurrent writers never interleave or drop each other's work.
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, compact_every=500,
+                 log_dir=None, log_ring_size=200, log_spill_batch=100):
+        self.journal = StateJournal(snapshot_path, journal_path, compact_every=compact_every)
+        self.log_dir = log_dir or os.path.join(os.path.dirname(snapshot_path), 'run_logs')
+        self.log_ring_size = log_ring_size
+        self.log_spill_batch = log_spill_batch
+        self.runs = {}
+        self.log_buffers = {}
+        # Runs whose buffers hold entries that are still waiting in the journal queue
+        self._unsettled = set()
+        self.status = {}
+        self.lock = threading.RLock()
+        self.file_lock = FileLock(snapshot_path + '.lock')
+
+    def _new_buffer(self, run_id, entries=(), total=None):
+        buffer = RunLogBuffer(
+            os.path.join(self.log_dir, f"{run_id}.jsonl.gz"),
+            max_size=self.log_ring_size,
+            spill_batch=self.log_spill_batch,
+            entries=entries,
+            total=total,
+            spill_lock=self.file_lock,
+        )
+        self.log_buffers[run_id] = buffer
+        return buffer
+
+    def _view(self, run_id, include_logs=True):
+        """Copy of a run as handed to callers, with its recent logs attached."""
+        buffer = self.log_buffers[run_id]
+        run = dict(self.runs[run_id], log_count=buffer.total)
+        if include_logs:
+            run['logs'] = buffer.tail(self.log_ring_size)
+        return run
+
+    def _apply(self, record, own=False):
+        """Apply a single journal record to the in-memory state."""
+        op = record.get('op')
+        if op == 'create':
+            run = dict(record['run'])
+            entries = run.pop('logs', [])
+            self.runs[run['id']] = run
+            self._new_buffer(run['id'], entries).trim()
+        elif op == 'update':
+            run = self.runs.get(record['id'])
+            if run is not None:
+                run.update({k: v for k, v in record['fields'].items() if k != 'logs'})
+        elif op == 'delete':
+            self.runs.pop(record['id'], None)
+            buffer = self.log_buffers.pop(record['id'], None)
+            self._unsettled.discard(record['id'])
+            if own and buffer is not None:
+                with self.file_lock:
+                    buffer.delete_spill()
+        elif op == 'log':
+            run = self.runs.get(record['id'])
+            if run is not None:
+                self.log_buffers[record['id']].append(record['entry'], own=own)
+                if own:
+                    self._unsettled.add(record['id'])
+                run['updated_at'] = record['entry']['timestamp']
+
+    def _record(self, record):
+        """Apply a mutation in memory and append it to the journal."""
+        with self.lock:
+            self._apply(record, own=True)
+            self.journal.append(record)
+
+    def flush(self):
+        """Write queued journal records, compacting once enough have accumulated."""
+        with self.lock, self.file_lock:
+            if not self.journal.pending and self.journal.records_since_snapshot < self.journal.compact_every:
+                return
+            self._refresh()
+            compact = self.journal.flush()
+            self._settle()
+            if compact:
+                self.save()
+
+    def _settle(self):
+        for run_id in self._unsettled:
+            if run_id in self.log_buffers:
+                self.log_buffers[run_id].settle()
+        self._unsettled.clear()
+
+    def load(self):
+        """Load the snapshot and replay the journal on top of it."""
+        with self.lock, self.file_lock:
+            return self._load()
+
+    def _load(self):
+        snapshot, records = self.journal.load()
+        self.runs.clear()
+        self.log_buffers.clear()
+        self._unsettled.clear()
+        for run_id, run in snapshot.get('task_runs', {}).items():
+            run = dict(run)
+            entries = run.pop('logs', [])
+            total = run.pop('log_count', None)
+            self.runs[run_id] = run
+            # Snapshots written before logs were bounded may carry every line
+            self._new_buffer(run_id, entries, total).trim()
+        self.status = snapshot.get('sales_agent_status', {})
+        for record in records:
+            self._apply(record)
+        # Our own mutations that are not on disk yet would otherwise be lost
+        for record in list(self.journal.pending):
+            self._apply(record, own=True)
+        return self.status
+
+    def refresh(self):
+        """Bring the in-memory state up to date with writes made by other processes.
+
+        Cheap when nothing changed on disk: the journal tail is only read when its
+        size grew, and a full reload only happens after another process compacted.
+        """
+        with self.lock:
+            self._refresh()
+
+    def _refresh(self):
+        records = self.journal.read_new()
+        if records is None:
+            self.load()
+            return
+        for record in records:
+            self._apply(record)
+        if records and self.journal.pending:
+            # Our queued updates land after these records in the journal, so
+            # they must win over them in memory as well
+            for record in list(self.journal.pending):
+                if record.get('op') == 'update':
+                    self._apply(record)
+
+    def current_status(self):
+        """The sales agent status as last saved by any process."""
+        with self.lock:
+            self._refresh()
+            return dict(self.status)
+
+    def save(self, status=None, changes=None):
+        """Compact the current state into the snapshot and reset the journal.
+
+        ``status`` replaces the stored status; ``changes`` are merged into the
+        status as stored on disk, so keys other processes saved are kept.
+        Returns the status that was written.
+        """
+        with self.lock, self.file_lock:
+            # Fold in what other processes wrote, or the journal reset drops it
+            self._refresh()
+            if status is not None:
+                self.status = status
+            if changes:
+                self.status = dict(self.status, **changes)
+            self.journal.compact({
+                'task_runs': {
+                    run_id: dict(run, logs=list(self.log_buffers[run_id].entries), log_count=self.log_buffers[run_id].total)
+                    for run_id, run in self.runs.items()
+                },
+                'sales_agent_status': self.status,
+            })
+            self._settle()
+            return dict(self.status)
+
+    def create(self, run):
+        with self.lock:
+            self._refresh()
+            self._record({'op': 'create', 'run': run})
+
+    def update(self, run_id, fields):
+        with self.lock:
+            self._refresh()
+            if run_id not in self.runs:
+                return False
+            self._record({'op': 'update', 'id': run_id, 'fields': fields})
+            return True
+
+    def append_log(self, run_id, entry):
+        with self.lock:
+            self._refresh()
+            if run_id not in self.runs:
+                return None
+            self._record({'op': 'log', 'id': run_id, 'entry': entry})
+            return self.log_buffers[run_id].total - 1
+
+    def delete(self, run_id):
+        with self.lock:
+            self._refresh()
+            if run_id not in self.runs:
+                return False
+            self._record({'op': 'delete', 'id': run_id})
+            return True
+
+    def get(self, run_id, include_logs=True):
+        with self.lock:
+            self._refresh()
+            if run_id not in self.runs:
+                return None
+            return self._view(run_id, include_logs)
+
+    def all(self, include_logs=False):
+        with self.lock:
+            self._refresh()
+            return [self._view(run_id, include_logs) for run_id in self.runs]
+
+    def query(self, status=None, command=None, user_id=None, limit=None, offset=0, include_logs=False):
+        """Return ``(runs, total)`` for the matching runs, newest first."""
+        with self.lock:
+            self._refresh()
+            matches = [
+                run for run in self.runs.values()
+                if (status is None or run.get('status') == status)
+                and (command is None or run.get('command') == command)
+                and (user_id is None or run.get('user_id') == user_id)
+            ]
+            matches.sort(key=lambda run: run.get('created_at') or '', reverse=True)
+            total = len(matches)
+            page = matches[offset:offset + limit] if limit is not None else matches[offset:]
+            return [self._view(run['id'], include_logs) for run in page], total
+
+    def logs(self, run_id, since=0, limit=None):
+        """Return the log entries of a run starting at index ``since``, or None if unknown."""
+        with self.lock:
+            self._refresh()
+            if run_id not in self.log_buffers:
+                return None
+            return list(self.log_buffers[run_id].read(since, limit))
+
+    def iter_logs(self, run_id, since=0, page_size=500):
+        """Yield the full log history of a run from index ``since`` without loading it all.
+
+        Reads one page at a time so the store lock is not held while the caller
+        consumes entries.
+        """
+        while True:
+            page = self.logs(run_id, since, page_size)
+            if not page:
+                return
+            yield from page
+            if len(page) < page_size:
+                return
+            since += len(page)
+
+    def tail(self, run_id, count):
+        """Return the newest ``count`` log entries of a run, or None if unknown."""
+        with self.lock:
+            self._refresh()
+            if run_id not in self.log_buffers:
+                return None
+            return self.log_buffers[run_id].tail(count)
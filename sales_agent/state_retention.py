@@ -0,0 +1,250 @@
+import gzip
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+from sales_agent import shared_state
+from sales_agent.leads.crawl_frontier import get_crawl_frontier
+from sales_agent.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get("TASK_RUN_ARCHIVE_DIR") or os.path.join(os.path.dirname(shared_state.STATUS_FILE), 'task_run_archive')
+# Seconds between background retention passes
+RETENTION_INTERVAL = int(os.environ.get("TASK_RUN_RETENTION_INTERVAL", 3600))
+
+# Per-command limits for finished runs; "default" applies to commands not listed.
+# Override or extend with TASK_RUN_RETENTION_POLICY='{"find_leads": {"max_age_days": 3}}'.
+DEFAULT_RETENTION_POLICY = {
+    "default": {"max_age_days": 14, "max_count": 500},
+    "realtime_leads": {"max_age_days": 7, "max_count": 100},
+}
+# Runs in these states are never archived
+ACTIVE_STATUSES = {"pending", "running", "paused"}
+
+
+def load_retention_policy():
+    policy = {command: dict(limits) for command, limits in DEFAULT_RETENTION_POLICY.items()}
+    raw = os.environ.get("TASK_RUN_RETENTION_POLICY")
+    if raw:
+        try:
+            for command, limits in json.loads(raw).items():
+                policy.setdefault(command, {}).update(limits)
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Ignoring invalid TASK_RUN_RETENTION_POLICY: {e}")
+    return policy
+
+
+def select_runs_to_archive(runs, policy, now=None):
+    """Return the finished runs that exceed their command's age or count limit."""
+    now = now or datetime.now()
+    by_command = {}
+    for run in runs:
+        if run.get('status') in ACTIVE_STATUSES:
+            continue
+        by_command.setdefault(run.get('command'), []).append(run)
+
+    expired = []
+    for command, command_runs in by_command.items():
+        limits = dict(policy.get('default', {}), **policy.get(command, {}))
+        max_age_days = limits.get('max_age_days')
+        max_count = limits.get('max_count')
+        command_runs.sort(key=lambda run: run.get('created_at') or '', reverse=True)
+        for i, run in enumerate(command_runs):
+            too_many = max_count is not None and i >= max_count
+            too_old = False
+            if max_age_days is not None:
+                try:
+                    finished = datetime.fromisoformat(run.get('updated_at') or run.get('created_at'))
+                    too_old = now - finished > timedelta(days=max_age_days)
+                except (TypeError, ValueError):
+                    pass
+            if too_many or too_old:
+                expired.append(run)
+    return expired
+
+
+class TaskRunArchive:
+    """Compressed daily archive of finished task runs.
+
+    Runs are appended to ``task_runs-YYYY-MM-DD.jsonl.gz`` (by creation day),
+    with their full log history. ``index.jsonl`` maps each run to its day so a
+    single archived run can be found without decompressing every file.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.index_path = os.path.join(archive_dir, 'index.jsonl')
+        os.makedirs(archive_dir, exist_ok=True)
+        self.lock = FileLock(os.path.join(archive_dir, '.lock'))
+        self._index = {}
+        self._index_sig = None
+
+    def _day_path(self, day):
+        return os.path.join(self.archive_dir, f"task_runs-{day}.jsonl.gz")
+
+    def _load_index(self):
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return {}
+        sig = (st.st_mtime_ns, st.st_size)
+        if sig != self._index_sig:
+            index = {}
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        meta = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    index[meta['id']] = meta
+            self._index, self._index_sig = index, sig
+        return self._index
+
+    def add(self, run):
+        """Append a run (including its full ``logs``) and return the bytes written."""
+        day = (run.get('created_at') or datetime.now().isoformat())[:10]
+        line = json.dumps(run, separators=(',', ':'), default=str) + '\n'
+        path = self._day_path(day)
+        before = os.path.getsize(path) if os.path.exists(path) else 0
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            f.write(line)
+        meta = {
+            'id': run['id'],
+            'day': day,
+            'command': run.get('command'),
+            'user_id': run.get('user_id'),
+            'status': run.get('status'),
+            'created_at': run.get('created_at'),
+            'log_count': len(run.get('logs', [])),
+        }
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(meta) + '\n')
+        return os.path.getsize(path) - before
+
+    def get(self, run_id):
+        meta = self._load_index().get(run_id)
+        if meta is None:
+            return None
+        path = self._day_path(meta['day'])
+        if not os.path.exists(path):
+            return None
+        needle = f'"id":"{run_id}"'
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if needle in line:
+                    run = json.loads(line)
+                    if run.get('id') == run_id:
+                        return dict(run, archived=True)
+        return None
+
+    def list(self, day=None, command=None, status=None, limit=100, offset=0):
+        """Return ``(runs, total)`` of archived run summaries, newest first."""
+        matches = [
+            meta for meta in self._load_index().values()
+            if (day is None or meta.get('day') == day)
+            and (command is None or meta.get('command') == command)
+            and (status is None or meta.get('status') == status)
+        ]
+        matches.sort(key=lambda meta: meta.get('created_at') or '', reverse=True)
+        return matches[offset:offset + limit], len(matches)
+
+
+archive = TaskRunArchive(ARCHIVE_DIR)
+
+retention_metrics = {
+    "passes": 0,
+    "runs_archived": 0,
+    "bytes_reclaimed": 0,
+    "bytes_archived": 0,
+    "last_run_at": None,
+    "last_duration_ms": None,
+    "last_archived": 0,
+    "last_error": None,
+}
+_retention_lock = threading.Lock()
+
+
+def apply_retention(policy=None, now=None):
+    """Archive finished runs that exceed the retention policy and drop them from hot state.
+
+    Runs under an archive-wide file lock so the API and bot processes never
+    archive the same run twice. Returns the number of runs archived.
+    """
+    policy = policy or load_retention_policy()
+    started = time.perf_counter()
+    archived = 0
+    reclaimed = 0
+    written = 0
+    with _retention_lock, archive.lock:
+        shared_state.refresh_state()
+        runs, _ = shared_state.list_task_runs()
+        for candidate in select_runs_to_archive(runs, policy, now):
+            run = shared_state.get_task_run(candidate['id'], include_logs=False)
+            if run is None or run.get('status') in ACTIVE_STATUSES:
+                continue
+            run.pop('log_count', None)
+            run['logs'] = list(shared_state.iter_run_logs(run['id']))
+            hot_bytes = len(json.dumps(run, default=str))
+            written += archive.add(run)
+            if shared_state.delete_task_run(run['id']):
+                archived += 1
+                reclaimed += hot_bytes
+                if run.get('command') == 'realtime_leads':
+                    # An archived run can no longer be resumed, so its crawl frontier rows go too
+                    get_crawl_frontier().delete_run(run['id'])
+        if archived:
+            # Rewrite the snapshot now so the reclaimed space is actually freed. The
+            # status is left as stored: this process's copy may be older than the bot's.
+            shared_state.compact_state()
+        shared_state.flush_state()
+
+    retention_metrics["passes"] += 1
+    retention_metrics["runs_archived"] += archived
+    retention_metrics["bytes_reclaimed"] += reclaimed
+    retention_metrics["bytes_archived"] += written
+    retention_metrics["last_archived"] = archived
+    retention_metrics["last_run_at"] = datetime.now().isoformat()
+    retention_metrics["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    if archived:
+        logger.info(f"Retention archived {archived} task runs, reclaimed ~{reclaimed} bytes of hot state")
+    return archived
+
+
+def get_archived_task_run(run_id: str):
+    """Get an archived task run (with its full logs) by ID"""
+    return archive.get(run_id)
+
+
+def list_archived_task_runs(day: str = None, command: str = None, status: str = None, limit: int = 100, offset: int = 0):
+    """Get summaries of archived task runs, newest first, and the total number of matches"""
+    return archive.list(day=day, command=command, status=status, limit=limit, offset=offset)
+
+
+_retention_thread = None
+
+
+def _retention_loop(interval):
+    while True:
+        try:
+            apply_retention()
+            retention_metrics["last_error"] = None
+        except Exception as e:
+            retention_metrics["last_error"] = str(e)
+            logger.error(f"Task-run retention pass failed: {e}", exc_info=True)
+        time.sleep(interval)
+
+
+def start_retention_job(interval=None):
+    """Start the periodic retention pass in a daemon thread (once per process)."""
+    global _retention_thread
+    if _retention_thread is not None:
+        return _retention_thread
+    _retention_thread = threading.Thread(
+        target=_retention_loop, args=(interval or RETENTION_INTERVAL,), name="task-run-retention", daemon=True
+    )
+    _retention_thread.start()
+    return _retention_thread
@@ -0,0 +1,261 @@
+import json
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns copied out of the run dict so they can be indexed and filtered on.
+# The full run (minus logs) is kept as JSON in ``data``.
+_INDEXED_COLUMNS = ('command', 'user_id', 'status', 'created_at', 'updated_at')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_runs (
+    id TEXT PRIMARY KEY,
+    command TEXT,
+    user_id TEXT,
+    status TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_task_runs_status ON task_runs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_task_runs_command ON task_runs (command, created_at);
+CREATE INDEX IF NOT EXISTS idx_task_runs_user_id ON task_runs (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_task_runs_created_at ON task_runs (created_at);
+
+CREATE TABLE IF NOT EXISTS task_run_logs (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp TEXT,
+    message TEXT,
+    PRIMARY KEY (run_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS state_kv (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteTaskRunStore:
+    """Task-run store backed by SQLite in WAL mode.
+
+    Runs and their log lines live in separate tables, so listing runs or paging
+    through a run's logs never loads more than the requested rows. Several
+    processes can share the same database file.
+    """
+
+    def __init__(self, db_path, log_tail_size=200):
+        self.db_path = db_path
+        self.log_tail_size = log_tail_size
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _row_to_run(self, row):
+        run = json.loads(row['data'])
+        for column in _INDEXED_COLUMNS:
+            run[column] = row[column]
+        return run
+
+    def _log_count(self, run_id):
+        return self._conn().execute(
+            'SELECT COUNT(*) FROM task_run_logs WHERE run_id = ?', (run_id,)
+        ).fetchone()[0]
+
+    def _fetch_tail(self, run_id, count):
+        rows = self._conn().execute(
+            'SELECT timestamp, message FROM task_run_logs WHERE run_id = ? ORDER BY seq DESC LIMIT ?',
+            (run_id, count),
+        ).fetchall()
+        return [{'timestamp': r['timestamp'], 'message': r['message']} for r in reversed(rows)]
+
+    def _fetch_tails(self, run_ids, count):
+        """The last ``count`` log entries of each run in ``run_ids``, in one query."""
+        tails = {run_id: [] for run_id in run_ids}
+        if not run_ids:
+            return tails
+        rows = self._conn().execute(
+            'SELECT run_id, timestamp, message FROM ('
+            '  SELECT run_id, seq, timestamp, message, ROW_NUMBER() OVER (PARTITION BY run_id ORDER BY seq DESC) AS age'
+            f"  FROM task_run_logs WHERE run_id IN ({', '.join('?' * len(run_ids))})"
+            ') WHERE age <= ? ORDER BY run_id, seq',
+            (*run_ids, count),
+        ).fetchall()
+        for r in rows:
+            tails[r['run_id']].append({'timestamp': r['timestamp'], 'message': r['message']})
+        return tails
+
+    def _fetch_logs(self, run_id, since=0, limit=None):
+        rows = self._conn().execute(
+            'SELECT timestamp, message FROM task_run_logs WHERE run_id = ? AND seq >= ? ORDER BY seq LIMIT ?',
+            (run_id, since, -1 if limit is None else limit),
+        ).fetchall()
+        return [{'timestamp': r['timestamp'], 'message': r['message']} for r in rows]
+
+    def load(self):
+        row = self._conn().execute("SELECT value FROM state_kv WHERE key = 'sales_agent_status'").fetchone()
+        return json.loads(row['value']) if row else {}
+
+    def refresh(self):
+        # Every read goes to the database, so there is nothing to catch up on
+        pass
+
+    def flush(self):
+        # Every write is committed immediately
+        pass
+
+    def current_status(self):
+        return self.load()
+
+    def save(self, status=None, changes=None):
+        if status is None and not changes:
+            return self.load()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if status is None:
+                # Merge into what is stored, so keys other processes saved are kept
+                status = dict(self.load(), **changes)
+            elif changes:
+                status = dict(status, **changes)
+            conn.execute(
+                "INSERT OR REPLACE INTO state_kv (key, value) VALUES ('sales_agent_status', ?)",
+                (json.dumps(status, default=str),),
+            )
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return status
+
+    def create(self, run):
+        data = {k: v for k, v in run.items() if k != 'logs'}
+        self._conn().execute(
+            'INSERT INTO task_runs (id, command, user_id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (run['id'], *(run.get(c) for c in _INDEXED_COLUMNS), json.dumps(data, default=str)),
+        )
+
+    def update(self, run_id, fields):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT * FROM task_runs WHERE id = ?', (run_id,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return False
+            run = self._row_to_run(row)
+            run.update({k: v for k, v in fields.items() if k != 'logs'})
+            conn.execute(
+                'UPDATE task_runs SET command = ?, user_id = ?, status = ?, created_at = ?, updated_at = ?, data = ? WHERE id = ?',
+                (*(run.get(c) for c in _INDEXED_COLUMNS), json.dumps(run, default=str), run_id),
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def append_log(self, run_id, entry):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cur = conn.execute('UPDATE task_runs SET updated_at = ? WHERE id = ?', (entry['timestamp'], run_id))
+            if cur.rowcount == 0:
+                conn.execute('ROLLBACK')
+                return None
+            seq = conn.execute('SELECT COALESCE(MAX(seq) + 1, 0) FROM task_run_logs WHERE run_id = ?', (run_id,)).fetchone()[0]
+            conn.execute(
+                'INSERT INTO task_run_logs (run_id, seq, timestamp, message) VALUES (?, ?, ?, ?)',
+                (run_id, seq, entry['timestamp'], entry['message']),
+            )
+            conn.execute('COMMIT')
+            return seq
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, run_id):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cur = conn.execute('DELETE FROM task_runs WHERE id = ?', (run_id,))
+            conn.execute('DELETE FROM task_run_logs WHERE run_id = ?', (run_id,))
+            conn.execute('COMMIT')
+            return cur.rowcount > 0
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, run_id, include_logs=True):
+        row = self._conn().execute('SELECT * FROM task_runs WHERE id = ?', (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = self._row_to_run(row)
+        run['log_count'] = self._log_count(run_id)
+        if include_logs:
+            run['logs'] = self._fetch_tail(run_id, self.log_tail_size)
+        return run
+
+    def all(self, include_logs=False):
+        runs, _ = self.query(include_logs=include_logs)
+        return runs
+
+    def query(self, status=None, command=None, user_id=None, limit=None, offset=0, include_logs=False):
+        """Return ``(runs, total)`` for the matching runs, newest first."""
+        where, params = [], []
+        for column, value in (('status', status), ('command', command), ('user_id', user_id)):
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        clause = f" WHERE {' AND '.join(where)}" if where else ''
+        conn = self._conn()
+        total = conn.execute(f'SELECT COUNT(*) FROM task_runs{clause}', params).fetchone()[0]
+        # The log count is counted on the (run_id, seq) key, for the page's runs only
+        rows = conn.execute(
+            'SELECT *, (SELECT COUNT(*) FROM task_run_logs WHERE task_run_logs.run_id = task_runs.id) AS log_count '
+            f'FROM task_runs{clause} ORDER BY created_at DESC LIMIT ? OFFSET ?',
+            (*params, -1 if limit is None else limit, offset),
+        ).fetchall()
+        tails = self._fetch_tails([row['id'] for row in rows], self.log_tail_size) if include_logs else None
+        runs = []
+        for row in rows:
+            run = self._row_to_run(row)
+            run['log_count'] = row['log_count']
+            if include_logs:
+                run['logs'] = tails[run['id']]
+            runs.append(run)
+        return runs, total
+
+    def logs(self, run_id, since=0, limit=None):
+        """Return the log entries of a run starting at index ``since``, or None if unknown."""
+        if self._conn().execute('SELECT 1 FROM task_runs WHERE id = ?', (run_id,)).fetchone() is None:
+            return None
+        return self._fetch_logs(run_id, since, limit)
+
+    def iter_logs(self, run_id, since=0, page_size=500):
+        """Yield the full log history of a run from index ``since``, one page at a time."""
+        while True:
+            page = self._fetch_logs(run_id, since, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            since += len(page)
+
+    def tail(self, run_id, count):
+        """Return the newest ``count`` log entries of a run, or None if unknown."""
+        if self._conn().execute('SELECT 1 FROM task_runs WHERE id = ?', (run_id,)).fetchone() is None:
+            return None
+        return self._fetch_tail(run_id, count)
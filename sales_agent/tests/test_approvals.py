@@ -0,0 +1,77 @@
+"""ApprovalBroker: waking waiters through the shared SQLite file, as another process would."""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sales_agent.approvals import ApprovalBroker
+
+
+class ApprovalBrokerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = os.path.join(tempfile.mkdtemp(prefix="approvals_"), "approvals.db")
+
+    def test_approval_from_another_broker_wakes_the_waiter(self):
+        waiting, other = ApprovalBroker(self.db_path), ApprovalBroker(self.db_path)
+
+        async def main():
+            task = asyncio.ensure_future(waiting.wait("Acme", "send_email", timeout=5))
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            self.assertFalse(other.approve("Acme", "send_email", approved_by="test") is None)
+            self.assertTrue(await task)
+            return time.monotonic() - started
+
+        self.assertLess(asyncio.run(main()), 1.0)
+        # Consumed once acted on
+        self.assertFalse(waiting.is_approved("Acme", "send_email"))
+
+    def test_waiter_registered_while_the_watcher_goes_idle_is_not_missed(self):
+        waiting, other = ApprovalBroker(self.db_path), ApprovalBroker(self.db_path)
+        idle, gate = threading.Event(), threading.Event()
+
+        class SlowClear(threading.Event):
+            """Holds the idle watcher between seeing no waiters and clearing its wake-up flag."""
+            def clear(self):
+                if not gate.is_set():
+                    idle.set()
+                    gate.wait(5)
+                super().clear()
+
+        waiting._wakeup = SlowClear()
+        waiting._ensure_watcher()
+        self.assertTrue(idle.wait(5))
+
+        async def main():
+            task = asyncio.ensure_future(waiting.wait("Acme", "call", timeout=3))
+            await asyncio.sleep(0.05)
+            gate.set()
+            await asyncio.sleep(0.05)
+            other.approve("Acme", "call")
+            return await task
+
+        self.assertTrue(asyncio.run(main()))
+
+    def test_expired_request_is_reset(self):
+        broker = ApprovalBroker(self.db_path)
+        broker.approve("Acme", "call")
+        broker._conn().execute("UPDATE approvals SET expires_at = ?", (time.time() - 1,))
+        broker._last_eviction = time.time()
+        broker.request("Acme", "call", run_id="run-1")
+        self.assertFalse(broker.is_approved("Acme", "call"))
+        self.assertEqual([row["run_id"] for row in broker.pending()], ["run-1"])
+
+    def test_pending_request_follows_the_latest_run(self):
+        broker = ApprovalBroker(self.db_path)
+        broker.request("Acme", "call", run_id="run-1")
+        broker.request("Acme", "call", run_id="run-2")
+        self.assertEqual(broker.approve_run("run-1"), [])
+        self.assertEqual(broker.approve_run("run-2"), [("Acme", "call")])
+        self.assertTrue(broker.is_approved("Acme", "call"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""CrawlFrontier: a paused run picks up where it stopped after a restart."""
+import os
+import tempfile
+import unittest
+
+from sales_agent.leads.crawl_frontier import ACCEPTED, ENRICHED, QUEUED, CrawlFrontier
+
+
+class CrawlFrontierResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(prefix="frontier_"), "frontier.db")
+
+    def test_paused_run_resumes_from_a_fresh_process(self):
+        frontier = CrawlFrontier(self.path)
+        frontier.open_run("run-1", "Dentists", "Leeds", 2)
+        results = [{"company_name": f"Clinic {i}", "website": f"https://clinic{i}.test"} for i in range(4)]
+        frontier.save_search("find_leads_from_google_maps", "Dentists", "Leeds", 2, results)
+        self.assertEqual(len(frontier.add_candidates("run-1", results)), 4)
+        frontier.set_candidate("run-1", "Clinic 0", ACCEPTED, {"company_name": "Clinic 0"})
+        frontier.set_candidate("run-1", "Clinic 1", ENRICHED, {"company_name": "Clinic 1"})
+        self.assertTrue(frontier.pause_run("run-1"))
+        self.assertFalse(frontier.pause_run("run-1"))
+
+        # A restart: nothing carried over but the file
+        resumed = CrawlFrontier(self.path)
+        self.assertEqual(resumed.run_status("run-1"), "paused")
+        self.assertEqual(resumed.get_run("run-1")["candidates"], {ACCEPTED: 1, ENRICHED: 1, QUEUED: 2})
+        self.assertEqual([lead for _, lead in resumed.candidates("run-1", ACCEPTED)], [{"company_name": "Clinic 0"}])
+        self.assertEqual([data["company_name"] for data, _ in resumed.candidates("run-1", QUEUED)], ["Clinic 2", "Clinic 3"])
+
+        # Extending the run reuses the search and only queues companies it has not seen
+        resumed.open_run("run-1", "dentists", " Leeds", 3)
+        self.assertEqual(resumed.get_run("run-1")["desired_count"], 3)
+        self.assertEqual(resumed.run_status("run-1"), "running")
+        self.assertEqual(resumed.cached_search("find_leads_from_google_maps", "Dentists", "Leeds", 2), results)
+        self.assertIsNone(resumed.cached_search("find_leads_from_google_maps", "Dentists", "Leeds", 3))
+        more = results + [{"company_name": "clinic  4"}]
+        self.assertEqual(resumed.add_candidates("run-1", more), [{"company_name": "clinic  4"}])
+        self.assertEqual(resumed.seen_companies("run-1"), {f"clinic {i}" for i in range(5)})
+
+
+if __name__ == "__main__":
+    unittest.main()
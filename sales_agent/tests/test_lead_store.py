@@ -0,0 +1,43 @@
+"""SqlLeadStore: change cursors and lead selection."""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from sales_agent.leads.lead_store import SqlLeadStore
+
+
+async def _collect(chunks):
+    return [lead async for chunk in chunks for lead in chunk]
+
+
+class SqlLeadStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = SqlLeadStore(os.path.join(tempfile.mkdtemp(prefix="leads_"), "leads.db"))
+
+    def test_changes_since_pages_through_a_batch_sharing_one_timestamp(self):
+        # One batch, one updated_at for all of them
+        self.store._add_leads([{"Lead Name": f"L{i}"} for i in range(2500)])
+        leads, cursor = asyncio.run(self.store.changes_since())
+        self.assertEqual(len({lead["Lead Name"] for lead in leads}), 2500)
+        self.assertEqual(asyncio.run(self.store.changes_since(cursor))[0], [])
+
+        self.store._update_lead_score("L5", 3)
+        leads, _ = asyncio.run(self.store.changes_since(cursor))
+        self.assertEqual([lead["Lead Name"] for lead in leads], ["L5"])
+
+    def test_leads_without_a_status_count_as_new(self):
+        self.store._add_leads([
+            {"Lead Name": "Blank"}, {"Lead Name": "Fresh", "Status": "New"}, {"Lead Name": "Done", "Status": "Won"},
+        ])
+        new = asyncio.run(_collect(self.store.iter_leads({"Status": "New"})))
+        self.assertEqual(sorted(lead["Lead Name"] for lead in new), ["Blank", "Fresh"])
+        read = asyncio.run(self.store.read_leads())
+        self.assertEqual(sorted(lead["Lead Name"] for lead in read), ["Blank", "Fresh"])
+        won = asyncio.run(_collect(self.store.iter_leads({"Status": ["Won"]})))
+        self.assertEqual([lead["Lead Name"] for lead in won], ["Done"])
+
+
+if __name__ == "__main__":
+    unittest.main()
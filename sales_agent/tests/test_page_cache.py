@@ -0,0 +1,50 @@
+"""PageCache with a CrawlFrontier: only real content is recorded as extracted."""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from sales_agent.leads.crawl_frontier import CrawlFrontier
+from sales_agent.leads.page_cache import PageCache
+
+
+class _Response:
+    def __init__(self, url, status_code):
+        self.url = url
+        self.status_code = status_code
+        self.content = b'<html>hello info@acme.com</html>' if status_code == 200 else b'oops'
+        self.headers = {}
+
+
+class _Client:
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.gets = 0
+
+    async def get(self, url, **kwargs):
+        self.gets += 1
+        return _Response(url, self.statuses.pop(0))
+
+
+class PageCacheFrontierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frontier = CrawlFrontier(os.path.join(tempfile.mkdtemp(prefix="frontier_"), "frontier.db"))
+
+    def fetch(self, client, owner):
+        cache = PageCache(disk_dir=None, frontier=self.frontier, owner=owner)
+        return asyncio.run(cache.get("https://acme.com/", client))
+
+    def test_error_pages_are_released_for_a_later_run(self):
+        client = _Client(503, 200)
+        self.assertEqual(self.fetch(client, "run-1").status_code, 503)
+        self.assertEqual(self.fetch(client, "run-2").status_code, 200)
+        self.assertEqual(client.gets, 2)
+
+        # Extracted now: a third run reuses it without downloading
+        self.assertEqual(self.fetch(client, "run-3").status_code, 200)
+        self.assertEqual(client.gets, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""HostScheduler: which responses are retried, and how robots.txt failures are read."""
+import asyncio
+import unittest
+from unittest import mock
+
+from sales_agent.leads import politeness
+from sales_agent.leads.politeness import HostScheduler, RobotsDisallowed
+
+
+class _Response:
+    def __init__(self, url, status_code, content=b''):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+
+class _Client:
+    """Answers robots.txt with ``robots`` and pages with ``statuses`` in turn; records the page requests."""
+
+    def __init__(self, statuses, robots=200):
+        self.statuses = list(statuses)
+        self.robots = robots
+        self.pages = []
+
+    async def get(self, url, **kwargs):
+        if url.endswith('/robots.txt'):
+            return _Response(url, self.robots, b'User-agent: *\nDisallow: /private\n')
+        self.pages.append(url)
+        return _Response(url, self.statuses.pop(0))
+
+
+async def _resolves(self, host, port):
+    return True
+
+
+@mock.patch.object(HostScheduler, '_lookup', _resolves)
+class HostSchedulerRetryTest(unittest.TestCase):
+
+    def fetch(self, client, url):
+        scheduler = HostScheduler(min_delay=0, max_delay=0)
+        return asyncio.run(scheduler.fetch(client, url)).status_code
+
+    def test_throttled_responses_are_retried(self):
+        client = _Client([503, 429, 200])
+        self.assertEqual(self.fetch(client, 'https://throttled.test/a'), 200)
+        self.assertEqual(len(client.pages), 3)
+
+    def test_gives_up_after_the_throttle_retries(self):
+        client = _Client([429] * (politeness.CRAWL_THROTTLE_RETRIES + 1))
+        self.assertEqual(self.fetch(client, 'https://busy.test/a'), 429)
+        self.assertEqual(len(client.pages), politeness.CRAWL_THROTTLE_RETRIES + 1)
+
+    def test_other_errors_are_returned_as_they_are(self):
+        for status in (404, 500):
+            client = _Client([status])
+            self.assertEqual(self.fetch(client, f'https://error{status}.test/a'), status)
+            self.assertEqual(len(client.pages), 1)
+
+    def test_unreachable_robots_txt_disallows_the_site(self):
+        client = _Client([200], robots=503)
+        with self.assertRaises(RobotsDisallowed):
+            self.fetch(client, 'https://robots503.test/a')
+        self.assertEqual(client.pages, [])
+
+    def test_missing_robots_txt_allows_everything(self):
+        client = _Client([200], robots=404)
+        self.assertEqual(self.fetch(client, 'https://robots404.test/private'), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,16 @@
+"""Lost-update check for buffered Lead Score increments, run against the file-backed worksheet."""
+import unittest
+
+from sales_agent.benchmarks.score_deltas import run_check
+
+
+class ScoreDeltasTest(unittest.TestCase):
+
+    def test_concurrent_increments_from_several_processes_all_count(self):
+        expected, actual, batches, _ = run_check(processes=3, deltas=150, num_leads=10, latency=0.002, timeout=120)
+        self.assertGreater(batches, 0)
+        self.assertEqual(actual, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""SheetsRequestScheduler: which failures are retried, for reads and for appends."""
+import unittest
+
+from sales_agent.leads.sheets_scheduler import SheetsRequestScheduler
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {'Retry-After': '0'}
+
+
+class _ApiError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code)
+
+
+class _Flaky:
+    """Fails with each of ``errors`` in turn, then returns "ok"."""
+    __name__ = "flaky"
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class SheetsRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = SheetsRequestScheduler(rate_per_minute=60000, burst=100, max_retries=3, base_delay=0)
+
+    def test_reads_retry_server_errors_and_dropped_connections(self):
+        fn = _Flaky(_ApiError(503), ConnectionResetError(), _ApiError(429))
+        self.assertEqual(self.scheduler.call(fn), "ok")
+        self.assertEqual(fn.calls, 4)
+
+    def test_client_errors_are_not_retried(self):
+        fn = _Flaky(_ApiError(400))
+        with self.assertRaises(_ApiError):
+            self.scheduler.call(fn)
+        self.assertEqual(fn.calls, 1)
+
+    def test_appends_retry_only_rejections(self):
+        fn = _Flaky(_ApiError(429), ConnectionRefusedError())
+        self.assertEqual(self.scheduler.call(fn, idempotent=False), "ok")
+        self.assertEqual(fn.calls, 3)
+
+        for error in (_ApiError(503), ConnectionResetError(), TimeoutError()):
+            fn = _Flaky(error)
+            with self.assertRaises(type(error)):
+                self.scheduler.call(fn, idempotent=False)
+            self.assertEqual(fn.calls, 1)
+
+    def test_gives_up_after_max_retries(self):
+        fn = _Flaky(*[_ApiError(500)] * 5)
+        with self.assertRaises(_ApiError):
+            self.scheduler.call(fn)
+        self.assertEqual(fn.calls, 4)
+        self.assertEqual(self.scheduler.metrics()["operations"]["flaky"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""JournalTaskRunStore: the state a crashed process leaves on disk is replayed in full."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from sales_agent.state_journal import JournalTaskRunStore
+
+
+def _run(run_id):
+    return {"id": run_id, "command": "find_leads", "user_id": "u1", "status": "pending", "created_at": "2026-01-01T00:00:00"}
+
+
+class JournalReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="journal_")
+        self.snapshot = os.path.join(self.dir, "status.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def open_store(self):
+        store = JournalTaskRunStore(self.snapshot)
+        store.load()
+        return store
+
+    def test_replay_after_a_crash_mid_append(self):
+        store = self.open_store()
+        store.create(_run("r1"))
+        store.save()
+        store.update("r1", {"status": "running"})
+        store.append_log("r1", {"timestamp": "t1", "message": "searching"})
+        store.append_log("r1", {"timestamp": "t2", "message": "found 3 leads"})
+        store.create(_run("r2"))
+        store.flush()
+        # The process dies halfway through writing its next record
+        with open(store.journal.journal_path, "ab") as f:
+            f.write(b'{"op":"update","id":"r2","fields":{"status":"fail')
+        del store
+
+        store = self.open_store()
+        run = store.get("r1")
+        self.assertEqual(run["status"], "running")
+        self.assertEqual(run["log_count"], 2)
+        self.assertEqual([entry["message"] for entry in run["logs"]], ["searching", "found 3 leads"])
+        self.assertEqual(store.get("r2")["status"], "pending")
+        with open(store.journal.journal_path, "rb") as f:
+            self.assertTrue(f.read().endswith(b"\n"))
+
+        # The repaired journal keeps taking appends
+        store.update("r2", {"status": "completed"})
+        store.flush()
+        self.assertEqual(self.open_store().get("r2")["status"], "completed")
+
+    def test_records_already_in_the_snapshot_are_not_applied_twice(self):
+        store = self.open_store()
+        store.create(_run("r1"))
+        store.append_log("r1", {"timestamp": "t1", "message": "searching"})
+        store.flush()
+        with open(store.journal.journal_path, "rb") as f:
+            journal = f.read()
+        store.save()
+        # Crash after the snapshot was written but before the journal was reset
+        with open(store.journal.journal_path, "wb") as f:
+            f.write(journal)
+
+        run = self.open_store().get("r1")
+        self.assertEqual(run["log_count"], 1)
+        self.assertEqual(len(run["logs"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
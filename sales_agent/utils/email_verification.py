@@ -1,3 +1,4 @@
+import asyncio
 import os
 import requests
 from sales_agent.config import EMAIL_VERIFICATION_API_KEY
@@ -20,7 +21,8 @@ async def verify_email_with_abstractapi(email: str) -> dict:
     api_url = f"https://emailvalidation.abstractapi.com/v1/?api_key={EMAIL_VERIFICATION_API_KEY}&email={email}"
 
     try:
-        response = requests.get(api_url)
+        # requests is blocking; run it in a thread so concurrent lead enrichment keeps going
+        response = await asyncio.to_thread(requests.get, api_url, timeout=10)
         response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
         logger.info(f"AbstractAPI response: {response.json()}")
         return response.json()
@@ -1,8 +1,5 @@
 import logging
 from datetime import datetime
-from sales_agent.leads.google_sheets import GoogleSheet
-import logging
-from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -10,7 +7,6 @@ import requests
 
 from sales_agent.leads.google_sheets import GoogleSheet
 from sales_agent.config import (
-    GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH,
     SLACK_WEBHOOK_URL, ALERT_EMAIL_ADDRESS, ALERT_EMAIL_PASSWORD,
     ALERT_EMAIL_SMTP_SERVER, ALERT_EMAIL_SMTP_PORT
 )
@@ -19,15 +15,15 @@ logger = logging.getLogger(__name__)
 
 async def log_error_to_sheet(error_message: str, details: str = ""):
     try:
-        google_sheet = GoogleSheet(GOOGLE_SHEET_ID, GOOGLE_SHEETS_CREDENTIALS_PATH)
+        google_sheet = GoogleSheet.shared()
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         error_data = {
             "Timestamp": timestamp,
             "Error Message": error_message,
             "Details": details
         }
-        await google_sheet.append_row_to_sheet("Logs", list(error_data.keys()), list(error_data.values()))
-        logger.info(f"Error logged to Google Sheet: {error_message}")
+        if await google_sheet.append_row_to_sheet("Logs", list(error_data.keys()), list(error_data.values())):
+            logger.info(f"Error logged to Google Sheet: {error_message}")
     except Exception as e:
         logger.error(f"Failed to log error to Google Sheet: {e}")
 
@@ -0,0 +1,65 @@
+import os
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, shared between processes.
+
+    Reentrant within the owning thread of the caller; callers are expected to
+    serialize their own threads (e.g. with a ``threading.RLock``) before taking
+    it, as only one holder per process is tracked.
+    """
+
+    def __init__(self, path, poll_interval=0.005):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fh = None
+        self._depth = 0
+
+    def acquire(self):
+        if self._depth:
+            self._depth += 1
+            return
+        fh = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                fh.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(self.poll_interval)
+            else:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            fh.close()
+            raise
+        self._fh = fh
+        self._depth = 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth:
+            return
+        fh, self._fh = self._fh, None
+        try:
+            if os.name == "nt":
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            fh.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()